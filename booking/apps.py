@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class BookingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'booking'
+
+    def ready(self):
+        from . import querylog, signals, writes
+        post_migrate.connect(signals.install_search_index, sender=self)
+        connection_created.connect(querylog.install, dispatch_uid='booking_querylog')
+        connection_created.connect(writes.apply_sqlite_pragmas, dispatch_uid='booking_sqlite_pragmas')
@@ -0,0 +1,5 @@
+from .async_views import async_urlpatterns
+from .urls import urlpatterns as sync_urlpatterns
+
+# booking.urls with the read endpoints served by booking.async_views (ASGI deployment).
+urlpatterns = async_urlpatterns(sync_urlpatterns)
@@ -0,0 +1,293 @@
+"""
+Native async variants of the read endpoints, mounted under ASGI.
+
+Each class serves GET for the same route as a synchronous APIView in
+booking.views (its ``sync_view``) and returns byte-for-byte the same JSON.
+The view's filters, pagination, lean serializers and response cache are
+reused, and the database is read through the async ORM. List exports
+(NDJSON/CSV) are streamed from ``QuerySet.aiterator()`` through an async
+generator, so they stay constant-memory under ASGI; a sync iterator would
+be drained into a list by Django's ASGI handler. Anything else the route
+handles (writes) is passed on to ``sync_view``.
+"""
+from abc import ABC, abstractmethod
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import path
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from . import counters, metrics, search
+from .cache import aresponse_key, response_timeout
+from .conditional import adetail_validators, alist_validators, not_modified, set_validators
+from .lean import lean_serializer, requested_fields
+from .mixins import keyed_by_id, requested_ids
+from .models import User, Room, Booking, Payment, Service, BookingService, Discount, Review
+from .renderers import NDJSONRenderer, CSVRenderer
+from .serializers import UserSerializer, RoomSerializer, BookingSerializer, PaymentSerializer, ServiceSerializer, \
+    BookingServiceSerializer, DiscountSerializer, ReviewSerializer
+from .views import UserListView, RoomListView, BookingListView, PaymentListView, ServiceListView, \
+    BookingServiceListView, DiscountListView, ReviewListView, UserDetailView, RoomDetailView, BookingDetailView, \
+    PaymentDetailView, ServiceDetailView, BookingServiceDetailView, DiscountDetailView, ReviewDetailView, \
+    StatisticsView, RoomFilterView
+
+EXPORT_RENDERERS = (NDJSONRenderer, CSVRenderer)
+
+
+def export_renderer(request):
+    """The export renderer a GET asks for with ?format= or Accept, as DRF would pick it; None for JSON."""
+    requested = request.GET.get('format')
+    accept = request.headers.get('Accept', '')
+    for renderer in EXPORT_RENDERERS:
+        if requested == renderer.format or (requested is None and renderer.media_type in accept):
+            return renderer()
+    return None
+
+
+def json_response(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def error_response(error):
+    """The response DRF's exception handler gives an APIException."""
+    data = error.detail if isinstance(error.detail, (list, dict)) else {'detail': error.detail}
+    return json_response(data, status=error.status_code)
+
+
+class AsyncReadView(ABC, View):
+    sync_view = None
+    cached_models = ()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Writes are delegated to DRF views, which are CSRF-exempt themselves.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method == 'GET':
+            renderer = export_renderer(request)
+            if renderer is None:
+                return self.get(request, *args, **kwargs)
+            return self.export(request, renderer, *args, **kwargs)
+        return self.delegate(request, *args, **kwargs)
+
+    async def delegate(self, request, *args, **kwargs):
+        return await sync_to_async(self.sync_view.as_view())(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        return await self.conditional(Request(request), self.respond, *args, **kwargs)
+
+    async def export(self, request, renderer, *args, **kwargs):
+        """Exports of routes that don't stream them natively are the sync view's (small) responses."""
+        return await self.delegate(request, *args, **kwargs)
+
+    async def conditional(self, request, respond, *args, **kwargs):
+        etag, last_modified = await self.validators(request, *args, **kwargs)
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = set_validators(await respond(request, *args, **kwargs), etag, last_modified)
+        return response
+
+    async def respond(self, request, *args, **kwargs):
+        key = None
+        if self.cached_models:
+            key = await aresponse_key(request, self.cached_models)
+            data = await cache.aget(key)
+            if data is not None:
+                metrics.record_cache(request, hit=True)
+                return json_response(data)
+
+        try:
+            status, data = await self.read(request, *args, **kwargs)
+        except APIException as error:
+            return error_response(error)
+
+        if key and status == 200:
+            await cache.aset(key, data, timeout=response_timeout())
+            metrics.record_cache(request, hit=False)
+        return json_response(data, status)
+
+    async def validators(self, request, *args, **kwargs):
+        """(ETag, Last-Modified) of the response, as in booking.conditional."""
+        return await alist_validators(request, self.cached_models)
+
+    @abstractmethod
+    async def read(self, request, *args, **kwargs):
+        """(status, data) of the response."""
+
+
+class AsyncListView(AsyncReadView):
+    serializer_class = None
+
+    async def read(self, request):
+        view = self.sync_view()
+        lean = lean_serializer(self.serializer_class, requested_fields(request, self.serializer_class))
+        queryset = view.filtered_queryset(request.query_params)
+        ids = requested_ids(request)
+        if ids is not None:
+            rows = [row async for row in lean.values(queryset.filter(pk__in=ids))]
+            return 200, keyed_by_id(lean, rows, await lean.aserialize(rows), ids)
+
+        paginator = view.pagination_class()
+        rows = lean.values(queryset)
+        page = await paginator.apaginate_queryset(rows, request, view=view)
+        return 200, paginator.get_paginated_response(await lean.aserialize(page)).data
+
+    async def export(self, request, renderer):
+        return await self.conditional(Request(request), lambda request: self.stream(request, renderer))
+
+    async def stream(self, request, renderer):
+        """ListResponseMixin.export_response, read with the async ORM."""
+        view = self.sync_view()
+        try:
+            lean = lean_serializer(self.serializer_class, requested_fields(request, self.serializer_class))
+            ids = requested_ids(request)
+        except APIException as error:
+            return error_response(error)
+        queryset = view.filtered_queryset(request.query_params)
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        rows = lean.values(queryset).order_by(lean.pk_name).aiterator(chunk_size=view.export_chunk_size)
+        return StreamingHttpResponse(
+            renderer.aiter_render(lean.aiter_serialize(rows, view.export_chunk_size)),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+
+
+class AsyncDetailView(AsyncReadView):
+    serializer_class = None
+    not_found = None
+
+    async def validators(self, request, **lookup):
+        return await adetail_validators(request, self.cached_models[0], lookup, self.cached_models[1:])
+
+    async def read(self, request, **lookup):
+        lean = lean_serializer(self.serializer_class, requested_fields(request, self.serializer_class))
+        row = await lean.values(lean.model.objects.filter(**lookup)).afirst()
+        if row is None:
+            return 404, {"error": self.not_found}
+        return 200, (await lean.aserialize([row]))[0]
+
+
+class AsyncStatisticsView(AsyncReadView):
+    sync_view = StatisticsView
+
+    async def validators(self, request):
+        return None, None
+
+    async def read(self, request):
+        return 200, await counters.acurrent()
+
+
+class AsyncRoomFilterView(AsyncReadView):
+    sync_view = RoomFilterView
+
+    async def validators(self, request):
+        return await alist_validators(request, (Room,))
+
+    async def read(self, request):
+        view = self.sync_view()
+        rooms = [room async for room in view.filtered_queryset(request.query_params)]
+
+        search_term = request.query_params.get('search_term', '')
+        if search_term and search.is_indexed(Room):
+            # FTS5 ranking is raw SQL, which has no async interface.
+            rooms = view.ranked(rooms, await sync_to_async(search.ranked_ids)(Room, search_term))
+        return 200, view.room_list(rooms)
+
+
+class AsyncUserListView(AsyncListView):
+    sync_view, serializer_class, cached_models = UserListView, UserSerializer, (User,)
+
+
+class AsyncRoomListView(AsyncListView):
+    sync_view, serializer_class, cached_models = RoomListView, RoomSerializer, (Room,)
+
+
+class AsyncBookingListView(AsyncListView):
+    sync_view, serializer_class, cached_models = BookingListView, BookingSerializer, (Booking,)
+
+
+class AsyncPaymentListView(AsyncListView):
+    sync_view, serializer_class, cached_models = PaymentListView, PaymentSerializer, (Payment,)
+
+
+class AsyncServiceListView(AsyncListView):
+    sync_view, serializer_class, cached_models = ServiceListView, ServiceSerializer, (Service,)
+
+
+class AsyncBookingServiceListView(AsyncListView):
+    sync_view, serializer_class, cached_models = BookingServiceListView, BookingServiceSerializer, (BookingService,)
+
+
+class AsyncDiscountListView(AsyncListView):
+    sync_view, serializer_class, cached_models = DiscountListView, DiscountSerializer, (Discount, Service)
+
+
+class AsyncReviewListView(AsyncListView):
+    sync_view, serializer_class, cached_models = ReviewListView, ReviewSerializer, (Review,)
+
+
+class AsyncUserDetailView(AsyncDetailView):
+    sync_view, serializer_class, cached_models = UserDetailView, UserSerializer, (User,)
+    not_found = "User not found"
+
+
+class AsyncRoomDetailView(AsyncDetailView):
+    sync_view, serializer_class, cached_models = RoomDetailView, RoomSerializer, (Room,)
+    not_found = "Room not found"
+
+
+class AsyncBookingDetailView(AsyncDetailView):
+    sync_view, serializer_class, cached_models = BookingDetailView, BookingSerializer, (Booking,)
+    not_found = "Booking not found"
+
+
+class AsyncPaymentDetailView(AsyncDetailView):
+    sync_view, serializer_class, cached_models = PaymentDetailView, PaymentSerializer, (Payment,)
+    not_found = "Payment not found"
+
+
+class AsyncServiceDetailView(AsyncDetailView):
+    sync_view, serializer_class, cached_models = ServiceDetailView, ServiceSerializer, (Service,)
+    not_found = "Service not found"
+
+
+class AsyncBookingServiceDetailView(AsyncDetailView):
+    sync_view, serializer_class, cached_models = BookingServiceDetailView, BookingServiceSerializer, (BookingService,)
+    not_found = "Booking Service not found"
+
+
+class AsyncDiscountDetailView(AsyncDetailView):
+    sync_view, serializer_class, cached_models = DiscountDetailView, DiscountSerializer, (Discount, Service)
+    not_found = "Discount not found"
+
+
+class AsyncReviewDetailView(AsyncDetailView):
+    sync_view, serializer_class, cached_models = ReviewDetailView, ReviewSerializer, (Review,)
+    not_found = "Review not found"
+
+
+ASYNC_VARIANTS = {view.sync_view: view for view in (
+    AsyncStatisticsView, AsyncRoomFilterView,
+    AsyncUserListView, AsyncRoomListView, AsyncBookingListView, AsyncPaymentListView,
+    AsyncServiceListView, AsyncBookingServiceListView, AsyncDiscountListView, AsyncReviewListView,
+    AsyncUserDetailView, AsyncRoomDetailView, AsyncBookingDetailView, AsyncPaymentDetailView,
+    AsyncServiceDetailView, AsyncBookingServiceDetailView, AsyncDiscountDetailView, AsyncReviewDetailView,
+)}
+
+
+def async_urlpatterns(patterns):
+    """``patterns`` with every route that has an async variant pointed at it."""
+    swapped = []
+    for pattern in patterns:
+        view_class = getattr(getattr(pattern, 'callback', None), 'view_class', None)
+        if view_class in ASYNC_VARIANTS:
+            pattern = path(str(pattern.pattern), ASYNC_VARIANTS[view_class].as_view(), name=pattern.name)
+        swapped.append(pattern)
+    return swapped
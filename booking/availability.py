@@ -0,0 +1,86 @@
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Room, Booking
+from .rollups import local_day
+
+
+def parse_stay_bound(value):
+    """
+    Parse a check-in/check-out value given either as a date
+    (``2024-05-01``) or as an ISO 8601 datetime string. Returns an aware
+    datetime, or None when the value is not such a string (JSON bodies can
+    carry numbers, lists, ...).
+    """
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            moment = datetime.combine(day, time.min)
+    except ValueError:
+        return None
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def spans_a_night(check_in, check_out):
+    """
+    Whether a stay covers at least one night: it must check out on a later
+    calendar day than it checks in. Day-use stays would hold no night in the
+    inventory ledger while still counting as overlaps, so they are refused.
+    """
+    return local_day(check_in) < local_day(check_out)
+
+
+def parse_price(value):
+    """Parse a price query value into a finite Decimal; None when it can't be parsed."""
+    try:
+        price = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return price if price.is_finite() else None
+
+
+def overlapping_bookings(check_in, check_out):
+    """
+    Bookings whose stay intersects the half-open interval [check_in, check_out).
+
+    The filter is shaped for the (room, check_out_date, check_in_date) index on
+    Booking: past stays are skipped by the range on check_out_date, so the
+    cost depends on upcoming bookings, not on years of history.
+    """
+    return Booking.objects.filter(check_out_date__gt=check_in, check_in_date__lt=check_out)
+
+
+def available_rooms(check_in, check_out, room_type=None, max_price=None):
+    rooms = Room.objects.all()
+    if room_type:
+        rooms = rooms.filter(room_type=room_type)
+    if max_price is not None:
+        rooms = rooms.filter(price__lte=max_price)
+
+    busy = overlapping_bookings(check_in, check_out).filter(room=OuterRef('pk'))
+    return rooms.filter(~Exists(busy))
+
+
+def room_is_free(room_id, check_in, check_out):
+    return not overlapping_bookings(check_in, check_out).filter(room_id=room_id).exists()
+
+
+def booked_intervals(room_ids, check_in, check_out):
+    """Map room_id -> [(check_in_date, check_out_date), ...] of stays overlapping the window."""
+    intervals = {}
+    rows = overlapping_bookings(check_in, check_out).filter(room_id__in=room_ids) \
+        .values_list('room_id', 'check_in_date', 'check_out_date')
+    for room_id, start, end in rows:
+        intervals.setdefault(room_id, []).append((start, end))
+    return intervals
@@ -0,0 +1,56 @@
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from . import profiling
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """
+    Run a benchmark against a throwaway copy of the schema instead of the
+    real database. SQLite gets a file-backed database rather than Django's
+    shared in-memory one, so worker threads behave as they would in a real
+    deployment. The test environment (test host, DEBUG off, locmem email) is
+    active for the duration. Read replicas mirror the throwaway database,
+    as they do under the test runner.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+    if connection.vendor == 'sqlite' and not old_test_name:
+        test_settings['NAME'] = str(Path(tempfile.gettempdir()) / 'booking_benchmark.sqlite3')
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    # Connections are per thread and built from settings.DATABASES, so point
+    # the replica entries themselves at the throwaway database.
+    replica_names = {}
+    for alias in settings.BOOKING_REPLICA_DATABASES:
+        replica_names[alias] = settings.DATABASES[alias]['NAME']
+        connections[alias].close()
+        settings.DATABASES[alias]['NAME'] = connection.settings_dict['NAME']
+    try:
+        yield connection
+    finally:
+        # Profiled requests belong to the throwaway database; write them before it goes away.
+        profiling.flush()
+        connections.close_all()
+        for alias, name in replica_names.items():
+            settings.DATABASES[alias]['NAME'] = name
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        test_settings['NAME'] = old_test_name
+        teardown_test_environment()
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of ``values`` (``fraction`` in 0..1)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
@@ -0,0 +1,178 @@
+"""
+Set-based bulk upsert and delete for catalog resources (rooms, users, services).
+
+Rows are written in chunks, one transaction per chunk on the serialized
+write path (booking.writes). Each chunk costs one query to read the
+existing rows by key and one INSERT ... ON CONFLICT DO UPDATE
+(bulk_create with update_conflicts) for every new or changed row, instead
+of a request, a transaction and a save() per row.
+
+bulk_create sends no signals, so the statistics counters, the response
+cache generations, the indexed names of renamed services
+(booking.discount_index) and the rollups of retyped rooms are maintained
+here. The full-text index follows through its triggers. Deletes go through QuerySet.delete(), which keeps the
+per-row cascade bookkeeping (bookings, counters, rollups, the inventory
+ledger) of the single-row DELETE endpoints.
+"""
+from rest_framework import serializers
+
+from . import counters, discount_index, rollups, writes
+from .cache import bump_generation
+from .models import Room, Service, User
+from .serializers import RoomSerializer, ServiceSerializer, UserSerializer
+
+
+class RoomUpsertSerializer(RoomSerializer):
+    class Meta(RoomSerializer.Meta):
+        # room_number is the upsert key; an existing number means "update", not a validation error.
+        extra_kwargs = {'room_number': {'validators': []}}
+
+
+class UserUpsertSerializer(UserSerializer):
+    class Meta(UserSerializer.Meta):
+        extra_kwargs = {'email': {'validators': []}}
+
+
+class ServiceUpsertSerializer(ServiceSerializer):
+    service_id = serializers.IntegerField(required=False)
+
+
+class BulkResource:
+    """
+    How to upsert one model: ``key`` identifies rows, ``create_by_key``
+    says whether an unknown key creates a row (natural keys) or is rejected
+    (database-assigned ids, where rows without a key are created instead).
+    """
+
+    def __init__(self, model, key, serializer_class, create_by_key=True, chunk_size=500, on_update=None):
+        self.model = model
+        self.key = key
+        self.serializer_class = serializer_class
+        self.create_by_key = create_by_key
+        self.chunk_size = chunk_size
+        self.on_update = on_update
+        self.counter, self.summed = counters.TRACKED_MODELS[model]
+        self.fields = [field.attname for field in model._meta.concrete_fields if not field.primary_key]
+
+    def validate(self, items):
+        """(index, validated data) of the valid items, and rejection results for the rest."""
+        valid, rejected = [], []
+        seen = set()
+        for index, item in enumerate(items):
+            serializer = self.serializer_class(data=item)
+            if not serializer.is_valid():
+                rejected.append({'index': index, 'status': 'rejected', 'errors': serializer.errors})
+                continue
+            key = serializer.validated_data.get(self.key)
+            if key is not None:
+                if key in seen:
+                    rejected.append({'index': index, 'status': 'rejected',
+                                     'errors': {self.key: ['Duplicate key in this batch.']}})
+                    continue
+                seen.add(key)
+            valid.append((index, serializer.validated_data))
+        return valid, rejected
+
+    def upsert(self, items):
+        valid, results = self.validate(items)
+        for start in range(0, len(valid), self.chunk_size):
+            chunk = valid[start:start + self.chunk_size]
+            try:
+                results += writes.atomic_write(lambda: self._upsert_chunk(chunk))
+            except writes.WriteContention as error:
+                results += [{'index': index, 'status': 'failed', 'error': str(error)} for index, _ in chunk]
+        return sorted(results, key=lambda result: result['index'])
+
+    def _upsert_chunk(self, chunk):
+        keys = [data[self.key] for _, data in chunk if data.get(self.key) is not None]
+        existing = {row[self.key]: row for row in
+                    self.model.objects.filter(**{f'{self.key}__in': keys}).values(self.model._meta.pk.attname,
+                                                                                   *self.fields)}
+        results, rows, outcomes = [], [], []
+        for index, data in chunk:
+            key = data.get(self.key)
+            current = existing.get(key) if key is not None else None
+            if current is None and key is not None and not self.create_by_key:
+                results.append({'index': index, 'status': 'rejected',
+                                'errors': {self.key: [f'No {self.model._meta.verbose_name} with this id.']}})
+                continue
+            if current is not None and all(current[name] == value for name, value in data.items()):
+                results.append({'index': index, 'status': 'unchanged', 'id': current[self.model._meta.pk.attname]})
+                continue
+            rows.append(self.model(**{**(current or {}), **data}))
+            outcomes.append((index, current))
+
+        if not rows:
+            return results
+
+        if self.create_by_key:
+            created_rows = self.model.objects.bulk_create(
+                rows, update_conflicts=True, unique_fields=[self.key],
+                update_fields=[name for name in self.fields if name != self.key],
+            )
+        else:
+            created_rows = self._create_or_update_by_id(rows, outcomes)
+
+        created = 0
+        summed_delta = 0
+        for (index, current), row in zip(outcomes, created_rows):
+            created += current is None
+            if self.summed:
+                field = self.summed[0]
+                summed_delta += getattr(row, field) - (current[field] if current is not None else 0)
+            results.append({'index': index, 'status': 'created' if current is None else 'updated', 'id': row.pk})
+
+        if self.on_update:
+            self.on_update([(current, row) for (_, current), row in zip(outcomes, created_rows) if current is not None])
+        bump_generation(self.model)
+        counters.adjust(**{self.counter: created, **({self.summed[1]: summed_delta} if self.summed else {})})
+        return results
+
+    def _create_or_update_by_id(self, rows, outcomes):
+        new = [row for row, (_, current) in zip(rows, outcomes) if current is None]
+        changed = [row for row, (_, current) in zip(rows, outcomes) if current is not None]
+        if changed:
+            self.model.objects.bulk_create(changed, update_conflicts=True, unique_fields=[self.key],
+                                           update_fields=self.fields)
+        created = iter(self.model.objects.bulk_create(new))
+        updated = iter(changed)
+        return [next(created) if current is None else next(updated) for _, current in outcomes]
+
+    def parse_keys(self, keys):
+        """``keys`` converted to the key field's type; raises django.core.exceptions.ValidationError."""
+        field = self.model._meta.get_field(self.key)
+        return list(dict.fromkeys(field.to_python(key) for key in keys))
+
+    def delete(self, keys):
+        results = []
+        for start in range(0, len(keys), self.chunk_size):
+            chunk = keys[start:start + self.chunk_size]
+            try:
+                results += writes.atomic_write(lambda: self._delete_chunk(start, chunk))
+            except writes.WriteContention as error:
+                results += [{'index': start + offset, 'key': key, 'status': 'failed', 'error': str(error)}
+                            for offset, key in enumerate(chunk)]
+        return results
+
+    def _delete_chunk(self, start, chunk):
+        found = set(self.model.objects.filter(**{f'{self.key}__in': chunk}).values_list(self.key, flat=True))
+        if found:
+            self.model.objects.filter(**{f'{self.key}__in': found}).delete()
+        return [{'index': start + offset, 'key': key, 'status': 'deleted' if key in found else 'not_found'}
+                for offset, key in enumerate(chunk)]
+
+
+def _retype_rooms(changes):
+    for current, row in changes:
+        if current['room_type'] != row.room_type:
+            rollups.retype_room(row.pk, current['room_type'], row.room_type)
+
+
+ROOMS = BulkResource(Room, 'room_number', RoomUpsertSerializer, on_update=_retype_rooms)
+USERS = BulkResource(User, 'email', UserUpsertSerializer)
+SERVICES = BulkResource(
+    Service, 'service_id', ServiceUpsertSerializer, create_by_key=False,
+    on_update=lambda changes: discount_index.rename_services(
+        [row.pk for current, row in changes if current['name'] != row.name]
+    ),
+)
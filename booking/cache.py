@@ -0,0 +1,121 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from . import metrics, routers
+from .renderers import StreamingRenderer
+
+GENERATION_KEY = 'booking:generation:{}'
+RESPONSE_KEY = 'booking:response:{}'
+
+
+def _generation_key(model):
+    return GENERATION_KEY.format(model._meta.label_lower)
+
+
+def _fresh_generation():
+    # A lost generation key must never come back as a value an old response
+    # was cached under, so a reset starts from the clock instead of from 1.
+    return time.time_ns()
+
+
+def generations(models):
+    """Current generation of each model, fetched in a single cache round trip."""
+    keys = [_generation_key(model) for model in models]
+    found = cache.get_many(keys)
+    missing = {key: _fresh_generation() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+async def agenerations(models):
+    """generations() through the cache's async interface."""
+    keys = [_generation_key(model) for model in models]
+    found = await cache.aget_many(keys)
+    missing = {key: _fresh_generation() for key in keys if key not in found}
+    if missing:
+        await cache.aset_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def bump_generation(*models):
+    """Invalidate every cached response that depends on ``models`` once the current transaction commits."""
+    transaction.on_commit(lambda: _bump(models))
+
+
+def _bump(models):
+    for model in models:
+        key = _generation_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_generation(), timeout=None)
+
+
+def response_key(request, models):
+    return _response_key(request, generations(models))
+
+
+async def aresponse_key(request, models):
+    return _response_key(request, await agenerations(models))
+
+
+def _response_key(request, model_generations):
+    query = sorted((name, sorted(values)) for name, values in request.query_params.lists())
+    # Replica reads may lag the generation they are cached under; a client
+    # pinned to the primary after a write must never be served one.
+    source = 'replica' if routers.reading_from_replica() else 'primary'
+    parts = [request.get_host(), request.path, repr(query), repr(model_generations), source]
+    return RESPONSE_KEY.format(hashlib.sha1('|'.join(parts).encode()).hexdigest())
+
+
+def response_timeout():
+    """
+    How long to keep a response computed in the current context.
+
+    A replica may not have replayed the write that bumped a generation yet,
+    so what it returns under the new generation can be stale. Those entries
+    only live as long as the read-your-writes window.
+    """
+    if routers.reading_from_replica():
+        return min(settings.BOOKING_RESPONSE_CACHE_TIMEOUT, settings.BOOKING_REPLICA_PIN_SECONDS)
+    return settings.BOOKING_RESPONSE_CACHE_TIMEOUT
+
+
+def cached_response(*models):
+    """
+    Cache a view's successful ``Response.data`` until one of ``models`` changes.
+
+    The cache key carries the current generation of every model the response
+    is built from; booking.signals bumps those generations on every write, so
+    a cached entry is never served after the data behind it has changed.
+    Streaming exports and error responses are passed through uncached; an
+    export negotiated from the Accept header bypasses the cache entirely, as
+    its URL is the same as that of the JSON page.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if isinstance(getattr(request, 'accepted_renderer', None), StreamingRenderer):
+                return view_method(self, request, *args, **kwargs)
+            key = response_key(request, models)
+            data = cache.get(key)
+            if data is not None:
+                metrics.record_cache(request, hit=True)
+                return Response(data)
+
+            response = view_method(self, request, *args, **kwargs)
+            if isinstance(response, Response) and response.status_code == 200:
+                cache.set(key, response.data, timeout=response_timeout())
+                metrics.record_cache(request, hit=False)
+            return response
+        return wrapper
+    return decorator
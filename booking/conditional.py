@@ -0,0 +1,110 @@
+"""
+Conditional GET (ETag / Last-Modified -> 304 Not Modified) for the read API.
+
+Validators are computed without running the view:
+
+* list endpoints: the cache generations of the models the response is
+  built from (booking/cache.py), so one cache round trip;
+* detail endpoints: the row's ``updated_at`` (one indexed single-column
+  lookup) plus the generations of any other models nested in the body.
+
+Both are hashed with the path, query string and Accept header, since those
+select the representation. A request whose If-None-Match /
+If-Modified-Since still matches gets a 304 before any serialization.
+
+Requests that read from a replica (booking.routers) get no validators: the
+generations move with the primary, so a lagging replica's body would be
+tagged as current and revalidated as such long after the replica caught up.
+"""
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from . import routers
+from .cache import agenerations, generations
+
+
+def _etag(request, *parts):
+    query = sorted((name, sorted(values)) for name, values in request.GET.lists())
+    digest = hashlib.sha1('|'.join(map(repr, (
+        request.path, query, request.META.get('HTTP_ACCEPT', ''), *parts,
+    ))).encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def list_validators(request, models):
+    if routers.reading_from_replica():
+        return None, None
+    return _etag(request, generations(models)), None
+
+
+async def alist_validators(request, models):
+    if routers.reading_from_replica():
+        return None, None
+    return _etag(request, await agenerations(models)), None
+
+
+def _row_version(model, lookup):
+    return model.objects.filter(**lookup).values_list('updated_at', flat=True)
+
+
+def detail_validators(request, model, lookup, related=()):
+    if routers.reading_from_replica():
+        return None, None
+    updated_at = _row_version(model, lookup).first()
+    if updated_at is None:
+        # No such row: let the view answer 404.
+        return None, None
+    return _etag(request, updated_at.isoformat(), generations(related)), updated_at
+
+
+async def adetail_validators(request, model, lookup, related=()):
+    if routers.reading_from_replica():
+        return None, None
+    updated_at = await _row_version(model, lookup).afirst()
+    if updated_at is None:
+        return None, None
+    return _etag(request, updated_at.isoformat(), await agenerations(related)), updated_at
+
+
+def not_modified(request, etag, last_modified):
+    """The 304 (or 412) answer to a conditional request, or None when the view has to run."""
+    if etag is None and last_modified is None:
+        return None
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified and int(last_modified.timestamp()),
+    )
+
+
+def set_validators(response, etag, last_modified):
+    if 200 <= response.status_code < 300:
+        if etag:
+            response.headers.setdefault('ETag', etag)
+        if last_modified and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def _conditional(validators):
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            etag, last_modified = validators(request, *args, **kwargs)
+            response = not_modified(request, etag, last_modified)
+            if response is None:
+                response = set_validators(view_method(self, request, *args, **kwargs), etag, last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_list(*models):
+    """Answer conditional GETs of a list view from the generations of ``models``."""
+    return _conditional(lambda request, *args, **kwargs: list_validators(request, models))
+
+
+def conditional_detail(model, *related):
+    """Answer conditional GETs of a detail view from the row's updated_at (and ``related`` generations)."""
+    return _conditional(lambda request, **lookup: detail_validators(request, model, lookup, related))
@@ -0,0 +1,133 @@
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, Sum, F
+
+from .models import User, Room, Booking, Payment, Service, BookingService, Discount, Review, StatisticsSnapshot
+
+SNAPSHOT_ID = 1
+
+# model -> (row counter, (summed field, running sum)) on StatisticsSnapshot
+TRACKED_MODELS = {
+    User: ('total_users', None),
+    Room: ('total_rooms', ('price', 'room_price_sum')),
+    Booking: ('total_bookings', None),
+    Payment: ('total_payments', ('amount', 'payment_amount_sum')),
+    Service: ('total_services', None),
+    BookingService: ('total_booking_services', None),
+    Discount: ('total_discounts', None),
+    Review: ('total_reviews', ('rating', 'review_rating_sum')),
+}
+
+COUNTER_FIELDS = [
+    'total_users', 'total_rooms', 'room_price_sum', 'total_bookings', 'total_payments', 'payment_amount_sum',
+    'total_services', 'total_booking_services', 'total_discounts', 'total_reviews', 'review_rating_sum',
+]
+
+
+def adjust(**deltas):
+    """
+    Add ``deltas`` to the snapshot once the surrounding transaction commits.
+
+    The update runs in its own short autocommit statement, so the single
+    snapshot row is never held locked for the length of a booking
+    transaction, and rolled-back writes never reach the counters.
+    """
+    deltas = {field: value for field, value in deltas.items() if value}
+    if deltas:
+        transaction.on_commit(lambda: _apply(deltas))
+
+
+def _apply(deltas):
+    updated = StatisticsSnapshot.objects.filter(snapshot_id=SNAPSHOT_ID).update(
+        **{field: F(field) + value for field, value in deltas.items()}
+    )
+    if not updated:
+        rebuild()
+
+
+def compute():
+    """Recount everything from the base tables (what StatisticsView used to do per request)."""
+    totals = {}
+    for model, (counter, summed) in TRACKED_MODELS.items():
+        aggregates = {'rows': Count('pk')}
+        if summed:
+            aggregates['total'] = Sum(summed[0])
+        result = model.objects.aggregate(**aggregates)
+        totals[counter] = result['rows']
+        if summed:
+            totals[summed[1]] = result['total'] or 0
+    return totals
+
+
+def check():
+    """Compare the snapshot with the base tables without changing it."""
+    snapshot = StatisticsSnapshot.objects.filter(snapshot_id=SNAPSHOT_ID).first()
+    return _drift(snapshot, compute())
+
+
+def rebuild():
+    """Rewrite the snapshot from the base tables and return the drift that was corrected."""
+    fresh = compute()
+    with transaction.atomic():
+        snapshot, _ = StatisticsSnapshot.objects.select_for_update().get_or_create(snapshot_id=SNAPSHOT_ID)
+        drift = _drift(snapshot, fresh)
+        for field in COUNTER_FIELDS:
+            setattr(snapshot, field, fresh[field])
+        snapshot.save()
+    return drift
+
+
+def _drift(snapshot, fresh):
+    drift = {}
+    for field in COUNTER_FIELDS:
+        stored = getattr(snapshot, field) if snapshot else None
+        if stored is None or _differs(stored, fresh[field], StatisticsSnapshot._meta.get_field(field)):
+            drift[field] = {'stored': stored, 'actual': fresh[field]}
+    return drift
+
+
+def _differs(stored, actual, field):
+    if isinstance(stored, float) or isinstance(actual, float):
+        return abs(float(stored) - float(actual)) > 1e-6 * max(1.0, abs(float(actual)))
+    # SQLite sums decimals as floats; compare at the precision the snapshot stores.
+    places = getattr(field, 'decimal_places', None) or 0
+    return round(Decimal(stored), places) != round(Decimal(actual), places)
+
+
+def current():
+    """
+    The StatisticsView payload, read from the snapshot row.
+
+    A snapshot rebuilt here is read back from the primary: a replica may
+    not have the row yet.
+    """
+    snapshot = StatisticsSnapshot.objects.filter(snapshot_id=SNAPSHOT_ID).first()
+    if snapshot is None:
+        rebuild()
+        snapshot = StatisticsSnapshot.objects.using(DEFAULT_DB_ALIAS).get(snapshot_id=SNAPSHOT_ID)
+    return _payload(snapshot)
+
+
+async def acurrent():
+    """current() for async views."""
+    snapshot = await StatisticsSnapshot.objects.filter(snapshot_id=SNAPSHOT_ID).afirst()
+    if snapshot is None:
+        await sync_to_async(rebuild)()
+        snapshot = await StatisticsSnapshot.objects.using(DEFAULT_DB_ALIAS).aget(snapshot_id=SNAPSHOT_ID)
+    return _payload(snapshot)
+
+
+def _payload(snapshot):
+    return {
+        'total_users': snapshot.total_users,
+        'total_bookings': snapshot.total_bookings,
+        'total_payments': snapshot.payment_amount_sum if snapshot.total_payments else None,
+        'average_room_price': snapshot.room_price_sum / snapshot.total_rooms if snapshot.total_rooms else None,
+        'total_services': snapshot.total_services,
+        'total_booking_services': snapshot.total_booking_services,
+        'total_discounts': snapshot.total_discounts,
+        'total_reviews': snapshot.total_reviews,
+        'average_rating': snapshot.review_rating_sum / snapshot.total_reviews if snapshot.total_reviews else None,
+    }
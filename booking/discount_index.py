@@ -0,0 +1,111 @@
+"""
+ServiceDiscountIndex: the Discount.services links, one row per word of
+the service's normalized name, carrying the name from that word on
+("day spa" is indexed as "day spa" and "spa").
+
+DiscountListView's ``service_name`` filter and the discounts-for-services
+endpoint read this table instead of joining Discount -> link table ->
+Service. booking.signals keeps it in step with link changes and service
+renames. Bulk paths that skip signals call ``rename_services`` or
+``rebuild`` themselves, and ``manage.py rebuild_discount_index`` recreates
+it from scratch.
+"""
+from django.db import transaction
+
+from .models import Discount, Service, ServiceDiscountIndex
+
+
+def normalize(name):
+    """Case- and whitespace-insensitive form of a service name."""
+    return ' '.join((name or '').casefold().split())
+
+
+def _rows(service_id, discount_id, name):
+    """Index rows of one link: the normalized name from each of its words on."""
+    words = normalize(name).split(' ')
+    return [
+        ServiceDiscountIndex(service_id=service_id, discount_id=discount_id, word=word,
+                             service_name=' '.join(words[word:]))
+        for word in range(len(words))
+    ]
+
+
+def link(pairs):
+    """Index ``(service_id, discount_id)`` pairs."""
+    pairs = set(pairs)
+    if not pairs:
+        return
+    names = dict(Service.objects.filter(service_id__in={service_id for service_id, _ in pairs})
+                 .values_list('service_id', 'name'))
+    ServiceDiscountIndex.objects.bulk_create([
+        row for service_id, discount_id in pairs if service_id in names
+        for row in _rows(service_id, discount_id, names[service_id])
+    ], ignore_conflicts=True, batch_size=1000)
+
+
+def unlink(service_ids=None, discount_ids=None):
+    """Drop the index rows of the given services and/or discounts (both given: only their pairs)."""
+    rows = ServiceDiscountIndex.objects.all()
+    if service_ids is not None:
+        rows = rows.filter(service_id__in=set(service_ids))
+    if discount_ids is not None:
+        rows = rows.filter(discount_id__in=set(discount_ids))
+    rows.delete()
+
+
+def rename_services(service_ids):
+    """Bring the indexed names of ``service_ids`` up to date with Service.name."""
+    names = dict(Service.objects.filter(service_id__in=set(service_ids)).values_list('service_id', 'name'))
+    links = ServiceDiscountIndex.objects.filter(service_id__in=list(names), word=0) \
+        .values_list('service_id', 'discount_id', 'service_name')
+    stale = [(service_id, discount_id) for service_id, discount_id, indexed in links
+             if indexed != normalize(names[service_id])]
+    if not stale:
+        return
+    with transaction.atomic():
+        unlink(service_ids={service_id for service_id, _ in stale})
+        link(stale)
+
+
+def rebuild():
+    """Recreate the whole index from the link table; returns the number of rows."""
+    links = Discount.services.through.objects.values_list('service_id', 'discount_id', 'service__name') \
+        .order_by('service_id', 'discount_id')
+    with transaction.atomic():
+        ServiceDiscountIndex.objects.all().delete()
+        ServiceDiscountIndex.objects.bulk_create((
+            row for service_id, discount_id, name in links.iterator(chunk_size=5000)
+            for row in _rows(service_id, discount_id, name)
+        ), batch_size=1000)
+    return ServiceDiscountIndex.objects.count()
+
+
+def discounts_matching(service_name):
+    """
+    Ids of the discounts linked to a service with a word run starting with
+    ``service_name`` once normalized (as a subquery): ``spa`` and
+    ``spa treat`` both find "Spa Treatment", and ``spa`` finds "Day Spa".
+
+    The prefix is matched as a range on the service_name index,
+    ``prefix <= name < prefix + U+10FFFF``, so the lookup is an index seek.
+    A LIKE pattern would not be: SQLite only seeks a LIKE prefix on a
+    NOCASE index, and no B-tree helps a ``%term%`` substring match.
+    """
+    prefix = normalize(service_name)
+    return ServiceDiscountIndex.objects.filter(service_name__gte=prefix, service_name__lt=prefix + '\U0010ffff') \
+        .values('discount_id')
+
+
+def active_discounts(service_ids):
+    """
+    ``{service_id: [discount, ...]}`` for the discounts that currently take
+    money off (percentage > 0) each service, best first, in one query over
+    the (service, discount) index.
+    """
+    found = {service_id: [] for service_id in service_ids}
+    rows = ServiceDiscountIndex.objects.filter(service_id__in=service_ids, word=0, discount__percentage__gt=0) \
+        .order_by('service_id', '-discount__percentage', 'discount_id') \
+        .values_list('service_id', 'discount_id', 'discount__name', 'discount__percentage')
+    for service_id, discount_id, name, percentage in rows:
+        found[service_id].append({'discount_id': discount_id, 'name': name, 'percentage': percentage})
+    return found
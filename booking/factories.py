@@ -34,10 +34,7 @@ class BookingFactory(factory.django.DjangoModelFactory):
     check_in_date = factory.Faker('date_time')
     check_out_date = factory.Faker('date_time')
     user = factory.SubFactory(UserFactory)
-
-    @factory.lazy_attribute
-    def room(self):
-        return Room.objects.order_by('?').first()
+    room = factory.Iterator(Room.objects.all())
 class PaymentFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Payment
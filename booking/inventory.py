@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+
+from .models import Room, Booking, RoomNight
+from .rollups import stay_nights
+
+
+class RoomUnavailable(Exception):
+    """A requested night is already held by another booking of the same room."""
+
+
+def _nights(bookings):
+    return [
+        RoomNight(room_id=room_id, night=night, booking_id=booking_id)
+        for booking_id, room_id, check_in, check_out in bookings
+        for night in stay_nights(check_in, check_out)
+    ]
+
+
+def reserve(bookings):
+    """
+    Claim the nights of ``bookings`` ((booking_id, room_id, check_in, check_out)
+    tuples) in the ledger, all or nothing.
+
+    Only the (room, night) rows of these stays are written; the unique
+    constraint rejects a night another booking already holds, and the
+    whole claim is rolled back with RoomUnavailable.
+    """
+    nights = _nights(bookings)
+    if not nights:
+        return 0
+    try:
+        with transaction.atomic():
+            RoomNight.objects.bulk_create(nights, batch_size=1000)
+    except IntegrityError as e:
+        raise RoomUnavailable(str(e)) from e
+    return len(nights)
+
+
+def release(booking_ids):
+    """Give back every night held by ``booking_ids``; returns how many were freed."""
+    deleted, _ = RoomNight.objects.filter(booking_id__in=booking_ids).delete()
+    return deleted
+
+
+def reserve_booking(booking):
+    """(Re)claim the ledger rows of one saved booking, replacing whatever it held before."""
+    with transaction.atomic():
+        release([booking.booking_id])
+        return reserve([(booking.booking_id, booking.room_id, booking.check_in_date, booking.check_out_date)])
+
+
+def availability(start, end, room_type=None):
+    """
+    Free rooms per night in [start, end): {night: free_rooms}. Reads the
+    (night, room) index of the ledger plus a count of rooms of the type.
+    """
+    rooms = Room.objects.all()
+    held = RoomNight.objects.filter(night__gte=start, night__lt=end)
+    if room_type:
+        rooms = rooms.filter(room_type=room_type)
+        held = held.filter(room__room_type=room_type)
+    total = rooms.count()
+    booked = dict(held.values_list('night').annotate(rooms=Count('room')).order_by())
+    days = (end - start).days
+    return {start + timedelta(days=n): total - booked.get(start + timedelta(days=n), 0) for n in range(days)}
+
+
+def rebuild():
+    """
+    Regenerate the ledger from Booking. Returns the ids of bookings whose
+    nights clash with an earlier booking of the same room and were skipped.
+    """
+    conflicts = []
+    with transaction.atomic():
+        RoomNight.objects.all().delete()
+        batch = []
+        last_room, last_night = None, None
+        # Per room in check-in order, a stay clashes when it starts on or
+        # before the last night already claimed for that room.
+        stays = Booking.objects.order_by('room_id', 'check_in_date', 'booking_id') \
+            .values_list('booking_id', 'room_id', 'check_in_date', 'check_out_date').iterator(chunk_size=5000)
+        for stay in stays:
+            nights = _nights([stay])
+            if not nights:
+                continue
+            if stay[1] == last_room and nights[0].night <= last_night:
+                conflicts.append(stay[0])
+                continue
+            last_room, last_night = stay[1], nights[-1].night
+            batch.extend(nights)
+            if len(batch) >= 5000:
+                RoomNight.objects.bulk_create(batch)
+                batch = []
+        RoomNight.objects.bulk_create(batch)
+    return conflicts
@@ -0,0 +1,189 @@
+from functools import lru_cache
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation() is the identity for the Python values
+# that values() already returns, so the call can be skipped per row.
+PASSTHROUGH_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.FloatField,
+    serializers.ReadOnlyField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+OWNER = 'lean_owner'
+
+
+def _iso_datetime(field, current_timezone):
+    """
+    DateTimeField.to_representation for ISO 8601 output with the current
+    timezone looked up once per batch rather than once per value.
+    """
+    def convert(value):
+        if timezone.is_naive(value):
+            return field.to_representation(value)
+        value = value.astimezone(current_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def _is_iso_datetime(field):
+    if not isinstance(field, serializers.DateTimeField) or hasattr(field, 'timezone'):
+        return False
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    return isinstance(output_format, str) and output_format.lower() == ISO_8601
+
+
+class LeanSerializer:
+    """
+    Read-only counterpart of a ModelSerializer that works on ``values()`` rows.
+
+    Produces the same JSON shape as ``serializer_class(..., many=True).data``
+    without building model instances or walking DRF's per-field machinery:
+    plain columns are copied as they are, and only fields that really
+    transform their value (decimals, datetimes) call ``to_representation``.
+    Nested many-to-many serializers are resolved with one extra query per
+    batch of rows, like ``prefetch_related``.
+    """
+
+    def __init__(self, serializer_class, only=None):
+        self.model = serializer_class.Meta.model
+        self.pk_name = self.model._meta.pk.name
+        self.fields = []
+        self.nested = []
+        for name, field in serializer_class().fields.items():
+            if only is not None and name not in only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                relation = self.model._meta.get_field(field.source)
+                self.nested.append((name, relation, LeanSerializer(type(field.child))))
+                self.fields.append((name, None, None))
+            elif _is_iso_datetime(field):
+                self.fields.append((name, field.source, field))
+            else:
+                convert = None if isinstance(field, PASSTHROUGH_FIELDS) else field.to_representation
+                self.fields.append((name, field.source, convert))
+        self.columns = list(dict.fromkeys([self.pk_name] + [source for _, source, _ in self.fields if source]))
+
+    def values(self, queryset):
+        """The queryset reduced to the columns this serializer needs."""
+        return queryset.prefetch_related(None).values(*self.columns)
+
+    def serialize(self, rows):
+        rows = list(rows)
+        nested = {name: self._fetch_nested(relation, lean, rows) for name, relation, lean in self.nested}
+        return self._build(rows, nested)
+
+    async def aserialize(self, rows):
+        """serialize() for async views: nested relations are read through the async ORM."""
+        rows = list(rows)
+        nested = {name: await self._afetch_nested(relation, lean, rows) for name, relation, lean in self.nested}
+        return self._build(rows, nested)
+
+    def _build(self, rows, nested):
+        fields = self._bind_fields()
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, source, convert in fields:
+                if source is None:
+                    item[name] = nested[name].get(row[self.pk_name], [])
+                    continue
+                value = row[source]
+                item[name] = value if convert is None or value is None else convert(value)
+            data.append(item)
+        return data
+
+    def _bind_fields(self):
+        current_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+        fields = []
+        for name, source, convert in self.fields:
+            if isinstance(convert, serializers.DateTimeField):
+                convert = convert.to_representation if current_timezone is None \
+                    else _iso_datetime(convert, current_timezone)
+            fields.append((name, source, convert))
+        return fields
+
+    def iter_serialize(self, rows, chunk_size=2000):
+        """Serialize an iterable of rows lazily, one chunk at a time."""
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield from self.serialize(chunk)
+
+    async def aiter_serialize(self, rows, chunk_size=2000):
+        """iter_serialize() over an async iterable of rows (e.g. ``QuerySet.aiterator()``)."""
+        chunk = []
+        async for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                for item in await self.aserialize(chunk):
+                    yield item
+                chunk = []
+        for item in await self.aserialize(chunk):
+            yield item
+
+    def _fetch_nested(self, relation, lean, rows):
+        children = self._nested_rows(relation, lean, rows)
+        if children is None:
+            return {}
+        children_rows = list(children)
+        return self._group(children_rows, lean.serialize(children_rows))
+
+    async def _afetch_nested(self, relation, lean, rows):
+        children = self._nested_rows(relation, lean, rows)
+        if children is None:
+            return {}
+        children_rows = [row async for row in children]
+        return self._group(children_rows, await lean.aserialize(children_rows))
+
+    def _nested_rows(self, relation, lean, rows):
+        owners = [row[self.pk_name] for row in rows]
+        if not owners:
+            return None
+        lookup = relation.related_query_name()
+        return lean.model.objects.filter(**{f'{lookup}__in': owners}).values(*lean.columns, **{OWNER: F(lookup)})
+
+    @staticmethod
+    def _group(children_rows, items):
+        children = {}
+        for child_row, item in zip(children_rows, items):
+            children.setdefault(child_row[OWNER], []).append(item)
+        return children
+
+
+@lru_cache(maxsize=None)
+def lean_serializer(serializer_class, only=None):
+    """
+    Shared LeanSerializer for ``serializer_class``, optionally restricted to
+    the field names in ``only`` (a frozenset). Only the columns behind the
+    kept fields, plus the primary key, are selected from the database.
+    """
+    return LeanSerializer(serializer_class, only)
+
+
+def requested_fields(request, serializer_class):
+    """
+    Parse a ``?fields=a,b,c`` sparse fieldset into the ``only`` argument of
+    lean_serializer(); None when the parameter is absent.
+    """
+    value = request.query_params.get('fields')
+    if not value:
+        return None
+    names = frozenset(name.strip() for name in value.split(',') if name.strip())
+    unknown = names - set(serializer_class().fields)
+    if unknown or not names:
+        raise serializers.ValidationError({'fields': [f"Unknown field(s): {', '.join(sorted(unknown)) or value}"]})
+    return names
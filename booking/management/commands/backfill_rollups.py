@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from booking import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily revenue and occupancy rollups from the full Payment and Booking history.'
+
+    def handle(self, *args, **options):
+        revenue_rows, occupancy_rows = rollups.backfill()
+        self.stdout.write(self.style.SUCCESS(
+            f'{revenue_rows} revenue rows and {occupancy_rows} occupancy rows written.'
+        ))
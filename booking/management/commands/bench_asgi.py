@@ -0,0 +1,116 @@
+import asyncio
+import io
+import random
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.urls import clear_url_caches, include, path
+
+from booking import async_urls, urls
+from booking.benchmarking import benchmark_database, percentile
+from booking.models import User, Room, Booking, Payment, Service, BookingService, Discount, Review
+
+LISTS = ('users', 'rooms', 'bookings', 'payments', 'services', 'booking-services', 'discounts', 'reviews')
+DETAILS = {'users': User, 'rooms': Room, 'bookings': Booking, 'payments': Payment, 'services': Service,
+           'booking-services': BookingService, 'discounts': Discount, 'reviews': Review}
+
+
+def _urlconf(name, booking_urls):
+    module = types.ModuleType(name)
+    module.urlpatterns = [path('api/', include(booking_urls))]
+    return module
+
+
+class Command(BaseCommand):
+    help = ('Compare concurrent throughput of the read endpoints served by the synchronous views (thread pool) '
+            'and by the async views (one event loop) on a seeded throwaway database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=5000, help='Dataset size (see seed_data).')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per mode.')
+        parser.add_argument('--concurrency', type=int, default=32, help='Requests in flight at once.')
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='Let repeated URLs hit the response cache instead of busting it per request.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            call_command('seed_data', bookings=options['bookings'], seed=options['seed'], stdout=io.StringIO())
+            paths = self._paths(options)
+            self.stdout.write(f"{len(paths)} requests, concurrency {options['concurrency']}, "
+                              f"{options['bookings']} bookings")
+            self.stdout.write(f"{'mode':<8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+
+            with override_settings(ROOT_URLCONF=_urlconf('bench_sync_urls', urls)):
+                clear_url_caches()
+                self._print('sync', *self._run_sync(paths, options['concurrency']))
+            with override_settings(ROOT_URLCONF=_urlconf('bench_async_urls', async_urls)):
+                clear_url_caches()
+                self._print('async', *asyncio.run(self._run_async(paths, options['concurrency'])))
+            clear_url_caches()
+
+    @staticmethod
+    def _paths(options):
+        rng = random.Random(options['seed'])
+        pks = {prefix: list(model.objects.values_list(model._meta.pk.attname, flat=True))
+               for prefix, model in DETAILS.items()}
+        paths = []
+        for i in range(options['requests']):
+            kind = rng.random()
+            if kind < 0.5:
+                url = f"/api/{rng.choice(LISTS)}/?page_size={options['page_size']}"
+            elif kind < 0.9:
+                prefix = rng.choice([prefix for prefix in DETAILS if pks[prefix]])
+                url = f'/api/{prefix}/{rng.choice(pks[prefix])}/?'
+            else:
+                url = '/api/statistic/?'
+            if not options['warm_cache']:
+                url += f'&nocache={i}'
+            paths.append(url)
+        return paths
+
+    @staticmethod
+    def _run_sync(paths, concurrency):
+        def call(url):
+            began = time.perf_counter()
+            status = Client().get(url).status_code
+            return time.perf_counter() - began, status
+
+        def worker(chunk):
+            try:
+                return [call(url) for url in chunk]
+            finally:
+                connection.close()
+
+        chunks = [paths[n::concurrency] for n in range(concurrency)]
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = [result for chunk in pool.map(worker, chunks) for result in chunk]
+        return results, time.perf_counter() - began
+
+    @staticmethod
+    async def _run_async(paths, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(url):
+            async with semaphore:
+                began = time.perf_counter()
+                status = (await client.get(url)).status_code
+                return time.perf_counter() - began, status
+
+        began = time.perf_counter()
+        results = await asyncio.gather(*(call(url) for url in paths))
+        return results, time.perf_counter() - began
+
+    def _print(self, mode, results, elapsed):
+        latencies = [seconds * 1000 for seconds, status in results]
+        errors = sum(1 for seconds, status in results if status >= 400)
+        self.stdout.write(f"{mode:<8}{len(results) / elapsed:>9.1f}{percentile(latencies, 0.5):>9.2f}"
+                          f"{percentile(latencies, 0.95):>9.2f}{percentile(latencies, 0.99):>9.2f}{errors:>8}")
@@ -0,0 +1,83 @@
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.test import Client
+from django.utils import timezone
+
+from booking.benchmarking import benchmark_database
+from booking.models import User, Room, Booking
+
+
+class Command(BaseCommand):
+    help = 'Measure booking creation throughput with many parallel clients on a throwaway database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=50, help='Booking attempts per client.')
+        parser.add_argument('--rooms', type=int, default=200)
+        parser.add_argument('--days', type=int, default=60, help='Width of the window stays are drawn from.')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = User.objects.create(surname='Bench', name='Client', email='bench@example.com', password='x')
+            Room.objects.bulk_create(
+                Room(room_number=f'B{n}', room_type='standard', price=100, availability=True)
+                for n in range(options['rooms'])
+            )
+            room_ids = list(Room.objects.values_list('room_id', flat=True))
+            start = timezone.now().replace(hour=14, minute=0, second=0, microsecond=0)
+
+            statuses = {}
+            lock = threading.Lock()
+
+            def client_worker(worker_id):
+                rng = random.Random(options['seed'] * 1000 + worker_id)
+                client = Client()
+                seen = {}
+                for _ in range(options['requests']):
+                    check_in = start + timedelta(days=rng.randrange(options['days']))
+                    response = client.post('/api/bookings/create/', {
+                        'user_id': user.user_id,
+                        'room_id': rng.choice(room_ids),
+                        'check_in_date': check_in.isoformat(),
+                        'check_out_date': (check_in + timedelta(days=rng.randint(1, 5))).isoformat(),
+                        'amount': '100.00',
+                        'payment_method': 'card',
+                    }, content_type='application/json')
+                    seen[response.status_code] = seen.get(response.status_code, 0) + 1
+                connection.close()
+                with lock:
+                    for code, count in seen.items():
+                        statuses[code] = statuses.get(code, 0) + count
+
+            threads = [threading.Thread(target=client_worker, args=(n,)) for n in range(options['clients'])]
+            began = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - began
+
+            created = statuses.get(201, 0)
+            attempts = options['clients'] * options['requests']
+            self.stdout.write(f"clients={options['clients']} attempts={attempts} elapsed={elapsed:.2f}s")
+            self.stdout.write(f"created={created} ({created / elapsed:.1f} bookings/s, "
+                              f"{attempts / elapsed:.1f} requests/s)")
+            self.stdout.write(f"statuses={dict(sorted(statuses.items()))}")
+
+            clashes = Booking.objects.filter(
+                room_id=OuterRef('room_id'),
+                check_in_date__lt=OuterRef('check_out_date'),
+                check_out_date__gt=OuterRef('check_in_date'),
+            ).exclude(booking_id=OuterRef('booking_id'))
+            double_booked = Booking.objects.filter(Exists(clashes)).count()
+            if double_booked:
+                self.stderr.write(self.style.ERROR(f'{double_booked} overlapping bookings found'))
+            else:
+                self.stdout.write(self.style.SUCCESS('no overlapping bookings'))
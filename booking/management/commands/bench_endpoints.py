@@ -0,0 +1,274 @@
+import io
+import json
+import platform
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import django
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from booking import querylog, urls
+from booking.benchmarking import benchmark_database, percentile
+from booking.models import User, Room, Booking, Payment, Service, BookingService, Discount, Review
+
+FAR_FUTURE = date(2100, 1, 1)
+DATA_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+
+class QueryCounter:
+    """
+    querylog observer counting the data statements the API itself issues, on
+    any database alias (Silk's own bookkeeping excluded).
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, sql, params, many, started, finished):
+        if sql.lstrip().upper().startswith(DATA_STATEMENTS) and '"silk_' not in sql:
+            self.count += 1
+
+
+def _stay(day):
+    check_in = FAR_FUTURE + timedelta(days=day)
+    return check_in.isoformat(), (check_in + timedelta(days=1)).isoformat()
+
+
+def _create_booking(ctx, i):
+    check_in, check_out = _stay(2 * i)
+    return 'post', {}, {'user_id': ctx['user'], 'room_id': ctx['room'], 'check_in_date': check_in,
+                        'check_out_date': check_out, 'amount': '100.00', 'payment_method': 'Card'}
+
+
+def _batch_booking(ctx, i):
+    check_in, check_out = _stay(2 * i + 5000)
+    return 'post', {}, [{'user_id': ctx['user'], 'room_id': room_id, 'check_in_date': check_in,
+                         'check_out_date': check_out, 'amount': '100.00', 'payment_method': 'Cash'}
+                        for room_id in ctx['rooms']]
+
+
+def _room_bulk(ctx, i):
+    # Half the batch updates the rooms written by the previous iteration, half is new.
+    return 'post', {}, [{'room_number': f'bulk-{i * 50 + n}', 'room_type': ctx['room_type'],
+                         'price': f'{100 + i}.00', 'availability': True} for n in range(100)]
+
+
+def _user_bulk(ctx, i):
+    return 'post', {}, [{'surname': 'Bulk', 'name': f'User {i}', 'email': f'bulk{i * 50 + n}@example.com',
+                         'password': 'x'} for n in range(100)]
+
+
+def _service_bulk(ctx, i):
+    return 'post', {}, [{'service_id': service_id, 'name': f'service {service_id}', 'description': f'revision {i}',
+                         'price': '10.00'} for service_id in ctx['services']]
+
+
+# url name -> (ctx, iteration) -> (method, url kwargs, query params or JSON body).
+# Every route in booking/urls.py needs an entry here, or it is reported as skipped.
+SCENARIOS = {
+    'statistics': lambda ctx, i: ('get', {}, {}),
+    'metrics': lambda ctx, i: ('get', {}, {}),
+    'analytics-timeseries': lambda ctx, i: ('get', {}, {'metric': 'occupancy_rate', 'start': ctx['start'],
+                                                         'end': ctx['end'], 'group_by': 'room_type'}),
+    'room_filter': lambda ctx, i: ('get', {}, {'min_price': 100, 'max_price': 200, 'search_term': ctx['room_type']}),
+    'search': lambda ctx, i: ('get', {}, {'q': 'spa', 'type': 'services'}),
+    'room_available': lambda ctx, i: ('get', {}, {'check_in': ctx['start'], 'check_out': ctx['end']}),
+    'user-list': lambda ctx, i: ('get', {}, {}),
+    'user-detail': lambda ctx, i: ('get', {'user_id': ctx['user']}, {}),
+    'user-bulk': _user_bulk,
+    'room-list': lambda ctx, i: ('get', {}, {'room_type': ctx['room_type']}),
+    'room-detail': lambda ctx, i: ('get', {'room_id': ctx['room']}, {}),
+    'room-bulk': _room_bulk,
+    'room_create': lambda ctx, i: ('post', {}, {'room_number': f'bench-{i}', 'room_type': ctx['room_type'],
+                                                'price': '120.00', 'availability': True}),
+    'update_room_availability': lambda ctx, i: ('get', {}, {'start': ctx['start'], 'end': ctx['end']}),
+    'booking-list': lambda ctx, i: ('get', {}, {'room_id': ctx['room']}),
+    'booking-detail': lambda ctx, i: ('get', {'booking_id': ctx['booking']}, {}),
+    'create_booking': _create_booking,
+    'batch_booking': _batch_booking,
+    'booking-quote': lambda ctx, i: ('get', {'booking_id': ctx['booking']}, {}),
+    'booking-quote-batch': lambda ctx, i: ('post', {}, {'booking_ids': ctx['bookings']}),
+    'payment-list': lambda ctx, i: ('get', {}, {}),
+    'payment-detail': lambda ctx, i: ('get', {'payment_id': ctx['payment']}, {}),
+    'service-list': lambda ctx, i: ('get', {}, {}),
+    'service-detail': lambda ctx, i: ('get', {'service_id': ctx['service']}, {}),
+    'service-bulk': _service_bulk,
+    'booking-services-list': lambda ctx, i: ('get', {}, {}),
+    'booking-service-detail': lambda ctx, i: ('get', {'booking_service_id': ctx['booking_service']}, {}),
+    'discount-list': lambda ctx, i: ('get', {}, {}),
+    'discount-detail': lambda ctx, i: ('get', {'discount_id': ctx['discount']}, {}),
+    'discounts-for-services': lambda ctx, i: ('get', {}, {'service_ids': ','.join(map(str, ctx['services']))}),
+    'review-list': lambda ctx, i: ('get', {}, {}),
+    'review-detail': lambda ctx, i: ('get', {'review_id': ctx['review']}, {}),
+}
+
+
+class Command(BaseCommand):
+    help = ('Run every booking API route in-process against seeded datasets and report latency percentiles, '
+            'throughput, query counts and peak memory; optionally fail on regressions against a baseline.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                            help='Dataset sizes, in bookings (see seed_data).')
+        parser.add_argument('--requests', type=int, default=30, help='Timed requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--only', nargs='+', metavar='URL_NAME', help='Benchmark only these routes.')
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='Keep the response cache between requests instead of clearing it.')
+        parser.add_argument('--output', help='Write the JSON report here.')
+        parser.add_argument('--baseline', help='JSON report to compare against.')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed relative p95 increase before a route counts as regressed.')
+        parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                            help='Ignore p95 increases smaller than this, whatever the ratio.')
+
+    def handle(self, *args, **options):
+        routes = [pattern.name for pattern in urls.urlpatterns if isinstance(pattern, URLPattern)]
+        if options['only']:
+            unknown = set(options['only']) - set(routes)
+            if unknown:
+                raise CommandError(f"Unknown routes: {', '.join(sorted(unknown))}")
+            routes = [name for name in routes if name in options['only']]
+        skipped = [name for name in routes if name not in SCENARIOS]
+        for name in skipped:
+            self.stderr.write(self.style.WARNING(f'{name}: no scenario, skipped'))
+
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'requests': options['requests'],
+                'seed': options['seed'],
+                'warm_cache': options['warm_cache'],
+            },
+            'skipped': skipped,
+            'results': {},
+        }
+        for size in options['sizes']:
+            with benchmark_database():
+                call_command('seed_data', bookings=size, seed=options['seed'], stdout=io.StringIO())
+                ctx = self._context()
+                client = Client()
+                results = report['results'][str(size)] = {}
+                self.stdout.write(f'\n{size} bookings')
+                self.stdout.write(f"{'route':<26}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}"
+                                  f"{'queries':>9}{'peak KiB':>10}{'errors':>8}")
+                for name in routes:
+                    if name in SCENARIOS:
+                        results[name] = self._measure(client, name, ctx, options)
+                        self._print(name, results[name])
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2, sort_keys=True)
+            self.stdout.write(f"\nReport written to {options['output']}")
+
+        if options['baseline']:
+            with open(options['baseline']) as baseline:
+                regressions = self._compare(report, json.load(baseline), options)
+            if regressions:
+                for line in regressions:
+                    self.stderr.write(self.style.ERROR(line))
+                raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    @staticmethod
+    def _context():
+        first_booking = Booking.objects.order_by('pk').values('check_in_date').first()
+        start = first_booking['check_in_date'].date() if first_booking else date.today()
+        room = Room.objects.order_by('pk').first()
+        return {
+            'user': User.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'room': room.pk,
+            'room_type': room.room_type,
+            'rooms': list(Room.objects.order_by('pk').values_list('pk', flat=True)[:10]),
+            'booking': Booking.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'bookings': list(Booking.objects.order_by('pk').values_list('pk', flat=True)[:100]),
+            'payment': Payment.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'service': Service.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'services': list(Service.objects.order_by('pk').values_list('pk', flat=True)[:100]),
+            'booking_service': BookingService.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'discount': Discount.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'review': Review.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'start': start.isoformat(),
+            'end': (start + timedelta(days=30)).isoformat(),
+        }
+
+    def _measure(self, client, name, ctx, options):
+        iteration = 0
+
+        def call():
+            nonlocal iteration
+            method, kwargs, payload = SCENARIOS[name](ctx, iteration)
+            iteration += 1
+            path = reverse(name, kwargs=kwargs)
+            if not options['warm_cache']:
+                cache.clear()
+            if method == 'get':
+                return lambda: client.get(path, payload)
+            return lambda: getattr(client, method)(path, payload, content_type='application/json')
+
+        for _ in range(options['warmup']):
+            call()()
+
+        latencies, errors = [], 0
+        for _ in range(options['requests']):
+            request = call()
+            began = time.perf_counter()
+            response = request()
+            latencies.append((time.perf_counter() - began) * 1000)
+            errors += response.status_code >= 400
+
+        # Query count and memory are taken on separate requests: both instruments slow the request down.
+        request = call()
+        with querylog.observe(QueryCounter()) as queries:
+            request()
+        request = call()
+        tracemalloc.start()
+        try:
+            request()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'p50_ms': round(percentile(latencies, 0.50), 3),
+            'p95_ms': round(percentile(latencies, 0.95), 3),
+            'p99_ms': round(percentile(latencies, 0.99), 3),
+            'throughput_rps': round(len(latencies) / (sum(latencies) / 1000), 1) if latencies else 0.0,
+            'queries': queries.count,
+            'peak_kib': round(peak / 1024, 1),
+            'errors': errors,
+        }
+
+    def _print(self, name, result):
+        self.stdout.write(f"{name:<26}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+                          f"{result['throughput_rps']:>9.0f}{result['queries']:>9}{result['peak_kib']:>10.0f}"
+                          f"{result['errors']:>8}")
+
+    @staticmethod
+    def _compare(report, baseline, options):
+        regressions = []
+        for size, results in report['results'].items():
+            for name, result in results.items():
+                before = baseline.get('results', {}).get(size, {}).get(name)
+                if before is None:
+                    continue
+                delta = result['p95_ms'] - before['p95_ms']
+                if delta > options['min_delta_ms'] and result['p95_ms'] > before['p95_ms'] * (1 + options['threshold']):
+                    regressions.append(f"{size}/{name}: p95 {before['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms")
+                if result['queries'] > before['queries']:
+                    regressions.append(f"{size}/{name}: queries {before['queries']} -> {result['queries']}")
+                if result['errors'] > before['errors']:
+                    regressions.append(f"{size}/{name}: errors {before['errors']} -> {result['errors']}")
+        return regressions
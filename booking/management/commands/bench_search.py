@@ -0,0 +1,86 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from booking import search
+from booking.benchmarking import benchmark_database, percentile
+from booking.models import Room, Service, Discount
+
+BASE_WORDS = (
+    'breakfast buffet spa sauna massage transfer airport parking garage laundry minibar dinner lunch '
+    'deluxe standard suite family single double twin sea view garden balcony terrace pool gym late '
+    'checkout early checkin pet friendly wellness romantic package weekend summer winter holiday'
+).split()
+LETTERS = 'abcdefghijklmnoprstuvz'
+
+
+class Command(BaseCommand):
+    help = 'Compare icontains scans with the FTS5 index for catalog search latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help='Rows per catalog table.')
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--vocabulary', type=int, default=5000, help='Distinct words in the synthetic catalog.')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        words = BASE_WORDS + [
+            ''.join(rng.choice(LETTERS) for _ in range(rng.randint(5, 10)))
+            for _ in range(max(0, options['vocabulary'] - len(BASE_WORDS)))
+        ]
+        with benchmark_database():
+            self._seed(rng, words, options['rows'])
+            terms = [rng.choice(words)[:rng.randint(3, 6)] for _ in range(options['queries'])]
+
+            # Every match is fetched: that is what a filtered, paginated list has to find
+            # before it can return a sparse page, and what ranking needs to sort.
+            self.stdout.write(f"{'table':<10}{'mode':<10}{'p50 ms':>10}{'p95 ms':>10}")
+            for model in (Room, Service, Discount):
+                columns = search.SEARCH_FIELDS[model]
+                for mode in ('icontains', 'fts5'):
+                    timings = []
+                    for term in terms:
+                        if mode == 'icontains':
+                            condition = Q()
+                            for column in columns:
+                                condition |= Q(**{f'{column}__icontains': term})
+                        else:
+                            condition = search.search_filter(model, term)
+                        began = time.perf_counter()
+                        list(model.objects.filter(condition).values_list('pk', flat=True))
+                        timings.append((time.perf_counter() - began) * 1000)
+                    self._report(model, mode, timings)
+
+                timings = []
+                for term in terms:
+                    began = time.perf_counter()
+                    search.ranked_ids(model, term, limit=20)
+                    timings.append((time.perf_counter() - began) * 1000)
+                self._report(model, 'ranked', timings)
+
+    def _report(self, model, mode, timings):
+        self.stdout.write(f'{model.__name__:<10}{mode:<10}{percentile(timings, 0.5):>10.2f}'
+                          f'{percentile(timings, 0.95):>10.2f}')
+
+    @staticmethod
+    def _seed(rng, words, rows):
+        def phrase(length):
+            return ' '.join(rng.choice(words) for _ in range(length))
+
+        Room.objects.bulk_create(
+            (Room(room_number=f'{n:06d}', room_type=phrase(2), price=Decimal('100.00'), availability=True)
+             for n in range(rows)),
+            batch_size=5000,
+        )
+        Service.objects.bulk_create(
+            (Service(name=phrase(2), description=phrase(30), price=Decimal('10.00')) for _ in range(rows)),
+            batch_size=5000,
+        )
+        Discount.objects.bulk_create(
+            (Discount(name=phrase(2), description=phrase(30), percentage=10.0) for _ in range(rows)),
+            batch_size=5000,
+        )
@@ -0,0 +1,99 @@
+import json
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from booking.benchmarking import benchmark_database
+from booking.lean import lean_serializer
+from booking.models import User, Room, Booking, Payment, Service, BookingService, Discount, Review
+from booking.serializers import UserSerializer, RoomSerializer, BookingSerializer, PaymentSerializer, \
+    ServiceSerializer, BookingServiceSerializer, DiscountSerializer, ReviewSerializer
+
+SERIALIZERS = [
+    UserSerializer, RoomSerializer, BookingSerializer, PaymentSerializer,
+    ServiceSerializer, BookingServiceSerializer, DiscountSerializer, ReviewSerializer,
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare per-row cost of the DRF ModelSerializers with the values()-based lean serializers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Rows per model.')
+        parser.add_argument('--repeat', type=int, default=3, help='Best of N timings.')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with benchmark_database():
+            self._seed(rows)
+            self.stdout.write(f"{'serializer':<26}{'drf us/row':>12}{'lean us/row':>13}{'speedup':>9}")
+            for serializer_class in SERIALIZERS:
+                queryset = serializer_class.Meta.model.objects.order_by('pk')
+                if serializer_class is DiscountSerializer:
+                    queryset = queryset.prefetch_related('services')
+                lean = lean_serializer(serializer_class)
+
+                drf_time, drf_data = self._best(lambda: serializer_class(queryset.all(), many=True).data,
+                                                options['repeat'])
+                lean_time, lean_data = self._best(lambda: lean.serialize(lean.values(queryset.all())),
+                                                  options['repeat'])
+                if json.dumps(drf_data, default=str) != json.dumps(lean_data, default=str):
+                    self.stderr.write(self.style.ERROR(f'{serializer_class.__name__}: output differs'))
+
+                count = len(drf_data) or 1
+                self.stdout.write(f'{serializer_class.__name__:<26}{drf_time / count * 1e6:>12.1f}'
+                                  f'{lean_time / count * 1e6:>13.1f}{drf_time / lean_time:>8.1f}x')
+
+    @staticmethod
+    def _best(func, repeat):
+        best, result = None, None
+        for _ in range(repeat):
+            began = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - began
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    @staticmethod
+    def _seed(rows):
+        now = timezone.now()
+        users = User.objects.bulk_create(
+            User(surname=f'Surname{n}', name=f'Name{n}', email=f'user{n}@example.com', password='x', phone='555')
+            for n in range(rows)
+        )
+        rooms = Room.objects.bulk_create(
+            Room(room_number=f'R{n}', room_type='standard', price=Decimal('99.50'), availability=True)
+            for n in range(rows)
+        )
+        bookings = Booking.objects.bulk_create(
+            Booking(booking_date=now, check_in_date=now + timedelta(days=n), check_out_date=now + timedelta(days=n + 2),
+                    user=users[n], room=rooms[n])
+            for n in range(rows)
+        )
+        Payment.objects.bulk_create(
+            Payment(amount=Decimal('199.00'), date=now, payment_method='card', booking=booking)
+            for booking in bookings
+        )
+        services = Service.objects.bulk_create(
+            Service(name=f'Service {n}', description='Lorem ipsum ' * 10, price=Decimal('12.30'))
+            for n in range(rows)
+        )
+        BookingService.objects.bulk_create(
+            BookingService(booking=bookings[n], service=services[n], quantity=1, date_time=now)
+            for n in range(rows)
+        )
+        discounts = Discount.objects.bulk_create(
+            Discount(name=f'Discount {n}', description='Lorem ipsum ' * 10, percentage=10.0)
+            for n in range(rows)
+        )
+        Discount.services.through.objects.bulk_create(
+            Discount.services.through(discount=discount, service=services[(n + k) % rows])
+            for n, discount in enumerate(discounts) for k in range(3)
+        )
+        Review.objects.bulk_create(
+            Review(rating=4.5, user=users[n], booking=bookings[n])
+            for n in range(rows)
+        )
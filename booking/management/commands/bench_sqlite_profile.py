@@ -0,0 +1,124 @@
+import io
+import random
+import threading
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.test import Client, override_settings
+
+from booking.benchmarking import benchmark_database, percentile
+from booking.models import User, Room, Booking
+
+FAR_FUTURE = date(2100, 1, 1)
+READ_PATHS = ('/api/rooms/', '/api/bookings/', '/api/payments/', '/api/users/')
+
+# profile name -> (DATABASES['default'] overrides, BOOKING_SQLITE_PRAGMAS, BOOKING_SERIALIZED_WRITES)
+PROFILES = {
+    'default': ({'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': {}}, (), False),
+    'production': (settings.SQLITE_PRODUCTION_PROFILE, settings.SQLITE_PRAGMAS, True),
+}
+
+
+class Command(BaseCommand):
+    help = ('Compare mixed read/write API throughput on a file-backed SQLite database under Django\'s stock '
+            'SQLite settings and under the production profile (WAL, pragmas, persistent connections, '
+            'serialized writes).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=['default', 'production'])
+        parser.add_argument('--bookings', type=int, default=2000, help='Dataset size (see seed_data).')
+        parser.add_argument('--clients', type=int, default=16, help='Concurrent client threads.')
+        parser.add_argument('--requests', type=int, default=100, help='Requests per client.')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Share of requests that create a booking.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError('bench_sqlite_profile needs the default database to be SQLite.')
+
+        self.stdout.write(f"{options['clients']} clients x {options['requests']} requests, "
+                          f"{options['write_ratio']:.0%} writes, {options['bookings']} bookings")
+        self.stdout.write(f"{'profile':<12}{'req/s':>8}{'reads/s':>9}{'writes/s':>10}{'read p95':>10}"
+                          f"{'write p95':>11}{'created':>9}{'locked':>8}{'errors':>8}")
+        database = settings.DATABASES[DEFAULT_DB_ALIAS]
+        original = {key: database.get(key) for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS')}
+        try:
+            for name in options['profiles']:
+                overrides, pragmas, serialized = PROFILES[name]
+                connections.close_all()
+                database.update(overrides)
+                with override_settings(BOOKING_SQLITE_PRAGMAS=pragmas, BOOKING_SERIALIZED_WRITES=serialized), \
+                        benchmark_database():
+                    call_command('seed_data', bookings=options['bookings'], seed=options['seed'],
+                                 stdout=io.StringIO())
+                    self._print(name, *self._run(options))
+        finally:
+            connections.close_all()
+            database.update(original)
+
+    @staticmethod
+    def _run(options):
+        user_ids = list(User.objects.values_list('user_id', flat=True))
+        room_ids = list(Room.objects.values_list('room_id', flat=True))
+        booking_ids = list(Booking.objects.values_list('booking_id', flat=True))
+        outcomes = []
+        lock = threading.Lock()
+
+        def client_worker(worker_id):
+            rng = random.Random(options['seed'] * 1000 + worker_id)
+            client = Client()
+            seen = []
+            try:
+                for i in range(options['requests']):
+                    began = time.perf_counter()
+                    if rng.random() < options['write_ratio']:
+                        check_in = FAR_FUTURE + timedelta(days=rng.randrange(3650))
+                        response = client.post('/api/bookings/create/', {
+                            'user_id': rng.choice(user_ids),
+                            'room_id': rng.choice(room_ids),
+                            'check_in_date': check_in.isoformat(),
+                            'check_out_date': (check_in + timedelta(days=rng.randint(1, 5))).isoformat(),
+                            'amount': '100.00',
+                            'payment_method': 'Card',
+                        }, content_type='application/json')
+                        kind = 'write'
+                    else:
+                        if rng.random() < 0.5:
+                            path = f'{rng.choice(READ_PATHS)}?page_size=50'
+                        else:
+                            path = f'/api/bookings/{rng.choice(booking_ids)}/?'
+                        # A fresh query string per request keeps the response cache out of the measurement.
+                        response = client.get(f'{path}&nocache={worker_id}-{i}')
+                        kind = 'read'
+                    elapsed = time.perf_counter() - began
+                    locked = b'locked' in response.content
+                    seen.append((kind, elapsed, response.status_code, locked))
+                    # What the request_finished handler does after every real request.
+                    close_old_connections()
+            finally:
+                connections.close_all()
+            with lock:
+                outcomes.extend(seen)
+
+        threads = [threading.Thread(target=client_worker, args=(n,)) for n in range(options['clients'])]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes, time.perf_counter() - began
+
+    def _print(self, name, outcomes, elapsed):
+        reads = [seconds * 1000 for kind, seconds, _, _ in outcomes if kind == 'read']
+        writes = [seconds * 1000 for kind, seconds, _, _ in outcomes if kind == 'write']
+        created = sum(1 for kind, _, code, _ in outcomes if kind == 'write' and code == 201)
+        locked = sum(1 for *_, is_locked in outcomes if is_locked)
+        # 409 is a legitimate answer (room taken for those dates), not a failure.
+        errors = sum(1 for _, _, code, _ in outcomes if code >= 400 and code != 409)
+        self.stdout.write(f"{name:<12}{len(outcomes) / elapsed:>8.1f}{len(reads) / elapsed:>9.1f}"
+                          f"{len(writes) / elapsed:>10.1f}{percentile(reads, 0.95):>10.2f}"
+                          f"{percentile(writes, 0.95):>11.2f}{created:>9}{locked:>8}{errors:>8}")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from booking import discount_index
+
+
+class Command(BaseCommand):
+    help = 'Recreate the service-to-discount index used by the discount service_name filter.'
+
+    def handle(self, *args, **options):
+        rows = discount_index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'{rows} service-discount links indexed.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from booking import pricing
+from booking.models import ServiceDiscountRate
+
+
+class Command(BaseCommand):
+    help = 'Recompute the best-discount-per-service table used by the price quote endpoints.'
+
+    def handle(self, *args, **options):
+        pricing.refresh_discount_rates()
+        self.stdout.write(self.style.SUCCESS(
+            f'{ServiceDiscountRate.objects.count()} discounted services indexed.'
+        ))
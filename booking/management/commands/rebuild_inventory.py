@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from booking import inventory
+from booking.models import RoomNight
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the per-room, per-night inventory ledger from the bookings table.'
+
+    def handle(self, *args, **options):
+        conflicts = inventory.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'{RoomNight.objects.count()} room-nights held.'))
+        if conflicts:
+            self.stdout.write(self.style.WARNING(
+                f'{len(conflicts)} overlapping bookings were left out of the ledger: '
+                + ', '.join(str(booking_id) for booking_id in conflicts[:50])
+                + (' ...' if len(conflicts) > 50 else '')
+            ))
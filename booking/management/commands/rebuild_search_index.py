@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from booking import search
+
+
+class Command(BaseCommand):
+    help = 'Drop and rebuild the SQLite FTS5 search indexes for rooms, services and discounts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        search.install(options['database'], rebuild=True)
+        self.stdout.write(self.style.SUCCESS('Search indexes rebuilt.'))
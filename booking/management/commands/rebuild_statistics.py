@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from booking import counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the StatisticsView snapshot from the base tables and report any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report drift; leave the snapshot untouched.')
+
+    def handle(self, *args, **options):
+        drift = counters.check() if options['check'] else counters.rebuild()
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Statistics snapshot matches the base tables.'))
+            return
+        for field, values in drift.items():
+            self.stdout.write(f"{field}: stored={values['stored']} actual={values['actual']}")
+        verb = 'found' if options['check'] else 'corrected'
+        self.stdout.write(self.style.WARNING(f'Drift {verb} in {len(drift)} field(s).'))
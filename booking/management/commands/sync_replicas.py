@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ('Refresh the SQLite read replicas (BOOKING_REPLICA_SQLITE) with an online backup of the primary, '
+            'standing in for replication when running locally.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', metavar='ALIAS',
+                            help='Replica aliases to refresh (default: all of BOOKING_REPLICA_DATABASES).')
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.BOOKING_REPLICA_DATABASES
+        if not aliases:
+            raise CommandError('No replicas configured; set BOOKING_REPLICA_SQLITE.')
+        unknown = set(aliases) - set(settings.BOOKING_REPLICA_DATABASES)
+        if unknown:
+            raise CommandError(f"Not replica aliases: {', '.join(sorted(unknown))}")
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        if any(connections[alias].vendor != 'sqlite' for alias in (DEFAULT_DB_ALIAS, *aliases)):
+            raise CommandError('sync_replicas only copies SQLite databases; use real replication elsewhere.')
+
+        primary.ensure_connection()
+        for alias in aliases:
+            replica = connections[alias]
+            # Readers holding the old file open would keep seeing it mid-copy.
+            replica.close()
+            replica.ensure_connection()
+            primary.connection.backup(replica.connection)
+            replica.close()
+            self.stdout.write(self.style.SUCCESS(f"{alias}: copied to {replica.settings_dict['NAME']}"))
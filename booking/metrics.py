@@ -0,0 +1,229 @@
+"""
+Always-on per-route telemetry in Prometheus text format (/api/metrics/).
+
+MetricsMiddleware updates plain in-process histograms and counters, keyed
+by the url name of each request, under one lock. No database or cache
+writes happen on the request path.
+
+With several worker processes, set BOOKING_METRICS_DIR to a directory
+shared by all workers on the host. Each worker then writes its totals
+there as <pid>.json, at most every BOOKING_METRICS_WRITE_INTERVAL seconds,
+and /api/metrics/ adds up every file it finds. Files of workers that have
+exited are kept, so totals do not go backwards. As with
+prometheus_client's multiprocess mode, empty the directory when the
+server is (re)started.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import querylog
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+ROUTE = ('route',)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+HISTOGRAMS = {
+    'booking_request_duration_seconds': ('Request latency by url name.', LATENCY_BUCKETS),
+    'booking_request_queries': ('SQL statements per request by url name.', QUERY_BUCKETS),
+    'booking_request_sql_duration_seconds': ('Time spent in SQL per request by url name.', LATENCY_BUCKETS),
+}
+COUNTERS = {
+    'booking_responses_total': ('Responses by url name and status code.', ('route', 'status')),
+    'booking_response_cache_hits_total': ('Responses served from the response cache.', ('route',)),
+    'booking_response_cache_misses_total': ('Responses computed and stored in the response cache.', ('route',)),
+}
+
+_lock = threading.Lock()
+# name -> {labels: [bucket counts..., sum, count]} / name -> {labels: value}
+_histograms = {name: {} for name in HISTOGRAMS}
+_counters = {name: {} for name in COUNTERS}
+_last_write = 0.0
+
+
+def observe(name, route, value):
+    buckets = HISTOGRAMS[name][1]
+    with _lock:
+        series = _histograms[name].get((route,))
+        if series is None:
+            series = _histograms[name][(route,)] = [0] * (len(buckets) + 2)
+        index = bisect_left(buckets, value)
+        if index < len(buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+
+def increment(name, *labels, amount=1):
+    with _lock:
+        _counters[name][labels] = _counters[name].get(labels, 0) + amount
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return (match.url_name or match.view_name) if match else 'unmatched'
+
+
+def record_cache(request, hit):
+    increment('booking_response_cache_hits_total' if hit else 'booking_response_cache_misses_total',
+              route_name(request))
+
+
+def snapshot():
+    """This process's totals, in the JSON-friendly shape written to BOOKING_METRICS_DIR."""
+    with _lock:
+        return {
+            'histograms': {name: [[list(labels), list(values)] for labels, values in series.items()]
+                           for name, series in _histograms.items()},
+            'counters': {name: [[list(labels), value] for labels, value in series.items()]
+                         for name, series in _counters.items()},
+        }
+
+
+def _directory():
+    return getattr(settings, 'BOOKING_METRICS_DIR', None)
+
+
+def write_snapshot(force=False):
+    """Publish this worker's totals to BOOKING_METRICS_DIR, at most once per write interval."""
+    global _last_write
+    directory = _directory()
+    now = time.monotonic()
+    if not directory or (not force and now - _last_write < getattr(settings, 'BOOKING_METRICS_WRITE_INTERVAL', 5)):
+        return
+    _last_write = now
+    data = json.dumps(snapshot())
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(handle, 'w') as output:
+        output.write(data)
+    os.replace(temporary, os.path.join(directory, f'{os.getpid()}.json'))
+
+
+def _collect():
+    """Totals across every worker (or just this process without BOOKING_METRICS_DIR)."""
+    directory = _directory()
+    if not directory:
+        return [snapshot()]
+    write_snapshot(force=True)
+    snapshots = []
+    for filename in os.listdir(directory):
+        if filename.endswith('.json'):
+            try:
+                with open(os.path.join(directory, filename)) as source:
+                    snapshots.append(json.load(source))
+            except (OSError, ValueError):
+                continue
+    return snapshots
+
+
+def _merge(snapshots):
+    histograms = {name: {} for name in HISTOGRAMS}
+    counters = {name: {} for name in COUNTERS}
+    for data in snapshots:
+        for name, series in data['histograms'].items():
+            for labels, values in series:
+                merged = histograms[name].setdefault(tuple(labels), [0] * len(values))
+                for index, value in enumerate(values):
+                    merged[index] += value
+        for name, series in data['counters'].items():
+            for labels, value in series:
+                counters[name][tuple(labels)] = counters[name].get(tuple(labels), 0) + value
+    return histograms, counters
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _le(bound):
+    return 'le="%s"' % bound
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def render():
+    """Prometheus text exposition (format 0.0.4) of the merged totals."""
+    histograms, counters = _merge(_collect())
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for labels, values in sorted(histograms[name].items()):
+            cumulative = 0
+            for bound, count in zip(buckets, values):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(ROUTE, labels, _le(bound))} {cumulative}')
+            lines.append(f'{name}_bucket{_labels(ROUTE, labels, _le("+Inf"))} {values[-1]}')
+            lines.append(f'{name}_sum{_labels(ROUTE, labels)} {_number(values[-2])}')
+            lines.append(f'{name}_count{_labels(ROUTE, labels)} {values[-1]}')
+    for name, (help_text, label_names) in COUNTERS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for labels, value in sorted(counters[name].items()):
+            lines.append(f'{name}{_labels(label_names, labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class _QueryTimer:
+    """querylog observer counting statements and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, sql, params, many, started, finished):
+        self.seconds += finished - started
+        self.count += 1
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        began = time.perf_counter()
+        with querylog.observe(_QueryTimer()) as timer:
+            response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - began, timer)
+        return response
+
+    async def __acall__(self, request):
+        began = time.perf_counter()
+        with querylog.observe(_QueryTimer()) as timer:
+            response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - began, timer)
+        return response
+
+    @staticmethod
+    def _record(request, response, elapsed, timer):
+        route = route_name(request)
+        observe('booking_request_duration_seconds', route, elapsed)
+        observe('booking_request_queries', route, timer.count)
+        observe('booking_request_sql_duration_seconds', route, timer.seconds)
+        increment('booking_responses_total', route, str(response.status_code))
+        write_snapshot()
@@ -0,0 +1,91 @@
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .lean import lean_serializer, requested_fields
+from .pagination import KeysetPagination
+from .renderers import NDJSONRenderer, CSVRenderer, StreamingRenderer
+
+
+MAX_IDS = 1000
+
+
+def requested_ids(request, param='ids'):
+    """Ids asked for with ``?ids=1,2,3``, deduplicated in request order (None without the parameter)."""
+    raw = request.query_params.get(param)
+    if raw is None:
+        return None
+    try:
+        ids = list(dict.fromkeys(int(value) for value in raw.split(',') if value.strip()))
+    except ValueError:
+        raise ValidationError({param: ['Expected a comma-separated list of integer ids.']})
+    if not ids or len(ids) > MAX_IDS:
+        raise ValidationError({param: [f'Expected between 1 and {MAX_IDS} ids.']})
+    return ids
+
+
+def keyed_by_id(lean, rows, items, ids):
+    """``{"results": {id: item}, "missing": [id, ...]}`` in the order the ids were requested."""
+    found = {row[lean.pk_name]: item for row, item in zip(rows, items)}
+    return {
+        'results': {str(pk): found[pk] for pk in ids if pk in found},
+        'missing': [pk for pk in ids if pk not in found],
+    }
+
+
+class ListResponseMixin:
+    pagination_class = KeysetPagination
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [NDJSONRenderer, CSVRenderer]
+    export_chunk_size = 2000
+
+    def list_response(self, request, queryset, serializer_class):
+        lean = lean_serializer(serializer_class, requested_fields(request, serializer_class))
+        ids = requested_ids(request)
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+
+        renderer = getattr(request, 'accepted_renderer', None)
+        if isinstance(renderer, StreamingRenderer):
+            return self.export_response(lean.values(queryset), lean, renderer)
+        if ids is not None:
+            return self.ids_response(lean, queryset, ids)
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(lean.values(queryset), request, view=self)
+        return paginator.get_paginated_response(lean.serialize(page))
+
+    @staticmethod
+    def ids_response(lean, queryset, ids):
+        """
+        Multi-get (``?ids=1,2,3``): the rows of ``queryset``, already narrowed
+        to the requested ids, fetched in one primary-key lookup and keyed by
+        id. Ids that were not found (or were filtered out) are listed under
+        ``missing``.
+        """
+        rows = list(lean.values(queryset))
+        return Response(keyed_by_id(lean, rows, lean.serialize(rows), ids))
+
+    def export_response(self, rows, lean, renderer):
+        """
+        Stream the whole filtered queryset (?format=ndjson / ?format=csv).
+
+        Rows are read with a server-side cursor in chunks of
+        ``export_chunk_size`` and encoded as they arrive, so memory stays flat
+        regardless of table size.
+        """
+        rows = rows.order_by(lean.pk_name).iterator(chunk_size=self.export_chunk_size)
+        return StreamingHttpResponse(
+            renderer.iter_render(lean.iter_serialize(rows, self.export_chunk_size)),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+
+
+class DetailResponseMixin:
+    def detail_response(self, request, queryset, serializer_class, not_found):
+        lean = lean_serializer(serializer_class, requested_fields(request, serializer_class))
+        row = lean.values(queryset).first()
+        if row is None:
+            return Response({"error": not_found}, status=status.HTTP_404_NOT_FOUND)
+        return Response(lean.serialize([row])[0])
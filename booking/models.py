@@ -7,6 +7,7 @@ class User(models.Model):
     email = models.EmailField(max_length=254, unique=True, db_index=True)
     password = models.CharField(max_length=128)
     phone = models.CharField(max_length=20, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.surname}, {self.name}, {self.phone}"
@@ -17,6 +18,7 @@ class Room(models.Model):
     room_type = models.CharField(max_length=50, db_index=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     availability = models.BooleanField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Room {self.room_number}, price: {self.price}"
@@ -28,7 +30,13 @@ class Booking(models.Model):
     check_out_date = models.DateTimeField(db_index=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=True)
     room = models.ForeignKey(Room, on_delete=models.CASCADE, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Overlap lookups per room: room_id = ? AND check_out_date > ? AND check_in_date < ?
+            models.Index(fields=['room', 'check_out_date', 'check_in_date'], name='booking_room_stay_idx'),
+        ]
 
     def __str__(self):
         return f"Booking ID: {self.booking_id}, User: {self.user}, Room: {self.room}"
@@ -39,6 +47,7 @@ class Payment(models.Model):
     date = models.DateTimeField()
     payment_method = models.CharField(max_length=255)
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Payment ID: {self.payment_id}, payment method: {self.payment_method}, date: {self.date}"
@@ -48,6 +57,7 @@ class Service(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Service ID: {self.service_id}, name: {self.name}, price: {self.price}"
@@ -58,6 +68,7 @@ class BookingService(models.Model):
     service = models.ForeignKey(Service, on_delete=models.CASCADE)
     quantity = models.IntegerField()
     date_time = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Booking Service ID: {self.booking_service_id}"
@@ -68,6 +79,7 @@ class Discount(models.Model):
     description = models.TextField(db_index=True)
     percentage = models.FloatField()
     services = models.ManyToManyField(Service)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -77,8 +89,111 @@ class Review(models.Model):
     rating = models.FloatField()
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Review ID: {self.review_id}, rating: {self.rating}, user: {self.user}"
 
 
+class StatisticsSnapshot(models.Model):
+    """Running totals behind StatisticsView, kept current by booking.signals (single row)."""
+    snapshot_id = models.PositiveSmallIntegerField(primary_key=True, default=1)
+    total_users = models.BigIntegerField(default=0)
+    total_rooms = models.BigIntegerField(default=0)
+    room_price_sum = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    total_bookings = models.BigIntegerField(default=0)
+    total_payments = models.BigIntegerField(default=0)
+    payment_amount_sum = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    total_services = models.BigIntegerField(default=0)
+    total_booking_services = models.BigIntegerField(default=0)
+    total_discounts = models.BigIntegerField(default=0)
+    total_reviews = models.BigIntegerField(default=0)
+    review_rating_sum = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Statistics snapshot, updated: {self.updated_at}"
+
+
+class ServiceDiscountRate(models.Model):
+    """Best discount per service, precomputed for the price quote engine (booking.pricing)."""
+    service = models.OneToOneField(Service, on_delete=models.CASCADE, primary_key=True)
+    discount = models.ForeignKey(Discount, on_delete=models.CASCADE)
+    percentage = models.FloatField()
+
+    def __str__(self):
+        return f"Service ID: {self.service_id}, best discount: {self.discount_id} ({self.percentage}%)"
+
+
+class ServiceDiscountIndex(models.Model):
+    """
+    Discount.services links with the normalized service name, one row per
+    word of the name: ``service_name`` is the name from word ``word`` on.
+    Maintained by booking.discount_index.
+    """
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='discount_index')
+    discount = models.ForeignKey(Discount, on_delete=models.CASCADE, related_name='service_index')
+    word = models.PositiveSmallIntegerField(default=0)
+    service_name = models.CharField(max_length=255, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['service', 'discount', 'word'], name='service_discount_index_key'),
+        ]
+
+    def __str__(self):
+        return f"Service ID: {self.service_id} ({self.service_name}), discount: {self.discount_id}"
+
+
+class DailyRevenue(models.Model):
+    """Payment totals per day x room type x payment method, maintained by booking.rollups."""
+    day = models.DateField()
+    room_type = models.CharField(max_length=50)
+    payment_method = models.CharField(max_length=255)
+    revenue = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    payments = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'room_type', 'payment_method'], name='daily_revenue_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.day}, {self.room_type}, {self.payment_method}: {self.revenue}"
+
+
+class DailyOccupancy(models.Model):
+    """Booked room-nights per day x room type, maintained by booking.rollups."""
+    day = models.DateField()
+    room_type = models.CharField(max_length=50)
+    occupied_rooms = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'room_type'], name='daily_occupancy_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.day}, {self.room_type}: {self.occupied_rooms} occupied"
+
+
+class RoomNight(models.Model):
+    """
+    Inventory ledger: one row per room per booked night. The unique
+    (room, night) pair makes claiming a night an atomic check-and-decrement
+    of that room's availability for the date (booking.inventory).
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE)
+    night = models.DateField()
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'night'], name='room_night_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['night', 'room'], name='room_night_by_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Room ID: {self.room_id}, night: {self.night}, booking ID: {self.booking_id}"
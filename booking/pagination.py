@@ -0,0 +1,20 @@
+from asgiref.sync import sync_to_async
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Opaque-cursor pagination that seeks on the primary key.
+
+    Each page is fetched with ``WHERE pk > <cursor> ORDER BY pk LIMIT n``,
+    so the cost of a page does not grow with how deep the client pages.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_ordering(self, request, queryset, view):
+        return (queryset.model._meta.pk.attname,)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views; the page query runs in a worker thread."""
+        return await sync_to_async(self.paginate_queryset)(queryset, request, view=view)
@@ -0,0 +1,94 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+
+from .models import Booking, BookingService, Discount, ServiceDiscountRate
+from .rollups import stay_nights
+
+CENT = Decimal('0.01')
+HUNDRED = Decimal(100)
+
+
+def refresh_discount_rates(service_ids=None):
+    """
+    Recompute the best discount of the given services (all when None).
+
+    Runs one query over the Discount.services join table and rewrites the
+    affected ServiceDiscountRate rows; services no discount applies to lose
+    their row.
+    """
+    links = Discount.services.through.objects.values_list('service_id', 'discount_id', 'discount__percentage')
+    if service_ids is not None:
+        service_ids = set(service_ids)
+        if not service_ids:
+            return
+        links = links.filter(service_id__in=service_ids)
+
+    best = {}
+    for service_id, discount_id, percentage in links:
+        percentage = min(max(percentage or 0.0, 0.0), 100.0)
+        if percentage > 0 and (service_id not in best or percentage > best[service_id][1]):
+            best[service_id] = (discount_id, percentage)
+
+    with transaction.atomic():
+        stale = ServiceDiscountRate.objects.all()
+        if service_ids is not None:
+            stale = stale.filter(service_id__in=service_ids)
+        stale.delete()
+        ServiceDiscountRate.objects.bulk_create([
+            ServiceDiscountRate(service_id=service_id, discount_id=discount_id, percentage=percentage)
+            for service_id, (discount_id, percentage) in best.items()
+        ], batch_size=1000)
+
+
+def _money(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def quote_bookings(booking_ids):
+    """
+    Price many bookings in one pass: room nights x room price, plus every
+    booked service at its price less its best discount. Nights are counted
+    in local days, as the inventory ledger books them.
+
+    Two queries regardless of how many bookings are quoted. Returns a dict
+    of booking_id -> quote; unknown ids are simply absent.
+    """
+    quotes = {}
+    stays = Booking.objects.filter(booking_id__in=booking_ids) \
+        .values_list('booking_id', 'check_in_date', 'check_out_date', 'room_id', 'room__price')
+    for booking_id, check_in, check_out, room_id, room_price in stays:
+        nights = sum(1 for _ in stay_nights(check_in, check_out))
+        quotes[booking_id] = {
+            'booking_id': booking_id,
+            'room_id': room_id,
+            'nights': nights,
+            'room_price': room_price,
+            'room_total': _money(room_price * nights),
+            'services': [],
+            'services_total': Decimal('0.00'),
+            'discount_total': Decimal('0.00'),
+        }
+
+    lines = BookingService.objects.filter(booking_id__in=list(quotes)) \
+        .values_list('booking_id', 'service_id', 'quantity', 'service__price',
+                     'service__servicediscountrate__discount_id', 'service__servicediscountrate__percentage') \
+        .order_by('booking_id', 'booking_service_id')
+    for booking_id, service_id, quantity, unit_price, discount_id, percentage in lines:
+        gross = unit_price * quantity
+        discount = _money(gross * Decimal(str(percentage)) / HUNDRED) if percentage else Decimal('0.00')
+        quote = quotes[booking_id]
+        quote['services'].append({
+            'service_id': service_id,
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'discount_id': discount_id,
+            'discount_percentage': percentage or 0.0,
+            'total': _money(gross - discount),
+        })
+        quote['services_total'] += _money(gross)
+        quote['discount_total'] += discount
+
+    for quote in quotes.values():
+        quote['total'] = quote['room_total'] + quote['services_total'] - quote['discount_total']
+    return quotes
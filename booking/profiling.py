@@ -0,0 +1,228 @@
+"""
+Sampled request profiling that records into Silk's tables.
+
+SilkyMiddleware writes every request, and every query it ran, into the
+database while the request is still being served. This middleware keeps
+the SQL of each request in memory instead, and only records the request
+when one of these holds:
+
+* it was sampled (BOOKING_PROFILE_ROUTE_RATES per url name, falling back
+  to BOOKING_PROFILE_SAMPLE_RATE),
+* it took at least BOOKING_PROFILE_SLOW_MS,
+* it carried the BOOKING_PROFILE_HEADER trigger header.
+
+Recorded requests go onto a bounded queue. A background thread writes them
+to the Silk models in batches, so the API never waits on profile writes and
+the Silk UI keeps working. When the queue is full the newest records are
+dropped.
+"""
+import atexit
+import hmac
+import json
+import logging
+import queue
+import random
+import threading
+import time
+import weakref
+from datetime import timedelta
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, connections, router, transaction
+from django.utils import timezone
+
+from . import querylog
+
+logger = logging.getLogger(__name__)
+
+RECORDED_HEADERS = ('CONTENT_TYPE', 'HTTP_ACCEPT', 'HTTP_USER_AGENT')
+
+_buffers = weakref.WeakSet()
+
+
+def flush():
+    """Synchronously write whatever every profile buffer still holds."""
+    return sum(buffer.flush() for buffer in list(_buffers))
+
+
+class QueryRecorder:
+    """querylog observer keeping (sql, offset_ms, duration_ms) of each statement in memory."""
+
+    def __init__(self, began):
+        self.began = began
+        self.queries = []
+
+    def __call__(self, sql, params, many, started, finished):
+        if params and not many:
+            sql = f'{sql} -- params: {list(params)!r}'
+        self.queries.append((sql, (started - self.began) * 1000, (finished - started) * 1000))
+
+
+class ProfileBuffer:
+    """Bounded queue of finished requests drained into the Silk tables by a daemon thread."""
+
+    def __init__(self, size, interval, batch_size):
+        self.queue = queue.Queue(maxsize=size)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._thread = None
+        self._lock = threading.Lock()
+        _buffers.add(self)
+
+    def put(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='profile-flusher', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            finally:
+                connections.close_all()
+
+    def flush(self):
+        """Write everything queued so far; returns the number of requests written."""
+        written = 0
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return written
+            try:
+                _write(batch)
+                written += len(batch)
+            except DatabaseError:
+                logger.exception('Dropped %d profiled requests', len(batch))
+
+
+def _write(records):
+    from silk.models import Request, Response, SQLQuery
+
+    requests, responses, queries = [], [], []
+    for record in records:
+        silk_request = Request(
+            path=record['path'][:190], query_params=record['query_params'], method=record['method'],
+            view_name=(record['view_name'] or '')[:190], start_time=record['start_time'],
+            end_time=record['end_time'], time_taken=record['time_taken'],
+            encoded_headers=record['headers'], num_sql_queries=len(record['queries']),
+            meta_num_queries=0, meta_time=0, meta_time_spent_queries=0,
+        )
+        requests.append(silk_request)
+        responses.append(Response(request=silk_request, status_code=record['status_code'],
+                                  encoded_headers=record['response_headers']))
+        for sql, offset, duration in record['queries']:
+            started = record['start_time'] + timedelta(milliseconds=offset)
+            queries.append(SQLQuery(request=silk_request, query=sql, traceback='', start_time=started,
+                                    end_time=started + timedelta(milliseconds=duration), time_taken=duration))
+
+    with transaction.atomic(using=router.db_for_write(Request)):
+        Request.objects.bulk_create(requests)
+        Response.objects.bulk_create(responses)
+        # SQLQuery.objects.bulk_create re-saves the parent request once per query;
+        # num_sql_queries is already set above.
+        SQLQuery._base_manager.bulk_create(queries)
+    Request.garbage_collect(force=False)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class SampledProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.sample_rate = _setting('BOOKING_PROFILE_SAMPLE_RATE', 0.0)
+        self.route_rates = _setting('BOOKING_PROFILE_ROUTE_RATES', {})
+        self.slow_ms = _setting('BOOKING_PROFILE_SLOW_MS', None)
+        self.header = 'HTTP_' + _setting('BOOKING_PROFILE_HEADER', 'X-Profile').upper().replace('-', '_')
+        self.token = _setting('BOOKING_PROFILE_TOKEN', None)
+        self.ignored_prefixes = tuple(_setting('BOOKING_PROFILE_IGNORE_PREFIXES', ('/api/silk/', '/admin/')))
+        self.buffer = ProfileBuffer(
+            size=_setting('BOOKING_PROFILE_BUFFER_SIZE', 1000),
+            interval=_setting('BOOKING_PROFILE_FLUSH_INTERVAL', 2.0),
+            batch_size=_setting('BOOKING_PROFILE_FLUSH_BATCH', 200),
+        )
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if request.path_info.startswith(self.ignored_prefixes):
+            return self.get_response(request)
+
+        began = time.perf_counter()
+        start_time = timezone.now()
+        with querylog.observe(QueryRecorder(began)) as recorder:
+            response = self.get_response(request)
+        self._keep(request, response, start_time, (time.perf_counter() - began) * 1000, recorder.queries)
+        return response
+
+    async def __acall__(self, request):
+        if request.path_info.startswith(self.ignored_prefixes):
+            return await self.get_response(request)
+
+        began = time.perf_counter()
+        start_time = timezone.now()
+        with querylog.observe(QueryRecorder(began)) as recorder:
+            response = await self.get_response(request)
+        self._keep(request, response, start_time, (time.perf_counter() - began) * 1000, recorder.queries)
+        return response
+
+    def _keep(self, request, response, start_time, time_taken, queries):
+        reason = self._reason(request, time_taken)
+        if reason:
+            self.buffer.put(self._record(request, response, reason, start_time, time_taken, queries))
+
+    def _reason(self, request, time_taken):
+        triggered = request.META.get(self.header)
+        if triggered and (self.token is None or hmac.compare_digest(triggered.encode(), self.token.encode())):
+            return 'header'
+        if self.slow_ms is not None and time_taken >= self.slow_ms:
+            return 'slow'
+        match = request.resolver_match
+        rate = self.route_rates.get(match.url_name if match else None, self.sample_rate)
+        if rate and random.random() < rate:
+            return 'sampled'
+        return None
+
+    def _record(self, request, response, reason, start_time, time_taken, queries):
+        headers = {name: request.META[name] for name in RECORDED_HEADERS if name in request.META}
+        headers['X-Profile-Reason'] = reason
+        match = request.resolver_match
+        return {
+            'path': request.path,
+            'query_params': json.dumps(request.GET.dict()) if request.GET else '',
+            'method': request.method,
+            'view_name': match.view_name if match else '',
+            'start_time': start_time,
+            'end_time': start_time + timedelta(milliseconds=time_taken),
+            'time_taken': time_taken,
+            'headers': json.dumps(headers),
+            'status_code': response.status_code,
+            'response_headers': json.dumps(dict(response.items())),
+            'queries': queries,
+        }
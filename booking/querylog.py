@@ -0,0 +1,44 @@
+"""
+Per-request SQL observation that works for sync and async views alike.
+
+connection.execute_wrapper() only covers the connection of the calling
+thread, but the async ORM runs its queries on a worker thread. This module
+installs one execute wrapper on every connection as it is created. The
+wrapper reports each statement to the observers registered in a context
+variable, and asgiref's sync_to_async carries that context over to the
+worker thread.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_observers = ContextVar('booking_query_observers', default=())
+
+
+@contextmanager
+def observe(observer):
+    """Call ``observer(sql, params, many, started, finished)`` for every statement run in this context."""
+    token = _observers.set(_observers.get() + (observer,))
+    try:
+        yield observer
+    finally:
+        _observers.reset(token)
+
+
+def _execute(execute, sql, params, many, context):
+    observers = _observers.get()
+    if not observers:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        finished = time.perf_counter()
+        for observer in observers:
+            observer(sql, params, many, started, finished)
+
+
+def install(sender, connection, **kwargs):
+    """connection_created receiver."""
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
@@ -0,0 +1,82 @@
+import csv
+import json
+from abc import ABC, abstractmethod
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class StreamingRenderer(BaseRenderer, ABC):
+    """
+    Base class for the export formats of the list endpoints.
+
+    ``iter_render`` (or ``aiter_render``, for an async iterable) encodes
+    already-serialized rows one line at a time, so a ``StreamingHttpResponse``
+    can start sending before the whole queryset has been read. ``render``
+    covers ordinary responses, such as errors, that still go through DRF's
+    ``Response``. Subclasses implement ``line_writer``.
+    """
+    charset = 'utf-8'
+
+    @abstractmethod
+    def line_writer(self):
+        """A callable turning each row of one export, in order, into its text (line terminators included)."""
+
+    def iter_render(self, rows):
+        write = self.line_writer()
+        for row in rows:
+            yield write(row).encode(self.charset)
+
+    async def aiter_render(self, rows):
+        write = self.line_writer()
+        async for row in rows:
+            yield write(row).encode(self.charset)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict) and 'results' in data:
+            data = data['results']
+        if not isinstance(data, list):
+            data = [data]
+        return b''.join(self.iter_render(data))
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def line_writer(self):
+        encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        return lambda row: encoder.encode(row) + '\n'
+
+
+class _LineBuffer:
+    """File-like object whose write() hands the line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def line_writer(self):
+        writer = csv.writer(_LineBuffer())
+        header = []
+
+        def write(row):
+            line = writer.writerow([self._cell(row.get(key)) for key in header or row])
+            if not header:
+                # The first row's keys are the columns of the whole export.
+                header.extend(row)
+                line = writer.writerow(header) + line
+            return line
+        return write
+
+    @staticmethod
+    def _cell(value):
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, cls=JSONEncoder, separators=(',', ':'))
+        return value
@@ -0,0 +1,184 @@
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Booking, Payment, Room, DailyRevenue, DailyOccupancy
+
+
+def local_day(value):
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date()
+
+
+def stay_nights(check_in, check_out):
+    """Calendar days a stay occupies the room: check-in day up to, not including, check-out day."""
+    day, last = local_day(check_in), local_day(check_out)
+    while day < last:
+        yield day
+        day += timedelta(days=1)
+
+
+def room_types(room_ids):
+    return dict(Room.objects.filter(room_id__in=set(room_ids)).values_list('room_id', 'room_type'))
+
+
+def _increment(model, key, **deltas):
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    increments = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**key).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # a concurrent writer created the row first
+        model.objects.filter(**key).update(**increments)
+
+
+def add_payments(rows, sign=1):
+    """
+    Apply payments to the revenue rollup once the transaction commits.
+    ``rows`` are (day, room_type, payment_method, amount) tuples.
+    """
+    totals = {}
+    for day, room_type, payment_method, amount in rows:
+        key = (day, room_type, payment_method)
+        revenue, payments = totals.get(key, (Decimal(0), 0))
+        totals[key] = (revenue + sign * Decimal(amount), payments + sign)
+    if totals:
+        transaction.on_commit(lambda: _apply_payments(totals))
+
+
+def _apply_payments(totals):
+    for (day, room_type, payment_method), (revenue, payments) in totals.items():
+        _increment(DailyRevenue, {'day': day, 'room_type': room_type, 'payment_method': payment_method},
+                   revenue=revenue, payments=payments)
+
+
+def add_stays(rows, sign=1):
+    """
+    Apply stays to the occupancy rollup once the transaction commits.
+    ``rows`` are (room_type, check_in, check_out) tuples.
+    """
+    nights = Counter()
+    for room_type, check_in, check_out in rows:
+        for day in stay_nights(check_in, check_out):
+            nights[day, room_type] += sign
+    if nights:
+        transaction.on_commit(lambda: _apply_stays(nights))
+
+
+def _apply_stays(nights):
+    for (day, room_type), occupied in nights.items():
+        _increment(DailyOccupancy, {'day': day, 'room_type': room_type}, occupied_rooms=occupied)
+
+
+def retype_room(room_id, old_type, new_type):
+    """
+    Move a room's stays and payments from ``old_type`` to ``new_type`` in
+    both rollups once the transaction commits, so that history is grouped,
+    like occupancy_rate's capacity, by the room's current type.
+    """
+    stays = list(Booking.objects.filter(room_id=room_id).values_list('check_in_date', 'check_out_date'))
+    add_stays([(old_type, check_in, check_out) for check_in, check_out in stays], sign=-1)
+    add_stays([(new_type, check_in, check_out) for check_in, check_out in stays])
+
+    payments = [(local_day(day), payment_method, amount) for day, payment_method, amount in
+                Payment.objects.filter(booking__room_id=room_id).values_list('date', 'payment_method', 'amount')]
+    add_payments([(day, old_type, payment_method, amount) for day, payment_method, amount in payments], sign=-1)
+    add_payments([(day, new_type, payment_method, amount) for day, payment_method, amount in payments])
+
+
+def backfill():
+    """Rebuild both rollups from the full Payment and Booking history."""
+    revenue = Payment.objects.annotate(day=TruncDate('date')) \
+        .values('day', 'booking__room__room_type', 'payment_method') \
+        .annotate(revenue=Sum('amount'), payments=Count('pk')).order_by()
+
+    nights = Counter()
+    stays = Booking.objects.values_list('room__room_type', 'check_in_date', 'check_out_date') \
+        .iterator(chunk_size=5000)
+    for room_type, check_in, check_out in stays:
+        for day in stay_nights(check_in, check_out):
+            nights[day, room_type] += 1
+
+    with transaction.atomic():
+        DailyRevenue.objects.all().delete()
+        DailyOccupancy.objects.all().delete()
+        DailyRevenue.objects.bulk_create((
+            DailyRevenue(day=row['day'], room_type=row['booking__room__room_type'],
+                         payment_method=row['payment_method'], revenue=row['revenue'], payments=row['payments'])
+            for row in revenue
+        ), batch_size=2000)
+        DailyOccupancy.objects.bulk_create((
+            DailyOccupancy(day=day, room_type=room_type, occupied_rooms=occupied)
+            for (day, room_type), occupied in nights.items()
+        ), batch_size=2000)
+    return DailyRevenue.objects.count(), DailyOccupancy.objects.count()
+
+
+METRICS = {
+    # metric -> (rollup model, summed field, allowed group_by / filter dimensions)
+    'revenue': (DailyRevenue, 'revenue', ('room_type', 'payment_method')),
+    'payments': (DailyRevenue, 'payments', ('room_type', 'payment_method')),
+    'occupancy': (DailyOccupancy, 'occupied_rooms', ('room_type',)),
+    'occupancy_rate': (DailyOccupancy, 'occupied_rooms', ('room_type',)),
+}
+
+
+def timeseries(metric, start, end, group_by=None, **filters):
+    """
+    Dense daily series for ``metric`` between ``start`` and ``end`` (inclusive),
+    read from the rollup tables only, one series per ``group_by`` value.
+
+    occupancy_rate divides booked room-nights by the number of rooms of the
+    type (or of all types), which is read from Room. Both sides follow a
+    room's current type: retype_room() moves its history when it changes.
+    """
+    model, field, dimensions = METRICS[metric]
+    rows = model.objects.filter(day__range=(start, end))
+    for dimension, value in filters.items():
+        if value:
+            rows = rows.filter(**{dimension: value})
+    group = [group_by] if group_by else []
+    rows = rows.values('day', *group).annotate(value=Sum(field)).order_by()
+
+    series = {}
+    for row in rows:
+        if not row['value']:
+            # rows emptied by deletions or retyped rooms
+            continue
+        series.setdefault(row[group_by] if group_by else None, {})[row['day']] = row['value']
+
+    capacity = None
+    if metric == 'occupancy_rate':
+        rooms = Room.objects.all()
+        if filters.get('room_type'):
+            rooms = rooms.filter(room_type=filters['room_type'])
+        capacity = dict(rooms.values_list('room_type').annotate(rooms=Count('pk')).order_by())
+
+    days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+    result = []
+    for key in sorted(series, key=lambda k: (k is None, k or '')):
+        points = series[key]
+        if capacity is not None:
+            available = capacity.get(key, 0) if group_by else sum(capacity.values())
+            values = [round(points.get(day, 0) / available, 4) if available else None for day in days]
+        elif metric == 'revenue':
+            # money is rendered as a string, like the serializers' DecimalFields
+            values = [str(Decimal(points.get(day, 0)).quantize(Decimal('0.01'))) for day in days]
+        else:
+            values = [points.get(day, 0) for day in days]
+        result.append({
+            group_by or 'series': key if group_by else 'total',
+            'points': [{'day': day, 'value': value} for day, value in zip(days, values)],
+        })
+    return result
@@ -0,0 +1,103 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+Every write, and every read made outside a request (management commands,
+the profile flusher, shells), goes to the ``default`` database.
+ReplicaPinningMiddleware sends each safe (GET/HEAD/OPTIONS) request to
+one of BOOKING_REPLICA_DATABASES, picked at random per request so all of
+its reads see the same replica, and PrimaryReplicaRouter routes the
+request's reads of booking models there.
+
+A client that sent a write is pinned to the primary for
+BOOKING_REPLICA_PIN_SECONDS. The pin lasts for the rest of that request
+and for the client's requests until the pin cookie expires. That window
+should exceed the replicas' worst replication lag.
+
+Only booking models are routed. Sessions, auth and Silk always use the
+primary.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica = ContextVar('booking_replica', default=None)
+
+
+def replicas():
+    return getattr(settings, 'BOOKING_REPLICA_DATABASES', ())
+
+
+def reading_from_replica():
+    """Whether reads in the current context are served by a replica."""
+    return _replica.get() is not None
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replica = _replica.get()
+        if model._meta.app_label == 'booking' and replica is not None:
+            return replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.cookie = getattr(settings, 'BOOKING_REPLICA_PIN_COOKIE', 'primary_until')
+        self.pin_seconds = getattr(settings, 'BOOKING_REPLICA_PIN_SECONDS', 5)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _replica.set(self._replica_for(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica.reset(token)
+        return self._pin(request, response)
+
+    async def __acall__(self, request):
+        token = _replica.set(self._replica_for(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica.reset(token)
+        return self._pin(request, response)
+
+    def _replica_for(self, request):
+        """The replica serving the request's reads, or None for the primary."""
+        if request.method not in SAFE_METHODS or not replicas():
+            return None
+        try:
+            pinned_until = float(request.COOKIES.get(self.cookie, 0))
+        except ValueError:
+            pinned_until = 0
+        return random.choice(replicas()) if pinned_until <= time.time() else None
+
+    def _pin(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(self.cookie, f'{time.time() + self.pin_seconds:.3f}',
+                                max_age=self.pin_seconds, httponly=True, samesite='Lax')
+        return response
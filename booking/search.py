@@ -0,0 +1,123 @@
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Room, Service, Discount
+
+# Full-text indexed columns per model. On SQLite each gets an external-content
+# FTS5 table (<db_table>_fts) kept in sync by triggers, so every insert,
+# update and delete -- including bulk_create and QuerySet.update() -- is
+# reflected without help from the ORM.
+SEARCH_FIELDS = {
+    Room: ['room_number', 'room_type'],
+    Service: ['name', 'description'],
+    Discount: ['name', 'description'],
+}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def is_indexed(model):
+    connection = connections[router.db_for_read(model)]
+    return model in SEARCH_FIELDS and connection.vendor == 'sqlite'
+
+
+def match_expression(term, column=None):
+    """
+    Turn free text into an FTS5 query where every word must match as a
+    prefix (``deluxe sea`` -> ``"deluxe"* "sea"*``), optionally limited to
+    one column. Returns None when the text holds no searchable words.
+    """
+    tokens = TOKEN_RE.findall(term or '')
+    if not tokens:
+        return None
+    expression = ' '.join(f'"{token}"*' for token in tokens)
+    if column:
+        expression = f'{column} : ({expression})'
+    return expression
+
+
+def search_filter(model, term, column=None):
+    """
+    A Q object restricting ``model`` to rows matching ``term``.
+
+    Uses the FTS5 index where available and falls back to the old
+    ``icontains`` scan on other backends.
+    """
+    columns = [column] if column else SEARCH_FIELDS[model]
+    if not is_indexed(model):
+        condition = Q()
+        for name in columns:
+            condition |= Q(**{f'{name}__icontains': term})
+        return condition
+
+    expression = match_expression(term, column)
+    if expression is None:
+        return Q(pk__in=[])
+    table = fts_table(model)
+    return Q(pk__in=RawSQL(f'SELECT rowid FROM "{table}" WHERE "{table}" MATCH %s', [expression]))
+
+
+def ranked_ids(model, term, limit=None):
+    """Primary keys of rows matching ``term``, best match first, with their bm25 scores."""
+    expression = match_expression(term)
+    if expression is None:
+        return []
+    table = fts_table(model)
+    sql = f'SELECT rowid, bm25("{table}") FROM "{table}" WHERE "{table}" MATCH %s ORDER BY rank'
+    params = [expression]
+    if limit:
+        sql += ' LIMIT %s'
+        params.append(limit)
+    with connections[router.db_for_read(model)].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def install(using='default', rebuild=False):
+    """Create the FTS5 tables and sync triggers; (re)index existing rows when needed."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for model, columns in SEARCH_FIELDS.items():
+            table = fts_table(model)
+            source = model._meta.db_table
+            pk = model._meta.pk.column
+            column_list = ', '.join(columns)
+            new_values = ', '.join(f'new.{column}' for column in columns)
+            old_values = ', '.join(f'old.{column}' for column in columns)
+
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [table])
+            exists = cursor.fetchone() is not None
+            if exists and rebuild:
+                cursor.execute(f'DROP TABLE "{table}"')
+                exists = False
+
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS "{table}" USING fts5({column_list}, '
+                f"content='{source}', content_rowid='{pk}', "
+                f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS "{table}_ai" AFTER INSERT ON "{source}" BEGIN '
+                f'INSERT INTO "{table}"(rowid, {column_list}) VALUES (new.{pk}, {new_values}); END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS "{table}_ad" AFTER DELETE ON "{source}" BEGIN '
+                f"INSERT INTO \"{table}\"(\"{table}\", rowid, {column_list}) VALUES ('delete', old.{pk}, {old_values}); "
+                f'END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS "{table}_au" AFTER UPDATE ON "{source}" BEGIN '
+                f"INSERT INTO \"{table}\"(\"{table}\", rowid, {column_list}) VALUES ('delete', old.{pk}, {old_values}); "
+                f'INSERT INTO "{table}"(rowid, {column_list}) VALUES (new.{pk}, {new_values}); END'
+            )
+            if not exists:
+                cursor.execute(f'INSERT INTO "{table}"("{table}") VALUES (\'rebuild\')')
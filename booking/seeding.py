@@ -0,0 +1,194 @@
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import User, Room, Booking, Payment, Service, BookingService, Discount, Review
+
+ROOM_TYPES = ('Single', 'Double', 'Twin', 'Family', 'Deluxe', 'Suite')
+PAYMENT_METHODS = ('Card', 'Cash', 'Bank transfer', 'PayPal')
+FIRST_NAMES = ('Olena', 'Andrii', 'Iryna', 'Taras', 'Sofia', 'Maksym', 'Daryna', 'Bohdan', 'Kateryna', 'Oleh')
+SURNAMES = ('Shevchenko', 'Kovalenko', 'Bondarenko', 'Tkachenko', 'Kravchenko', 'Melnyk', 'Boyko', 'Moroz')
+SERVICE_WORDS = ('breakfast', 'dinner', 'spa', 'sauna', 'massage', 'transfer', 'parking', 'laundry',
+                 'minibar', 'gym', 'pool', 'late checkout', 'early checkin', 'bicycle', 'excursion')
+DISCOUNT_WORDS = ('weekend', 'summer', 'winter', 'early bird', 'loyalty', 'family', 'long stay', 'student')
+
+CHECK_IN_TIME = time(14)
+CHECK_OUT_TIME = time(11)
+
+
+def default_counts(bookings):
+    """Table sizes in the proportions of a mid-sized hotel chain, for ``bookings`` bookings."""
+    return {
+        'users': max(10, bookings // 5),
+        'rooms': max(10, bookings // 50),
+        'services': max(20, bookings // 1000),
+        'discounts': max(5, bookings // 5000),
+    }
+
+
+def _next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+class Seeder:
+    """
+    Streams synthetic rows into the database with bulk_create.
+
+    Primary keys are assigned here rather than read back from the database,
+    so every foreign key is known up front and nothing is held in memory
+    beyond one batch per table plus two numbers per room. Each room keeps
+    its own calendar cursor and stays are laid end to end on it, which is
+    what keeps the generated stays of a room from overlapping.
+    """
+
+    def __init__(self, seed=0, start=date(2020, 1, 1), batch_size=5000, progress=None):
+        self.rng = random.Random(seed)
+        self.start = start
+        self.batch_size = batch_size
+        self.progress = progress or (lambda model, written: None)
+        self.tz = timezone.get_current_timezone()
+        self.counts = {}
+
+    def _write(self, model, rows):
+        """bulk_create ``rows`` (a generator) one transaction per batch."""
+        written = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                with transaction.atomic():
+                    written += self._flush(model, batch)
+                batch = []
+        with transaction.atomic():
+            written += self._flush(model, batch)
+        self.counts[model.__name__] = self.counts.get(model.__name__, 0) + written
+        return written
+
+    def _flush(self, model, batch):
+        if batch:
+            model.objects.bulk_create(batch)
+            self.progress(model, len(batch))
+        return len(batch)
+
+    def _moment(self, day, at):
+        return datetime.combine(day, at, tzinfo=self.tz)
+
+    def users(self, count):
+        first = _next_pk(User)
+        rng = self.rng
+        self._write(User, (
+            User(user_id=pk, surname=rng.choice(SURNAMES), name=rng.choice(FIRST_NAMES),
+                 email=f'guest{pk}@seed.example.com', password='!', phone=f'+380{rng.randrange(10 ** 9):09d}')
+            for pk in range(first, first + count)
+        ))
+        return range(first, first + count)
+
+    def rooms(self, count):
+        first = _next_pk(Room)
+        rng = self.rng
+        prices = []
+
+        def rows():
+            for pk in range(first, first + count):
+                price = Decimal(rng.randrange(4000, 40000)) / 100
+                prices.append(price)
+                yield Room(room_id=pk, room_number=f'S{pk}', room_type=rng.choice(ROOM_TYPES),
+                           price=price, availability=True)
+
+        self._write(Room, rows())
+        return range(first, first + count), prices
+
+    def services(self, count):
+        first = _next_pk(Service)
+        rng = self.rng
+        self._write(Service, (
+            Service(service_id=pk, name=f'{rng.choice(SERVICE_WORDS)} {pk}',
+                    description=f'{rng.choice(SERVICE_WORDS)} and {rng.choice(SERVICE_WORDS)} for hotel guests',
+                    price=Decimal(rng.randrange(500, 5000)) / 100)
+            for pk in range(first, first + count)
+        ))
+        return range(first, first + count)
+
+    def discounts(self, count, service_ids, services_per_discount=5):
+        first = _next_pk(Discount)
+        rng = self.rng
+        self._write(Discount, (
+            Discount(discount_id=pk, name=f'{rng.choice(DISCOUNT_WORDS)} {pk}',
+                     description=f'{rng.choice(DISCOUNT_WORDS)} offer', percentage=rng.choice((0, 5, 10, 15, 20, 25)))
+            for pk in range(first, first + count)
+        ))
+        links = Discount.services.through
+        self._write(links, (
+            links(discount_id=pk, service_id=service_id)
+            for pk in range(first, first + count)
+            for service_id in rng.sample(service_ids, min(services_per_discount, len(service_ids)))
+        ))
+        return range(first, first + count)
+
+    def bookings(self, count, user_ids, room_ids, room_prices, service_ids,
+                 review_ratio=0.25, services_per_booking=0.5):
+        """
+        ``count`` bookings with one payment each, plus reviews and booked
+        services for a share of them. Dependent rows are written after the
+        bookings of their batch, in the same transaction.
+        """
+        rng = self.rng
+        first = _next_pk(Booking)
+        next_payment, next_review, next_service = _next_pk(Payment), _next_pk(Review), _next_pk(BookingService)
+        # Room i is free from calendar[i] (days after self.start) onwards.
+        calendar = [rng.randrange(30) for _ in room_ids]
+
+        bookings, payments, reviews, extras = [], [], [], []
+        for pk in range(first, first + count):
+            slot = rng.randrange(len(room_ids))
+            arrival = calendar[slot] + rng.choice((0, 0, 1, 2, 3, 7))
+            nights = rng.choice((1, 1, 2, 2, 3, 4, 5, 7, 10, 14))
+            calendar[slot] = arrival + nights
+
+            check_in_day = self.start + timedelta(days=arrival)
+            check_in = self._moment(check_in_day, CHECK_IN_TIME)
+            check_out = self._moment(check_in_day + timedelta(days=nights), CHECK_OUT_TIME)
+            booked = check_in - timedelta(days=rng.randrange(1, 120), minutes=rng.randrange(1440))
+            user_id = user_ids[rng.randrange(len(user_ids))]
+
+            bookings.append(Booking(booking_id=pk, booking_date=booked, check_in_date=check_in,
+                                    check_out_date=check_out, user_id=user_id, room_id=room_ids[slot]))
+            payments.append(Payment(payment_id=next_payment, amount=room_prices[slot] * nights, date=booked,
+                                    payment_method=rng.choice(PAYMENT_METHODS), booking_id=pk))
+            next_payment += 1
+            if rng.random() < review_ratio:
+                reviews.append(Review(review_id=next_review, rating=rng.choice((2, 3, 3.5, 4, 4, 4.5, 5, 5)),
+                                      user_id=user_id, booking_id=pk))
+                next_review += 1
+            if service_ids and rng.random() < services_per_booking:
+                extras.append(BookingService(booking_service_id=next_service, booking_id=pk,
+                                             service_id=service_ids[rng.randrange(len(service_ids))],
+                                             quantity=rng.randint(1, 3),
+                                             date_time=check_in + timedelta(hours=rng.randrange(nights * 24 - 3))))
+                next_service += 1
+
+            if len(bookings) >= self.batch_size:
+                self._flush_stays(bookings, payments, reviews, extras)
+                bookings, payments, reviews, extras = [], [], [], []
+        self._flush_stays(bookings, payments, reviews, extras)
+        return range(first, first + count)
+
+    def _flush_stays(self, bookings, payments, reviews, extras):
+        with transaction.atomic():
+            for model, batch in ((Booking, bookings), (Payment, payments), (Review, reviews), (BookingService, extras)):
+                self._flush(model, batch)
+                self.counts[model.__name__] = self.counts.get(model.__name__, 0) + len(batch)
+
+    def reset_sequences(self):
+        """Move the pk sequences past the explicitly assigned keys (a no-op on SQLite)."""
+        models = [User, Room, Booking, Payment, Service, BookingService, Discount, Discount.services.through, Review]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -1,4 +1,11 @@
+from decimal import Decimal
+
+from django.db import transaction
 from rest_framework import serializers
+
+from . import counters
+from .availability import spans_a_night
+from .cache import bump_generation
 from .models import User, Booking, Room, Review, Payment, Service, BookingService, Discount
 
 class UserSerializer(serializers.ModelSerializer):
@@ -26,6 +33,46 @@ class BookingSerializer(serializers.ModelSerializer):
         model = Booking
         fields = '__all__'
 
+    def validate(self, data):
+        check_in = data.get('check_in_date', getattr(self.instance, 'check_in_date', None))
+        check_out = data.get('check_out_date', getattr(self.instance, 'check_out_date', None))
+        if check_in and check_out and not spans_a_night(check_in, check_out):
+            raise serializers.ValidationError('check_out_date must be on a later day than check_in_date')
+        return data
+
+class BookingRequestSerializer(serializers.Serializer):
+    """One reservation of a batch: a booking together with its payment."""
+    user_id = serializers.IntegerField()
+    room_id = serializers.IntegerField()
+    check_in_date = serializers.DateTimeField()
+    check_out_date = serializers.DateTimeField()
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    payment_method = serializers.CharField(max_length=255)
+
+    def validate(self, data):
+        if not spans_a_night(data['check_in_date'], data['check_out_date']):
+            raise serializers.ValidationError('check_out_date must be on a later day than check_in_date')
+        return data
+
+class QuoteLineSerializer(serializers.Serializer):
+    service_id = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    unit_price = serializers.DecimalField(max_digits=12, decimal_places=2)
+    discount_id = serializers.IntegerField(allow_null=True)
+    discount_percentage = serializers.FloatField()
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+class QuoteSerializer(serializers.Serializer):
+    booking_id = serializers.IntegerField()
+    room_id = serializers.IntegerField()
+    nights = serializers.IntegerField()
+    room_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    room_total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    services = QuoteLineSerializer(many=True)
+    services_total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    discount_total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+
 class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
@@ -69,9 +116,44 @@ class DiscountSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         services_data = validated_data.pop('services', None)
-        discount = Discount.objects.create(**validated_data)
-        if services_data:
-            for service_data in services_data:
-                service = Service.objects.get_or_create(**service_data)[0]
-                discount.services.add(service)
+        with transaction.atomic():
+            discount = Discount.objects.create(**validated_data)
+            if services_data:
+                discount.services.add(*resolve_services(services_data))
         return discount
+
+    def update(self, instance, validated_data):
+        services_data = validated_data.pop('services', None)
+        with transaction.atomic():
+            for field, value in validated_data.items():
+                setattr(instance, field, value)
+            instance.save()
+            if services_data is not None:
+                instance.services.set(resolve_services(services_data))
+        return instance
+
+
+def resolve_services(services_data):
+    """
+    The Service rows matching ``services_data`` exactly, as get_or_create
+    would find them, with the missing ones created -- in one lookup and one
+    bulk insert however many services there are.
+    """
+    def identity(name, description, price):
+        return name, description, Decimal(price)
+
+    wanted = list(dict.fromkeys(identity(data['name'], data['description'], data['price'])
+                                for data in services_data))
+    found = {}
+    for service in Service.objects.filter(name__in={name for name, _, _ in wanted}).order_by('service_id'):
+        found.setdefault(identity(service.name, service.description, service.price), service)
+
+    missing = [Service(name=name, description=description, price=price)
+               for name, description, price in wanted if (name, description, price) not in found]
+    if missing:
+        # bulk_create sends no post_save: account for the new rows like counters' signal handlers would.
+        Service.objects.bulk_create(missing)
+        bump_generation(Service)
+        counters.adjust(total_services=len(missing))
+        found.update((identity(service.name, service.description, service.price), service) for service in missing)
+    return [found[key] for key in wanted]
@@ -0,0 +1,211 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.utils import timezone
+
+from . import counters, discount_index, inventory, pricing, rollups, search
+from .cache import bump_generation
+from .models import Room, Booking, Payment, Service, Discount
+
+
+def _value(sender, instance, field):
+    return sender._meta.get_field(field).to_python(getattr(instance, field))
+
+
+def _summed_value(sender, instance, field):
+    return _value(sender, instance, field) or 0
+
+
+def remember_summed_value(sender, instance, raw=False, **kwargs):
+    counter, summed = counters.TRACKED_MODELS[sender]
+    if raw or not summed or instance._state.adding:
+        return
+    instance._counted_value = sender.objects.filter(pk=instance.pk).values_list(summed[0], flat=True).first()
+
+
+def count_saved_row(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    counter, summed = counters.TRACKED_MODELS[sender]
+    deltas = {}
+    if created:
+        deltas[counter] = 1
+    if summed:
+        field, running_sum = summed
+        old = 0 if created else getattr(instance, '_counted_value', None) or 0
+        deltas[running_sum] = _summed_value(sender, instance, field) - old
+    counters.adjust(**deltas)
+
+
+def count_deleted_row(sender, instance, **kwargs):
+    counter, summed = counters.TRACKED_MODELS[sender]
+    deltas = {counter: -1}
+    if summed:
+        deltas[summed[1]] = -_summed_value(sender, instance, summed[0])
+    counters.adjust(**deltas)
+
+
+def _refresh_rates_on_commit(service_ids):
+    service_ids = set(service_ids)
+    if service_ids:
+        transaction.on_commit(lambda: pricing.refresh_discount_rates(service_ids))
+
+
+def refresh_rates_for_links(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # once cleared, the links no longer tell which services were affected
+        if reverse:
+            instance._cleared_service_ids = {instance.pk}
+        else:
+            instance._cleared_service_ids = set(instance.services.values_list('service_id', flat=True))
+    elif action == 'post_clear':
+        _refresh_rates_on_commit(getattr(instance, '_cleared_service_ids', ()))
+    elif action in ('post_add', 'post_remove'):
+        _refresh_rates_on_commit([instance.pk] if reverse else pk_set or ())
+
+
+def refresh_rates_for_discount(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _refresh_rates_on_commit(instance.services.values_list('service_id', flat=True))
+
+
+def remember_discounted_services(sender, instance, **kwargs):
+    instance._discounted_service_ids = set(instance.services.values_list('service_id', flat=True))
+
+
+def refresh_rates_for_deleted_discount(sender, instance, **kwargs):
+    _refresh_rates_on_commit(getattr(instance, '_discounted_service_ids', ()))
+
+
+def _rollup_row(sender, instance):
+    """(day, room_type, payment_method, amount) for a Payment, (room_type, check_in, check_out) for a Booking."""
+    if sender is Payment:
+        room_type = Room.objects.filter(booking__booking_id=instance.booking_id) \
+            .values_list('room_type', flat=True).first()
+        return (rollups.local_day(_value(Payment, instance, 'date')), room_type, instance.payment_method,
+                _value(Payment, instance, 'amount'))
+    room_type = Room.objects.filter(room_id=instance.room_id).values_list('room_type', flat=True).first()
+    return room_type, _value(Booking, instance, 'check_in_date'), _value(Booking, instance, 'check_out_date')
+
+
+def _roll_up(sender, rows, sign=1):
+    (rollups.add_payments if sender is Payment else rollups.add_stays)(rows, sign=sign)
+
+
+def remember_stored_rollup_row(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    stored = sender.objects.filter(pk=instance.pk).first()
+    instance._rollup_row = _rollup_row(sender, stored) if stored is not None else None
+
+
+def remember_deleted_rollup_row(sender, instance, **kwargs):
+    instance._rollup_row = _rollup_row(sender, instance)
+
+
+def roll_up_saved_row(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_row', None)
+    if previous is not None:
+        _roll_up(sender, [previous], sign=-1)
+    _roll_up(sender, [_rollup_row(sender, instance)])
+
+
+def roll_up_deleted_row(sender, instance, **kwargs):
+    previous = getattr(instance, '_rollup_row', None)
+    if previous is not None:
+        _roll_up(sender, [previous], sign=-1)
+
+
+def remember_room_type(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._stored_room_type = Room.objects.filter(pk=instance.pk).values_list('room_type', flat=True).first()
+
+
+def roll_up_room_type(sender, instance, created, raw=False, **kwargs):
+    stored = getattr(instance, '_stored_room_type', None)
+    if not raw and not created and stored is not None and stored != instance.room_type:
+        rollups.retype_room(instance.pk, stored, instance.room_type)
+
+
+def hold_booked_nights(sender, instance, raw=False, **kwargs):
+    if not raw:
+        inventory.reserve_booking(instance)
+
+
+def install_search_index(sender, using, **kwargs):
+    search.install(using)
+
+
+def index_discount_links(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'post_add':
+        discount_index.link([(instance.pk, discount_id) for discount_id in pk_set] if reverse
+                            else [(service_id, instance.pk) for service_id in pk_set])
+    elif action == 'post_remove':
+        if reverse:
+            discount_index.unlink(service_ids=[instance.pk], discount_ids=pk_set)
+        else:
+            discount_index.unlink(service_ids=pk_set, discount_ids=[instance.pk])
+    elif action == 'post_clear':
+        if reverse:
+            discount_index.unlink(service_ids=[instance.pk])
+        else:
+            discount_index.unlink(discount_ids=[instance.pk])
+
+
+def reindex_service_name(sender, instance, created, raw=False, **kwargs):
+    if not raw and not created:
+        discount_index.rename_services([instance.pk])
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    bump_generation(sender)
+
+
+def invalidate_discount_services(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_generation(Discount)
+
+
+def touch_linked_discounts(sender, instance, action, reverse, pk_set, **kwargs):
+    """Link changes are part of a discount's representation, so they move its updated_at (ETag) too."""
+    if action in ('post_add', 'post_remove'):
+        discount_ids = pk_set if reverse else {instance.pk}
+    elif action == 'post_clear' and not reverse:
+        discount_ids = {instance.pk}
+    elif action == 'pre_clear' and reverse:
+        discount_ids = set(instance.discount_set.values_list('discount_id', flat=True))
+    else:
+        return
+    Discount.objects.filter(discount_id__in=discount_ids).update(updated_at=timezone.now())
+
+
+for model in counters.TRACKED_MODELS:
+    pre_save.connect(remember_summed_value, sender=model, dispatch_uid=f'counters_pre_save_{model.__name__}')
+    post_save.connect(count_saved_row, sender=model, dispatch_uid=f'counters_post_save_{model.__name__}')
+    post_delete.connect(count_deleted_row, sender=model, dispatch_uid=f'counters_post_delete_{model.__name__}')
+    post_save.connect(invalidate_cached_responses, sender=model, dispatch_uid=f'cache_post_save_{model.__name__}')
+    post_delete.connect(invalidate_cached_responses, sender=model, dispatch_uid=f'cache_post_delete_{model.__name__}')
+
+m2m_changed.connect(invalidate_discount_services, sender=Discount.services.through,
+                    dispatch_uid='cache_discount_services')
+m2m_changed.connect(touch_linked_discounts, sender=Discount.services.through, dispatch_uid='discount_updated_at')
+
+m2m_changed.connect(index_discount_links, sender=Discount.services.through, dispatch_uid='discount_index_links')
+post_save.connect(reindex_service_name, sender=Service, dispatch_uid='discount_index_service_name')
+m2m_changed.connect(refresh_rates_for_links, sender=Discount.services.through, dispatch_uid='pricing_discount_services')
+post_save.connect(refresh_rates_for_discount, sender=Discount, dispatch_uid='pricing_discount_saved')
+pre_delete.connect(remember_discounted_services, sender=Discount, dispatch_uid='pricing_discount_pre_delete')
+post_delete.connect(refresh_rates_for_deleted_discount, sender=Discount, dispatch_uid='pricing_discount_deleted')
+
+for model in (Booking, Payment):
+    pre_save.connect(remember_stored_rollup_row, sender=model, dispatch_uid=f'rollups_pre_save_{model.__name__}')
+    post_save.connect(roll_up_saved_row, sender=model, dispatch_uid=f'rollups_post_save_{model.__name__}')
+    pre_delete.connect(remember_deleted_rollup_row, sender=model, dispatch_uid=f'rollups_pre_delete_{model.__name__}')
+    post_delete.connect(roll_up_deleted_row, sender=model, dispatch_uid=f'rollups_post_delete_{model.__name__}')
+
+pre_save.connect(remember_room_type, sender=Room, dispatch_uid='rollups_pre_save_Room')
+post_save.connect(roll_up_room_type, sender=Room, dispatch_uid='rollups_post_save_Room')
+
+post_save.connect(hold_booked_nights, sender=Booking, dispatch_uid='inventory_booking_saved')
@@ -1,3 +1,757 @@
-from django.test import TestCase
+import json
+import time
+from datetime import date, datetime
+from decimal import Decimal
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from . import bulk, counters, discount_index, rollups
+from .async_views import AsyncReadView
+from .cache import bump_generation, generations
+from .factories import BookingFactory, BookingServiceFactory, DiscountFactory, PaymentFactory, ReviewFactory, \
+    RoomFactory, ServiceFactory, UserFactory
+from .lean import lean_serializer
+from .mixins import MAX_IDS
+from .models import Booking, DailyOccupancy, DailyRevenue, Discount, Room, RoomNight, Service, \
+    ServiceDiscountIndex, StatisticsSnapshot
+from .routers import PrimaryReplicaRouter, ReplicaPinningMiddleware
+from .serializers import BookingSerializer, BookingServiceSerializer, DiscountSerializer, PaymentSerializer, \
+    ReviewSerializer, RoomSerializer, ServiceSerializer, UserSerializer
+
+
+def aware(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+def stay(user, room, check_in, check_out, amount='100.00'):
+    """One reservation as the create and batch booking endpoints take it."""
+    return {'user_id': user.user_id, 'room_id': room.room_id, 'check_in_date': check_in,
+            'check_out_date': check_out, 'amount': amount, 'payment_method': 'Card'}
+
+
+def book(client, user, room, check_in, check_out):
+    return client.post(reverse('create_booking'), stay(user, room, check_in, check_out),
+                       content_type='application/json')
+
+
+# Sampled profiling flushes from a background thread, which can outlive the test database.
+@override_settings(BOOKING_PROFILE_SAMPLE_RATE=0, BOOKING_PROFILE_ROUTE_RATES={}, BOOKING_PROFILE_SLOW_MS=None)
+class APITestCase(TestCase):
+    def setUp(self):
+        # The response cache and its generations live in the process-wide LocMemCache.
+        cache.clear()
+
+
+class RoomAvailabilityTests(APITestCase):
+    url = reverse('room_available')
+
+    def setUp(self):
+        super().setUp()
+        self.cheap = RoomFactory(price=Decimal('80.00'))
+        self.dear = RoomFactory(price=Decimal('250.00'))
+        BookingFactory(room=RoomFactory(price=Decimal('60.00')), user=UserFactory(), booking_date=aware(2030, 1, 1),
+                       check_in_date=aware(2030, 5, 1), check_out_date=aware(2030, 5, 4))
+
+    def test_max_price_filters_free_rooms(self):
+        response = self.client.get(self.url, {'check_in': '2030-05-02', 'check_out': '2030-05-03',
+                                              'max_price': '100'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room['room_id'] for room in response.json()['results']], [self.cheap.room_id])
+
+    def test_invalid_max_price_is_rejected(self):
+        for max_price in ('abc', 'NaN', 'Infinity'):
+            response = self.client.get(self.url, {'check_in': '2030-05-02', 'check_out': '2030-05-03',
+                                                  'max_price': max_price})
+            self.assertEqual(response.status_code, 400, max_price)
+
+
+class CreateBookingTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = UserFactory()
+        self.room = RoomFactory()
+
+    def test_overlapping_stay_is_a_conflict(self):
+        self.assertEqual(book(self.client, self.user, self.room, '2030-05-01', '2030-05-04').status_code, 201)
+        response = book(self.client, self.user, self.room, '2030-05-03', '2030-05-06')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Booking.objects.filter(room=self.room).count(), 1)
+
+    def test_back_to_back_stays_do_not_overlap(self):
+        self.assertEqual(book(self.client, self.user, self.room, '2030-05-01', '2030-05-04').status_code, 201)
+        self.assertEqual(book(self.client, self.user, self.room, '2030-05-04', '2030-05-06').status_code, 201)
+
+    def test_non_string_dates_are_rejected(self):
+        for check_in in (20301101, ['2030-11-01'], {'date': '2030-11-01'}, True):
+            response = book(self.client, self.user, self.room, check_in, '2030-11-03')
+            self.assertEqual(response.status_code, 400, check_in)
+        self.assertFalse(Booking.objects.exists())
+
+
+class ResponseCacheTests(APITestCase):
+    url = reverse('room-list')
+
+    def setUp(self):
+        super().setUp()
+        self.room = RoomFactory(room_type='Single')
+
+    def room_types(self):
+        return [room['room_type'] for room in self.client.get(self.url).json()['results']]
+
+    def test_repeated_request_is_served_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.room_types(), ['Single'])
+
+    def test_write_to_a_listed_model_invalidates(self):
+        self.room_types()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.room_type = 'Double'
+            self.room.save()
+        self.assertEqual(self.room_types(), ['Double'])
+
+    def test_generation_moves_when_the_transaction_commits(self):
+        before = generations([Room])
+        with self.captureOnCommitCallbacks() as callbacks:
+            bump_generation(Room)
+        self.assertEqual(generations([Room]), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(generations([Room]), before)
+
+    def test_export_negotiated_from_accept_is_not_served_the_cached_page(self):
+        self.room_types()
+        response = self.client.get(self.url, headers={'Accept': 'application/x-ndjson'})
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['room_type'] for row in rows], ['Single'])
+        self.assertEqual(self.room_types(), ['Single'])
+
+    def test_write_to_another_model_keeps_the_entry(self):
+        self.room_types()
+        with self.captureOnCommitCallbacks(execute=True):
+            UserFactory()
+        with self.assertNumQueries(0):
+            self.room_types()
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        ServiceFactory.create_batch(3, name='Day Spa')
+
+    def search(self, limit):
+        return self.client.get(reverse('search'), {'type': 'services', 'q': 'spa', 'limit': limit})
+
+    def test_limit_caps_the_results(self):
+        self.assertEqual(len(self.search(2).json()), 2)
+        self.assertEqual(len(self.search(500).json()), 3)
+
+    def test_limit_below_one_is_rejected(self):
+        for limit in (0, -1, 'ten'):
+            self.assertEqual(self.search(limit).status_code, 400, limit)
+
+
+class LeanSerializerTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        booking = BookingFactory(room=RoomFactory(), booking_date=aware(2030, 1, 1, 12, 30, 15, 250),
+                                 check_in_date=aware(2030, 5, 1), check_out_date=aware(2030, 5, 4))
+        PaymentFactory(booking=booking, date=aware(2030, 1, 1, 12, 31))
+        service = ServiceFactory()
+        BookingServiceFactory(booking=booking, service=service, date_time=aware(2030, 5, 2, 9))
+        DiscountFactory().services.add(service, ServiceFactory())
+        DiscountFactory()
+        ReviewFactory(booking=booking, user=booking.user)
+
+    def test_lean_output_matches_drf(self):
+        for serializer_class in (UserSerializer, RoomSerializer, BookingSerializer, PaymentSerializer,
+                                 ServiceSerializer, BookingServiceSerializer, DiscountSerializer, ReviewSerializer):
+            with self.subTest(serializer_class.__name__):
+                queryset = serializer_class.Meta.model.objects.order_by('pk')
+                lean = lean_serializer(serializer_class)
+                self.assertEqual(json.loads(JSONRenderer().render(lean.serialize(lean.values(queryset)))),
+                                 json.loads(JSONRenderer().render(serializer_class(queryset, many=True).data)))
+
+    def test_sparse_fieldset_matches_drf_subset(self):
+        queryset = Discount.objects.order_by('pk')
+        lean = lean_serializer(DiscountSerializer, frozenset({'name', 'services'}))
+        full = DiscountSerializer(queryset, many=True).data
+        self.assertEqual(lean.serialize(lean.values(queryset)),
+                         [{'name': item['name'], 'services': item['services']} for item in full])
+
+
+class OccupancyRollupTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room = RoomFactory(room_type='Single')
+            RoomFactory(room_type='Double')
+            booking = BookingFactory(room=self.room, booking_date=aware(2030, 1, 1), check_in_date=aware(2030, 5, 1),
+                                     check_out_date=aware(2030, 5, 3))
+            PaymentFactory(booking=booking, date=aware(2030, 1, 1, 12), payment_method='Card',
+                           amount=Decimal('90.00'))
+
+    def series(self, metric):
+        return {series['room_type']: [point['value'] for point in series['points']]
+                for series in rollups.timeseries(metric, date(2030, 5, 1), date(2030, 5, 2), 'room_type')}
+
+    def test_retyped_room_takes_its_history_along(self):
+        self.assertEqual(self.series('occupancy_rate'), {'Single': [1.0, 1.0]})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.room_type = 'Double'
+            self.room.save()
+        self.assertEqual(self.series('occupancy_rate'), {'Double': [0.5, 0.5]})
+        self.assertEqual(DailyOccupancy.objects.get(day=date(2030, 5, 1), room_type='Single').occupied_rooms, 0)
+        self.assertEqual(DailyRevenue.objects.get(room_type='Double').revenue, Decimal('90.00'))
+        self.assertEqual(DailyRevenue.objects.get(room_type='Single').revenue, 0)
+
+    def test_bulk_retype_matches_backfill(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.ROOMS.upsert([{'room_number': self.room.room_number, 'room_type': 'Suite',
+                                'price': str(self.room.price), 'availability': self.room.availability}])
+        incremental = self.series('occupancy_rate')
+        rollups.backfill()
+        self.assertEqual(incremental, self.series('occupancy_rate'))
+        self.assertEqual(incremental['Suite'], [1.0, 1.0])
+
+
+class InventoryLedgerTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = UserFactory()
+        self.room = RoomFactory()
+
+    def test_release_of_a_live_booking_is_refused(self):
+        booking_id = book(self.client, self.user, self.room, '2030-05-01', '2030-05-04').json()['booking_id']
+        response = self.client.post(reverse('update_room_availability'), {'booking_id': booking_id,
+                                                                           'action': 'release'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(RoomNight.objects.filter(booking_id=booking_id).count(), 3)
+        self.assertEqual(book(self.client, self.user, self.room, '2030-05-02', '2030-05-03').status_code, 409)
+
+    def test_deleting_the_booking_frees_its_nights(self):
+        booking_id = book(self.client, self.user, self.room, '2030-05-01', '2030-05-04').json()['booking_id']
+        self.assertEqual(self.client.delete(reverse('booking-detail', args=[booking_id])).status_code, 204)
+        self.assertFalse(RoomNight.objects.exists())
+        self.assertEqual(book(self.client, self.user, self.room, '2030-05-02', '2030-05-03').status_code, 201)
+
+    def test_availability_range_must_be_real_dates(self):
+        url = reverse('update_room_availability')
+        self.assertEqual(self.client.get(url, {'start': '2030-02-01', 'end': '2030-03-01'}).status_code, 200)
+        for start, end in (('2030-02-30', '2030-03-01'), ('2030-02-01', '2030-13-01'), ('', '2030-03-01')):
+            self.assertEqual(self.client.get(url, {'start': start, 'end': end}).status_code, 400, (start, end))
+
+    def test_day_use_stays_are_rejected(self):
+        response = book(self.client, self.user, self.room, '2030-05-01T10:00:00', '2030-05-01T18:00:00')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse('batch_booking'),
+                                    [stay(self.user, self.room, '2030-05-01T10:00:00', '2030-05-01T18:00:00')],
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Booking.objects.exists())
+
+
+class BatchBookingTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = UserFactory()
+        self.room, self.other_room = RoomFactory.create_batch(2)
+
+    def batch(self, *stays):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('batch_booking'), list(stays), content_type='application/json')
+
+    def outcomes(self, response):
+        return [(result['status'], result.get('errors')) for result in response.json()['results']]
+
+    def rollup_rows(self):
+        return (sorted(DailyOccupancy.objects.filter(occupied_rooms__gt=0)
+                       .values_list('day', 'room_type', 'occupied_rooms')),
+                sorted(DailyRevenue.objects.filter(payments__gt=0)
+                       .values_list('day', 'room_type', 'payment_method', 'revenue')))
+
+    def test_all_created_is_a_201_with_bookkeeping_done_without_signals(self):
+        response = self.batch(stay(self.user, self.room, '2030-05-01', '2030-05-04', amount='120.00'),
+                              stay(self.user, self.other_room, '2030-05-02', '2030-05-03', amount='80.00'))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 2)
+        booking_ids = [result['booking_id'] for result in response.json()['results']]
+        self.assertEqual(sorted(Booking.objects.values_list('booking_id', flat=True)), sorted(booking_ids))
+
+        self.assertEqual(counters.check(), {})
+        self.assertEqual(counters.current()['total_bookings'], 2)
+        self.assertEqual(RoomNight.objects.filter(booking_id=booking_ids[0]).count(), 3)
+        self.assertEqual(RoomNight.objects.filter(booking_id=booking_ids[1]).count(), 1)
+        incremental = self.rollup_rows()
+        rollups.backfill()
+        self.assertEqual(incremental, self.rollup_rows())
+        self.assertEqual(sum(revenue for *_, revenue in incremental[1]), Decimal('200.00'))
+
+    def test_overlap_within_the_batch_is_rejected_with_a_207(self):
+        response = self.batch(stay(self.user, self.room, '2030-05-01', '2030-05-04'),
+                              stay(self.user, self.room, '2030-05-03', '2030-05-05'),
+                              stay(self.user, self.room, '2030-05-04', '2030-05-06'))
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(self.outcomes(response), [
+            ('created', None), ('rejected', {'room_id': ['Room is already booked for these dates']}), ('created', None),
+        ])
+        self.assertEqual(Booking.objects.count(), 2)
+        self.assertEqual(counters.check(), {})
+
+    def test_overlap_with_an_existing_booking_is_rejected(self):
+        self.assertEqual(book(self.client, self.user, self.room, '2030-05-01', '2030-05-04').status_code, 201)
+        response = self.batch(stay(self.user, self.room, '2030-05-02', '2030-05-03'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_unknown_rooms_and_users_are_rejected(self):
+        unknown = UserFactory.build(user_id=10 ** 6)
+        response = self.batch(stay(self.user, RoomFactory.build(room_id=10 ** 6), '2030-05-01', '2030-05-02'),
+                              stay(unknown, self.room, '2030-05-01', '2030-05-02'),
+                              stay(self.user, self.room, '2030-05-01', '2030-05-02'))
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(self.outcomes(response), [
+            ('rejected', {'room_id': ['Room not found']}), ('rejected', {'user_id': ['User not found']}),
+            ('created', None),
+        ])
+
+    def test_nothing_created_is_a_400(self):
+        response = self.batch(stay(self.user, self.room, '2030-05-04', '2030-05-01'),
+                              {'room_id': self.room.room_id})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['created'], 0)
+        self.assertEqual([status for status, _ in self.outcomes(response)], ['rejected', 'rejected'])
+        for body in ([], {}, [stay(self.user, self.room, '2030-05-01', '2030-05-02')] * 1001):
+            self.assertEqual(self.client.post(reverse('batch_booking'), body, content_type='application/json')
+                             .status_code, 400)
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(RoomNight.objects.exists())
+
+
+class QuoteTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service = ServiceFactory(price=Decimal('3.33'))
+            self.best = DiscountFactory(percentage=12.5)
+            self.other = DiscountFactory(percentage=10)
+            self.best.services.add(self.service)
+            self.other.services.add(self.service)
+            self.booking = BookingFactory(room=RoomFactory(price=Decimal('80.00')), check_in_date=aware(2030, 5, 1),
+                                          check_out_date=aware(2030, 5, 3))
+            BookingServiceFactory.create_batch(2, booking=self.booking, service=self.service, quantity=1)
+
+    def quote(self):
+        return self.client.get(reverse('booking-quote', args=[self.booking.booking_id])).json()
+
+    def test_each_line_takes_the_best_discount_rounded_to_the_cent(self):
+        quote = self.quote()
+        self.assertEqual([(line['discount_id'], line['total']) for line in quote['services']],
+                         [(self.best.discount_id, '2.91')] * 2)
+        # 12.5% of 3.33 is 0.41625: rounded per line it is 0.42, twice, not 0.83 for both together.
+        self.assertEqual((quote['room_total'], quote['services_total'], quote['discount_total'], quote['total']),
+                         ('160.00', '6.66', '0.84', '165.82'))
+
+    def test_changed_discount_is_picked_up(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.best.percentage = 5
+            self.best.save()
+        self.assertEqual({line['discount_id'] for line in self.quote()['services']}, {self.other.discount_id})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.services.remove(self.service)
+        self.assertEqual({line['discount_id'] for line in self.quote()['services']}, {self.best.discount_id})
+
+    @override_settings(TIME_ZONE='Europe/Kyiv')
+    def test_nights_are_local_days_like_the_inventory_ledger(self):
+        # 00:30 on May 2 to 23:00 on May 3 in Kyiv: one night, though the UTC dates are two apart.
+        self.booking.check_in_date = aware(2030, 5, 2, 0, 30)
+        self.booking.check_out_date = aware(2030, 5, 3, 23)
+        self.booking.save()
+        quote = self.quote()
+        self.assertEqual((quote['nights'], quote['room_total']), (1, '80.00'))
+
+    def test_batch_lists_unknown_ids_as_missing(self):
+        booking_id = self.booking.booking_id
+        response = self.client.post(reverse('booking-quote-batch'), {'booking_ids': [booking_id, 10 ** 6, booking_id]},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([quote['booking_id'] for quote in response.json()['quotes']], [booking_id])
+        self.assertEqual(response.json()['missing'], [10 ** 6])
+        self.assertEqual(self.client.post(reverse('booking-quote-batch'), {'booking_ids': ['x']},
+                                          content_type='application/json').status_code, 400)
+
+
+# Routes for AsyncExportTests: the API as mounted under ASGI (BOOKING_ASYNC_VIEWS).
+urlpatterns = [path('api/', include('booking.async_urls'))]
+
+
+class AsyncExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        discount = DiscountFactory()
+        discount.services.add(*ServiceFactory.create_batch(3))
+        RoomFactory.create_batch(5)
+
+    async def export(self, path, **headers):
+        with self.settings(ROOT_URLCONF='booking.tests'):
+            response = await self.async_client.get(path, headers=headers)
+        if not response.streaming:
+            return response, response.content
+        self.assertTrue(response.is_async)
+        return response, b''.join([chunk async for chunk in response.streaming_content])
+
+    async def test_exports_stream_from_an_async_iterator_like_the_sync_view(self):
+        for path in ('/api/rooms/?format=ndjson', '/api/rooms/?format=csv', '/api/discounts/?format=ndjson',
+                     '/api/discounts/?format=csv&fields=name,services'):
+            with self.subTest(path):
+                response, body = await self.export(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual((response['Content-Type'], body), await sync_to_async(self.sync_export)(path))
+
+    async def test_export_answers_conditional_requests(self):
+        response, _ = await self.export('/api/rooms/?format=csv')
+        response, body = await self.export('/api/rooms/?format=csv', if_none_match=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    async def test_invalid_cursor_is_a_404_like_the_sync_view(self):
+        response, body = await self.export('/api/rooms/?cursor=garbage')
+        self.assertEqual(response.status_code, 404)
+        sync_response = await sync_to_async(self.client.get)('/api/rooms/?cursor=garbage')
+        self.assertEqual((response.status_code, json.loads(body)), (sync_response.status_code, sync_response.json()))
+
+    def sync_export(self, path):
+        response = self.client.get(path)
+        return response['Content-Type'], b''.join(response.streaming_content)
+
+    def test_read_view_base_class_is_abstract(self):
+        with self.assertRaises(TypeError):
+            AsyncReadView()
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        Room.objects.bulk_create(RoomFactory.build_batch(1005))
+        self.room_ids = list(Room.objects.order_by('room_id').values_list('room_id', flat=True))
+
+    def walk(self, url):
+        """Room ids of every page from following ``next`` from ``url``."""
+        ids = []
+        while url:
+            page = self.client.get(url).json()
+            ids += [room['room_id'] for room in page['results']]
+            url = page['next']
+        return ids
+
+    def test_next_cursors_walk_every_row_once_in_primary_key_order(self):
+        self.assertEqual(self.walk(reverse('room-list') + '?page_size=400'), self.room_ids)
+
+    def test_page_size_defaults_to_the_setting_and_is_clamped_to_max_page_size(self):
+        self.assertEqual(len(self.client.get(reverse('room-list')).json()['results']), 100)
+        self.assertEqual(len(self.client.get(reverse('room-list') + '?page_size=7').json()['results']), 7)
+        self.assertEqual(len(self.client.get(reverse('room-list') + '?page_size=5000').json()['results']), 1000)
+
+    def test_invalid_cursor_is_a_404(self):
+        self.assertEqual(self.client.get(reverse('room-list') + '?cursor=garbage').status_code, 404)
+
+    async def test_async_view_pages_like_the_sync_view(self):
+        with self.settings(ROOT_URLCONF='booking.tests'):
+            page = (await self.async_client.get('/api/rooms/?page_size=5000')).json()
+            self.assertEqual(len(page['results']), 1000)
+            self.assertEqual(await self.awalk('/api/rooms/?page_size=400'), self.room_ids)
+            self.assertEqual((await self.async_client.get('/api/rooms/?cursor=garbage')).status_code, 404)
+
+    async def awalk(self, url):
+        ids = []
+        while url:
+            page = (await self.async_client.get(url)).json()
+            ids += [room['room_id'] for room in page['results']]
+            url = page['next']
+        return ids
+
+
+class MultiGetTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.rooms = RoomFactory.create_batch(3, room_type='Single')
+        self.filtered_out = RoomFactory(room_type='Suite')
+
+    def get(self, ids, **params):
+        return self.client.get(reverse('room-list'), {'ids': ids, **params})
+
+    def test_results_are_keyed_by_id_in_request_order(self):
+        first, _, third = (room.room_id for room in self.rooms)
+        suite = self.filtered_out.room_id
+        response = self.get(f'{third},{10 ** 6},{first},{third},{suite}', room_type='Single')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.json()['results']), [str(third), str(first)])
+        self.assertEqual(response.json()['results'][str(first)]['room_number'], self.rooms[0].room_number)
+        self.assertEqual(response.json()['missing'], [10 ** 6, suite])
+
+    def test_id_count_is_limited(self):
+        self.assertEqual(self.get(','.join(str(i) for i in range(1, MAX_IDS + 1))).status_code, 200)
+        self.assertEqual(self.get(','.join(str(i) for i in range(1, MAX_IDS + 2))).status_code, 400)
+        self.assertEqual(self.get('').status_code, 400)
+
+    def test_malformed_ids_are_a_400(self):
+        for ids in ('1,x', '1.5', '1;2'):
+            response = self.get(ids)
+            self.assertEqual(response.status_code, 400, ids)
+            self.assertIn('ids', response.json())
+
+    async def test_async_view_keys_results_like_the_sync_view(self):
+        ids = f'{self.rooms[2].room_id},{10 ** 6},{self.rooms[0].room_id}'
+        expected = await sync_to_async(lambda: self.get(ids).json())()
+        with self.settings(ROOT_URLCONF='booking.tests'):
+            response = await self.async_client.get('/api/rooms/', {'ids': ids})
+            self.assertEqual(response.json(), expected)
+            self.assertEqual((await self.async_client.get('/api/rooms/', {'ids': '1,x'})).status_code, 400)
+
+
+class SQLiteProfileTests(TestCase):
+    def test_pragmas_are_applied_to_new_connections(self):
+        self.assertIn('PRAGMA busy_timeout=5000', settings.BOOKING_SQLITE_PRAGMAS)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.room = RoomFactory(room_type='Single')
+
+    def test_unchanged_list_is_not_modified(self):
+        url = reverse('room-list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, headers={'if-none-match': etag}).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            RoomFactory()
+        response = self.client.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_the_representation(self):
+        url = reverse('room-list')
+        self.assertNotEqual(self.client.get(url)['ETag'], self.client.get(url, {'fields': 'room_id'})['ETag'])
+
+    def test_unchanged_detail_is_not_modified(self):
+        url = reverse('room-detail', args=[self.room.room_id])
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(self.client.get(url, headers={'if-none-match': response['ETag']}).status_code, 304)
+        self.room.room_type = 'Double'
+        self.room.save()
+        self.assertEqual(self.client.get(url, headers={'if-none-match': response['ETag']}).status_code, 200)
+
+    def test_missing_detail_is_not_found(self):
+        self.assertEqual(self.client.get(reverse('room-detail', args=[self.room.room_id + 1])).status_code, 404)
+
+    @override_settings(BOOKING_REPLICA_DATABASES=('default',))
+    def test_replica_reads_carry_no_validators(self):
+        url = reverse('room-list')
+        with self.settings(BOOKING_REPLICA_DATABASES=()):
+            etag = self.client.get(url)['ETag']
+        response = self.client.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('ETag', self.client.get(reverse('room-detail', args=[self.room.room_id])))
+
+        # A client pinned to the primary after a write gets validators again.
+        self.client.cookies[settings.BOOKING_REPLICA_PIN_COOKIE] = str(time.time() + 60)
+        self.assertEqual(self.client.get(url, headers={'if-none-match': etag}).status_code, 304)
+
+
+class ReplicaRoutingTests(APITestCase):
+    @override_settings(BOOKING_REPLICA_DATABASES=('replica_1', 'replica_2', 'replica_3'))
+    def test_each_request_reads_from_one_replica(self):
+        router = PrimaryReplicaRouter()
+        seen = []
+
+        def view(request):
+            seen.append({router.db_for_read(Room) for _ in range(20)})
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(view)
+        for _ in range(20):
+            middleware(RequestFactory().get('/'))
+        self.assertTrue(all(len(aliases) == 1 for aliases in seen))
+        self.assertLessEqual(set().union(*seen), set(settings.BOOKING_REPLICA_DATABASES))
+
+        middleware(RequestFactory().post('/'))
+        self.assertEqual(seen[-1], {'default'})
+        self.assertEqual(router.db_for_read(Room), 'default')
+
+    @override_settings(BOOKING_REPLICA_DATABASES=('default',))
+    def test_pinned_client_is_not_served_a_response_cached_from_a_replica(self):
+        url = reverse('room-list')
+        RoomFactory()
+        self.client.get(url)
+        self.client.cookies[settings.BOOKING_REPLICA_PIN_COOKIE] = str(time.time() + 60)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertTrue(queries)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+
+class BulkUpsertTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.existing = RoomFactory(room_number='101', room_type='Single', price=Decimal('80.00'), availability=True)
+        self.untouched = RoomFactory(room_number='102', room_type='Single', price=Decimal('90.00'), availability=True)
+        counters.rebuild()
+
+    def post(self, url, items):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, items, content_type='application/json')
+
+    def test_upsert_outcomes_and_counters(self):
+        response = self.post(reverse('room-bulk'), [
+            {'room_number': '101', 'room_type': 'Double', 'price': '120.00', 'availability': True},
+            {'room_number': '102', 'room_type': 'Single', 'price': '90.00', 'availability': True},
+            {'room_number': '103', 'room_type': 'Suite', 'price': '300.00', 'availability': False},
+            {'room_number': '103', 'room_type': 'Suite', 'price': '310.00', 'availability': False},
+            {'room_number': '104', 'room_type': 'Suite', 'price': 'abc', 'availability': False},
+        ])
+        self.assertEqual(response.status_code, 207)
+        body = response.json()
+        self.assertEqual([result['status'] for result in body['results']],
+                         ['updated', 'unchanged', 'created', 'rejected', 'rejected'])
+        self.assertEqual((body['created'], body['updated'], body['unchanged'], body['rejected']), (1, 1, 1, 2))
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.room_type, self.existing.price), ('Double', Decimal('120.00')))
+        self.assertEqual(Room.objects.get(room_number='103').price, Decimal('300.00'))
+        self.assertEqual(counters.check(), {})
+        self.assertEqual(StatisticsSnapshot.objects.get().total_rooms, 3)
+
+    def test_unknown_service_id_is_rejected_not_created(self):
+        service = ServiceFactory(name='Spa', price=Decimal('10.00'))
+        counters.rebuild()
+        response = self.post(reverse('service-bulk'), [
+            {'service_id': service.service_id, 'name': 'Spa', 'description': 'Updated', 'price': '12.00'},
+            {'service_id': service.service_id + 100, 'name': 'Ghost', 'description': '', 'price': '1.00'},
+            {'name': 'Sauna', 'description': 'New', 'price': '8.00'},
+        ])
+        self.assertEqual([result['status'] for result in response.json()['results']],
+                         ['updated', 'rejected', 'created'])
+        self.assertEqual(Service.objects.count(), 2)
+        self.assertEqual(counters.check(), {})
+
+    def test_delete_reports_each_key_and_keeps_counters(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('room-bulk'), ['101', '999'], content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in response.json()['results']], ['deleted', 'not_found'])
+        self.assertEqual(list(Room.objects.values_list('room_number', flat=True)), ['102'])
+        self.assertEqual(counters.check(), {})
+
+
+class DiscountServicesWriteTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.spa = ServiceFactory(name='Spa', description='Sauna and pool', price=Decimal('25.00'))
+        counters.rebuild()
+
+    @staticmethod
+    def services(count, start=0):
+        return [{'name': f'Service {n}', 'description': 'd', 'price': '5.00'} for n in range(start, start + count)]
+
+    def save(self, data, instance=None):
+        serializer = DiscountSerializer(instance, data=data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            return serializer.save()
+
+    def test_create_reuses_matching_services_and_creates_the_rest(self):
+        discount = self.save({'name': 'Summer', 'description': 'Seasonal', 'percentage': 10, 'services': [
+            {'name': 'Spa', 'description': 'Sauna and pool', 'price': '25.0'},
+            {'name': 'Spa', 'description': 'Sauna and pool', 'price': '25.00'},
+            {'name': 'Spa', 'description': 'Other', 'price': '25.00'},
+        ]})
+        self.assertEqual(Service.objects.count(), 2)
+        self.assertIn(self.spa, discount.services.all())
+        self.assertEqual(discount.services.count(), 2)
+        self.assertEqual(counters.check(), {})
+
+    def test_query_count_does_not_grow_with_the_number_of_services(self):
+        def queries(count, start):
+            with CaptureQueriesContext(connection) as captured:
+                self.save({'name': f'D{start}', 'description': 'Seasonal', 'percentage': 5,
+                           'services': self.services(count, start)})
+            return len(captured)
+        # 50 services still fit in one INSERT of each kind on SQLite.
+        self.assertEqual(queries(3, 0), queries(50, 100))
+
+    def test_update_replaces_the_links(self):
+        discount = self.save({'name': 'Summer', 'description': 'Seasonal', 'percentage': 10, 'services': self.services(3)})
+        self.save({'name': 'Summer', 'description': 'Seasonal', 'percentage': 15,
+                   'services': self.services(2, 2) + [{'name': 'Spa', 'description': 'Sauna and pool',
+                                                       'price': '25.00'}]}, instance=discount)
+        self.assertEqual(sorted(discount.services.values_list('name', flat=True)), ['Service 2', 'Service 3', 'Spa'])
+        # Services that lost their link are kept, as with the nested writes before.
+        self.assertEqual(Service.objects.count(), 5)
+        self.assertEqual(counters.check(), {})
+
+
+class ServiceDiscountIndexTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.spa = ServiceFactory(name='Spa  Treatment')
+        self.day_spa = ServiceFactory(name='Day Spa')
+        self.summer = DiscountFactory(percentage=10)
+        self.winter = DiscountFactory(percentage=20)
+        self.expired = DiscountFactory(percentage=0)
+        self.summer.services.add(self.spa)
+        self.winter.services.add(self.spa, self.day_spa)
+        self.day_spa.discount_set.add(self.expired)
+
+    def matching(self, service_name):
+        response = self.client.get(reverse('discount-list'), {'service_name': service_name})
+        return sorted(discount['discount_id'] for discount in response.json()['results'])
+
+    def test_service_name_matches_a_normalized_word_prefix(self):
+        self.assertEqual(self.matching('SPA treat'), sorted([self.summer.pk, self.winter.pk]))
+        self.assertEqual(self.matching('day'), sorted([self.winter.pk, self.expired.pk]))
+        self.assertEqual(self.matching('treatment'), sorted([self.summer.pk, self.winter.pk]))
+        self.assertEqual(self.matching('sp'), sorted([self.summer.pk, self.winter.pk, self.expired.pk]))
+        self.assertEqual(self.matching('pa'), [])
+        self.assertEqual(self.matching('spa day'), [])
+
+    def test_index_follows_links_and_renames(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.summer.services.remove(self.spa)
+        self.assertEqual(self.matching('spa treat'), [self.winter.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.spa.name = 'Massage'
+            self.spa.save()
+        self.assertEqual(self.matching('treatment'), [])
+        self.assertEqual(self.matching('massage'), [self.winter.pk])
+        self.assertEqual(list(self.spa.discount_index.values_list('service_name', flat=True)), ['massage'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.winter.services.clear()
+        self.assertEqual(self.matching('massage'), [])
+        self.assertEqual(discount_index.rebuild(), ServiceDiscountIndex.objects.count())
+
+    def test_active_discounts_for_services(self):
+        url = reverse('discounts-for-services')
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'service_ids': f'{self.day_spa.pk},{self.spa.pk},999'})
+        results = response.json()['results']
+        self.assertEqual([item['discount_id'] for item in results[str(self.spa.pk)]], [self.winter.pk, self.summer.pk])
+        self.assertEqual([item['discount_id'] for item in results[str(self.day_spa.pk)]], [self.winter.pk])
+        self.assertEqual(results['999'], [])
+        self.assertEqual(self.client.get(url).status_code, 400)
@@ -2,14 +2,20 @@ from django.urls import path, include
 from .views import UserListView, RoomListView, BookingListView, PaymentListView, ServiceListView, \
     BookingServiceListView, DiscountListView, ReviewListView, UserDetailView, RoomDetailView, BookingDetailView, \
     PaymentDetailView, ServiceDetailView, BookingServiceDetailView, DiscountDetailView, ReviewDetailView, \
-    RoomCreateView, StatisticsView, RoomFilterView, CreateBookingView, UpdateRoomAvailabilityAPIView
+    RoomCreateView, StatisticsView, RoomFilterView, CreateBookingView, UpdateRoomAvailabilityAPIView, \
+    RoomAvailabilityView, BatchBookingView, SearchView, BookingQuoteView, BatchQuoteView, AnalyticsTimeseriesView, \
+    MetricsView, RoomBulkView, UserBulkView, ServiceBulkView, ServiceDiscountsView
 
 urlpatterns = [
 
     #statistics
     path('statistic/', StatisticsView.as_view(), name='statistics'),
+    path('analytics/timeseries/', AnalyticsTimeseriesView.as_view(), name='analytics-timeseries'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 
     path('rooms/filter/', RoomFilterView.as_view(), name='room_filter'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('rooms/available/', RoomAvailabilityView.as_view(), name='room_available'),
 
     #Використання Silk
     path('silk/', include('silk.urls', namespace='silk')),
@@ -17,16 +23,21 @@ urlpatterns = [
 
     path('users/', UserListView.as_view(), name='user-list'),
     path('users/<int:user_id>/', UserDetailView.as_view(), name='user-detail'),
+    path('users/bulk/', UserBulkView.as_view(), name='user-bulk'),
 
 
     path('rooms/', RoomListView.as_view(), name='room-list'),
     path('rooms/<int:room_id>/', RoomDetailView.as_view(), name='room-detail'),
     path('room/', RoomCreateView.as_view(), name='room_create'),
+    path('rooms/bulk/', RoomBulkView.as_view(), name='room-bulk'),
     path('update_room_availability/', UpdateRoomAvailabilityAPIView.as_view(), name='update_room_availability'),
 
     path('bookings/', BookingListView.as_view(), name='booking-list'),
     path('bookings/<int:booking_id>/', BookingDetailView.as_view(), name='booking-detail'),
     path('bookings/create/', CreateBookingView.as_view(), name='create_booking'),
+    path('bookings/batch/', BatchBookingView.as_view(), name='batch_booking'),
+    path('bookings/<int:booking_id>/quote/', BookingQuoteView.as_view(), name='booking-quote'),
+    path('bookings/quote/', BatchQuoteView.as_view(), name='booking-quote-batch'),
 
 
     path('payments/', PaymentListView.as_view(), name='payment-list'),
@@ -35,6 +46,7 @@ urlpatterns = [
 
     path('services/', ServiceListView.as_view(), name='service-list'),
     path('services/<int:service_id>/', ServiceDetailView.as_view(), name='service-detail'),
+    path('services/bulk/', ServiceBulkView.as_view(), name='service-bulk'),
 
 
     path('booking-services/', BookingServiceListView.as_view(), name='booking-services-list'),
@@ -44,6 +56,7 @@ urlpatterns = [
 
     path('discounts/', DiscountListView.as_view(), name='discount-list'),
     path('discounts/<int:discount_id>/', DiscountDetailView.as_view(), name='discount-detail'),
+    path('discounts/for-services/', ServiceDiscountsView.as_view(), name='discounts-for-services'),
 
 
 
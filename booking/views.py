@@ -1,49 +1,93 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
-from django.db.models import Sum, Avg, Q, F
+from django.http import HttpResponse
+from django.db.models import Q
 
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
+from . import bulk, counters, discount_index, inventory, metrics, pricing, rollups, search, writes
+from .availability import available_rooms, booked_intervals, parse_price, parse_stay_bound, room_is_free, \
+    spans_a_night
+from .cache import cached_response, bump_generation
+from .conditional import conditional_detail, conditional_list
+from .lean import lean_serializer, requested_fields
+from .mixins import ListResponseMixin, DetailResponseMixin, requested_ids
 from .models import User, Room, Booking, Payment, Service, BookingService, Discount, Review
 
-from .serializers import UserSerializer, RoomSerializer, BookingSerializer, PaymentSerializer, ServiceSerializer, BookingServiceSerializer, DiscountSerializer, ReviewSerializer
-from django.views.decorators.cache import cache_page
-from django.utils.decorators import method_decorator
-from datetime import datetime
+from .serializers import UserSerializer, RoomSerializer, BookingSerializer, PaymentSerializer, ServiceSerializer, BookingServiceSerializer, DiscountSerializer, ReviewSerializer, \
+    BookingRequestSerializer, QuoteSerializer
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 
 
 class StatisticsView(APIView):
     def get(self, request):
-        total_users = User.objects.count()
-        total_bookings = Booking.objects.count()
-        total_payments = Payment.objects.aggregate(total_amount=Sum('amount'))['total_amount']
-        average_room_price = Room.objects.aggregate(average_price=Avg('price'))['average_price']
-        total_services = Service.objects.count()
-        total_booking_services = BookingService.objects.count()
-        total_discounts = Discount.objects.count()
-        total_reviews = Review.objects.count()
-        average_rating = Review.objects.aggregate(average_rating=Avg('rating'))['average_rating']
-
-        statistics = {
-            'total_users': total_users,
-            'total_bookings': total_bookings,
-            'total_payments': total_payments,
-            'average_room_price': average_room_price,
-            'total_services': total_services,
-            'total_booking_services': total_booking_services,
-            'total_discounts': total_discounts,
-            'total_reviews': total_reviews,
-            'average_rating': average_rating,
-        }
-        return Response(statistics)
+        return Response(counters.current())
+
+
+class MetricsView(APIView):
+    """Per-route latency, query and response cache metrics in Prometheus text format."""
+
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+class AnalyticsTimeseriesView(APIView):
+    """/api/analytics/timeseries/?metric=&start=&end=&group_by=&room_type=&payment_method="""
+    max_days = 3660
+
+    def get(self, request):
+        metric = request.query_params.get('metric', 'revenue')
+        if metric not in rollups.METRICS:
+            return Response({"error": f"metric must be one of: {', '.join(rollups.METRICS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        dimensions = rollups.METRICS[metric][2]
+
+        try:
+            start = parse_date(request.query_params.get('start', ''))
+            end = parse_date(request.query_params.get('end', ''))
+        except ValueError:
+            start = end = None
+        if start is None or end is None or start > end:
+            return Response({"error": "start and end must be dates (YYYY-MM-DD) with start <= end"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= self.max_days:
+            return Response({"error": f"At most {self.max_days} days per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+        group_by = request.query_params.get('group_by') or None
+        filters = {name: request.query_params.get(name) for name in ('room_type', 'payment_method')
+                   if request.query_params.get(name)}
+        invalid = [name for name in [group_by, *filters] if name and name not in dimensions]
+        if invalid:
+            return Response({"error": f"{metric} can only be grouped or filtered by: {', '.join(dimensions)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'metric': metric,
+            'start': start,
+            'end': end,
+            'series': rollups.timeseries(metric, start, end, group_by, **filters),
+        })
 
 
 class RoomFilterView(APIView):
+    @conditional_list(Room)
     def get(self, request):
-        min_price = request.GET.get('min_price')
-        max_price = request.GET.get('max_price')
+        rooms = list(self.filtered_queryset(request.GET))
+
+        # Найрелевантніші кімнати першими
         search_term = request.GET.get('search_term', '')
+        if search_term and search.is_indexed(Room):
+            rooms = self.ranked(rooms, search.ranked_ids(Room, search_term))
+
+        return Response(self.room_list(rooms))
+
+    def filtered_queryset(self, params):
+        min_price = params.get('min_price')
+        max_price = params.get('max_price')
+        search_term = params.get('search_term', '')
 
         filters = Q()
 
@@ -54,11 +98,18 @@ class RoomFilterView(APIView):
             filters &= Q(price__lte=max_price)
 
         if search_term:
-            filters &= Q(room_number__icontains=search_term) | Q(room_type__icontains=search_term)
+            filters &= search.search_filter(Room, search_term)
+
+        return Room.objects.filter(filters)
 
-        rooms = Room.objects.filter(filters)
+    @staticmethod
+    def ranked(rooms, ranked_ids):
+        ranking = {room_id: position for position, (room_id, _) in enumerate(ranked_ids)}
+        return sorted(rooms, key=lambda room: ranking.get(room.room_id, len(ranking)))
 
-        room_list = [{
+    @staticmethod
+    def room_list(rooms):
+        return [{
             'room_id': room.room_id,
             'room_number': room.room_number,
             'room_type': room.room_type,
@@ -66,45 +117,111 @@ class RoomFilterView(APIView):
             'availability': room.availability
         } for room in rooms]
 
-        return Response(room_list)
 
+class SearchView(APIView):
+    """Ranked full-text search over rooms, services or discounts: /api/search/?q=&type=&limit="""
+    targets = {
+        'rooms': (Room, RoomSerializer),
+        'services': (Service, ServiceSerializer),
+        'discounts': (Discount, DiscountSerializer),
+    }
+    max_limit = 100
+
+    @conditional_list(Room, Service, Discount)
+    @cached_response(Room, Service, Discount)
+    def get(self, request):
+        target = self.targets.get(request.query_params.get('type', 'rooms'))
+        if target is None:
+            return Response({"error": f"type must be one of: {', '.join(self.targets)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        model, serializer_class = target
+        term = request.query_params.get('q', '')
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response({"error": "limit must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, self.max_limit)
+
+        lean = lean_serializer(serializer_class, requested_fields(request, serializer_class))
+        if search.is_indexed(model):
+            scores = dict(search.ranked_ids(model, term, limit))
+            rows = {row[lean.pk_name]: row for row in lean.values(model.objects.filter(pk__in=list(scores)))}
+            ordered = [rows[pk] for pk in scores if pk in rows]
+        else:
+            scores = {}
+            ordered = list(lean.values(model.objects.filter(search.search_filter(model, term)))[:limit])
+
+        results = lean.serialize(ordered)
+        for row, item in zip(ordered, results):
+            item['score'] = -scores.get(row[lean.pk_name], 0.0)
+        return Response(results)
+
+
+class RoomAvailabilityView(ListResponseMixin, APIView):
+    @conditional_list(Room, Booking)
+    @cached_response(Room, Booking)
+    def get(self, request):
+        check_in = parse_stay_bound(request.query_params.get('check_in'))
+        check_out = parse_stay_bound(request.query_params.get('check_out'))
+        if check_in is None or check_out is None:
+            return Response({"error": "check_in and check_out are required dates"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if check_in >= check_out:
+            return Response({"error": "check_out must be after check_in"}, status=status.HTTP_400_BAD_REQUEST)
 
-class UserListView(APIView):
+        max_price = request.query_params.get('max_price')
+        if max_price:
+            max_price = parse_price(max_price)
+            if max_price is None:
+                return Response({"error": "max_price must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+
+        rooms = available_rooms(
+            check_in,
+            check_out,
+            room_type=request.query_params.get('room_type'),
+            max_price=max_price,
+        )
+        return self.list_response(request, rooms, RoomSerializer)
+
+
+class UserListView(ListResponseMixin, APIView):
+    @conditional_list(User)
+    @cached_response(User)
     def get(self, request):
+        return self.list_response(request, self.filtered_queryset(request.query_params), UserSerializer)
+
+    def filtered_queryset(self, params):
         users = User.objects.all()
 
 
-        user_id = request.query_params.get('user_id')
+        user_id = params.get('user_id')
         if user_id:
             users = users.filter(user_id=user_id)
 
 
-        email = request.query_params.get('email')
+        email = params.get('email')
         if email:
             users = users.filter(email=email)
 
 
-        surname = request.query_params.get('surname')
+        surname = params.get('surname')
         if surname:
             users = users.filter(surname__icontains=surname)
 
 
-        name = request.query_params.get('name')
+        name = params.get('name')
         if name:
             users = users.filter(name__icontains=name)
 
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+        return users
 
-class UserDetailView(APIView):
+class UserDetailView(DetailResponseMixin, APIView):
+    @conditional_detail(User)
+    @cached_response(User)
     def get(self, request, user_id):
-        try:
-            user = User.objects.get(user_id=user_id)
-        except User.DoesNotExist:
-            return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        serializer = UserSerializer(user)
-        return Response(serializer.data)
+        return self.detail_response(request, User.objects.filter(user_id=user_id), UserSerializer, "User not found")
 
     def post(self, request, user_id):
         serializer = UserSerializer(data=request.data)
@@ -123,63 +240,92 @@ class UserDetailView(APIView):
 
 
 class UpdateRoomAvailabilityAPIView(APIView):
-    def post(self, request):
+    def get(self, request):
         try:
-            booking_id = request.data.get('booking_id')
-
-            # Знайти кількість заброньованих кімнат за заданим ідентифікатором бронювання
-            booked_rooms_count = BookingService.objects.filter(booking_id=booking_id).count()
+            start = parse_date(request.query_params.get('start', ''))
+            end = parse_date(request.query_params.get('end', ''))
+        except ValueError:
+            start = end = None
+        if start is None or end is None or start >= end or (end - start).days > 366:
+            return Response({"error": "start and end must be dates (YYYY-MM-DD), start < end, at most 366 days"},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-            # Оновити кількість доступних кімнат за допомогою F-виразу
-            Room.objects.update(availability=F('availability') - booked_rooms_count)
+        # Вільні кімнати на кожну ніч — індексований пошук у журналі, без сканування таблиці Room
+        free = inventory.availability(start, end, request.query_params.get('room_type'))
+        return Response([{'night': night, 'available_rooms': rooms} for night, rooms in free.items()])
 
-            return Response("Кількість доступних кімнат оновлена успішно", status=status.HTTP_200_OK)
+    def post(self, request):
+        try:
+            booking_id = request.data.get('booking_id')
+            action = request.data.get('action', 'reserve')
+
+            try:
+                booking = Booking.objects.get(booking_id=booking_id)
+            except Booking.DoesNotExist:
+                return Response({"error": "Booking not found"}, status=status.HTTP_404_NOT_FOUND)
+
+            # Змінюємо лише рядки журналу для кімнати та ночей цього бронювання
+            if action == 'reserve':
+                changed = inventory.reserve_booking(booking)
+            elif action == 'release':
+                # The ledger mirrors Booking: nights are freed by deleting the booking, never on their own.
+                return Response({"error": "Nights of an existing booking are released by deleting the booking "
+                                          f"(DELETE /api/bookings/{booking.booking_id}/)"},
+                                status=status.HTTP_409_CONFLICT)
+            else:
+                return Response({"error": "action must be 'reserve' or 'release'"},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            return Response({'message': "Кількість доступних кімнат оновлена успішно", 'nights': changed},
+                            status=status.HTTP_200_OK)
+        except inventory.RoomUnavailable:
+            return Response({"error": "Room is already booked for these dates"}, status=status.HTTP_409_CONFLICT)
         except Exception as e:
             return Response(f"Помилка під час оновлення кількості доступних кімнат: {str(e)}",
                             status=status.HTTP_400_BAD_REQUEST)
 
 
-class RoomListView(APIView):
+class RoomListView(ListResponseMixin, APIView):
+    @conditional_list(Room)
+    @cached_response(Room)
     def get(self, request):
+        return self.list_response(request, self.filtered_queryset(request.query_params), RoomSerializer)
+
+    def filtered_queryset(self, params):
         rooms = Room.objects.all()
 
-        room_number = request.query_params.get('room_number')
+        room_number = params.get('room_number')
         if room_number:
             rooms = rooms.filter(room_number=room_number)
 
 
-        room_type = request.query_params.get('room_type')
+        room_type = params.get('room_type')
         if room_type:
             rooms = rooms.filter(room_type=room_type)
 
 
-        price_lte = request.query_params.get('price_lte')
+        price_lte = params.get('price_lte')
         if price_lte:
             rooms = rooms.filter(price__lte=price_lte)
 
 
-        price_gte = request.query_params.get('price_gte')
+        price_gte = params.get('price_gte')
         if price_gte:
             rooms = rooms.filter(price__gte=price_gte)
 
 
-        availability = request.query_params.get('availability')
+        availability = params.get('availability')
         if availability is not None:
             rooms = rooms.filter(availability=availability)
 
-        serializer = RoomSerializer(rooms, many=True)
-        return Response(serializer.data)
+        return rooms
 
 
-class RoomDetailView(APIView):
+class RoomDetailView(DetailResponseMixin, APIView):
+    @conditional_detail(Room)
+    @cached_response(Room)
     def get(self, request, room_id):
-        try:
-            room = Room.objects.get(room_id=room_id)
-        except Room.DoesNotExist:
-            return Response({"error": "Room not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        serializer = RoomSerializer(room)
-        return Response(serializer.data)
+        return self.detail_response(request, Room.objects.filter(room_id=room_id), RoomSerializer, "Room not found")
 
     def post(self, request, room_id):
         serializer = RoomSerializer(data=request.data)
@@ -197,100 +343,328 @@ class RoomDetailView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+def busy_response(error):
+    return Response({'error': str(error)}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
+
+
 class RoomCreateView(APIView):
     def post(self, request):
         serializer = RoomSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            try:
+                writes.atomic_write(serializer.save)
+            except writes.WriteContention as e:
+                return busy_response(e)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CreateBookingView(APIView):
-    @transaction.atomic
+class BulkUpsertView(APIView):
+    """POST: upsert a list of rows; DELETE: delete a list of keys. See booking.bulk."""
+    resource = None
+    max_batch_size = 10000
+
     def post(self, request):
+        items = request.data
+        error = self._batch_error(items)
+        if error:
+            return error
+        results = self.resource.upsert(items)
+        summary = {outcome: sum(1 for result in results if result['status'] == outcome)
+                   for outcome in ('created', 'updated', 'unchanged', 'rejected', 'failed')}
+        applied = summary['created'] + summary['updated'] + summary['unchanged']
+        if applied == len(items):
+            response_status = status.HTTP_200_OK
+        elif applied:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({**summary, 'results': results}, status=response_status)
+
+    def delete(self, request):
+        keys = request.data
+        error = self._batch_error(keys)
+        if error:
+            return error
         try:
-            user_id = request.data.get('user_id')
-            room_id = request.data.get('room_id')
-            amount = request.data.get('amount')
-            payment_method = request.data.get('payment_method')
+            keys = self.resource.parse_keys(keys)
+        except DjangoValidationError as e:
+            return Response({'error': f'Invalid {self.resource.key}: {"; ".join(e.messages)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        results = self.resource.delete(keys)
+        summary = {outcome: sum(1 for result in results if result['status'] == outcome)
+                   for outcome in ('deleted', 'not_found', 'failed')}
+        response_status = status.HTTP_207_MULTI_STATUS if summary['failed'] else status.HTTP_200_OK
+        return Response({**summary, 'results': results}, status=response_status)
+
+    def _batch_error(self, items):
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Expected a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_batch_size:
+            return Response({'error': f'At most {self.max_batch_size} rows per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return None
+
+
+class RoomBulkView(BulkUpsertView):
+    resource = bulk.ROOMS
+
+
+class UserBulkView(BulkUpsertView):
+    resource = bulk.USERS
+
+
+class ServiceBulkView(BulkUpsertView):
+    resource = bulk.SERVICES
+
+
+class CreateBookingView(APIView):
+    def post(self, request):
+        user_id = request.data.get('user_id')
+        room_id = request.data.get('room_id')
+        amount = request.data.get('amount')
+        payment_method = request.data.get('payment_method')
+        check_in = parse_stay_bound(request.data.get('check_in_date'))
+        check_out = parse_stay_bound(request.data.get('check_out_date'))
+
+        if check_in is None or check_out is None or not spans_a_night(check_in, check_out):
+            return Response({'error': 'check_in_date and check_out_date must form a valid date range of at least '
+                                      'one night'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        def book():
+            # Блокуємо лише кімнату, що бронюється: бронювання інших кімнат ідуть паралельно
+            try:
+                room = Room.objects.select_for_update().get(room_id=room_id)
+            except Room.DoesNotExist:
+                return Response({'error': 'Room not found'}, status=status.HTTP_404_NOT_FOUND)
+
+            if not room_is_free(room.room_id, check_in, check_out):
+                return Response({'error': 'Room is already booked for these dates'},
+                                status=status.HTTP_409_CONFLICT)
 
             # Створення нового бронювання
             booking = Booking(
-                booking_date=datetime.now(),
-                check_in_date=request.data.get('check_in_date'),
-                check_out_date=request.data.get('check_out_date'),
+                booking_date=timezone.now(),
+                check_in_date=check_in,
+                check_out_date=check_out,
                 user_id=user_id,
-                room_id=room_id
+                room=room
             )
             booking.save()
 
             # Створення платежу для цього бронювання
             payment = Payment(
                 amount=amount,
-                date=datetime.now(),
+                date=timezone.now(),
                 payment_method=payment_method,
                 booking=booking
             )
             payment.save()
 
-            return Response({'message': 'Booking and payment created successfully'}, status=status.HTTP_201_CREATED)
+            return Response({'message': 'Booking and payment created successfully',
+                             'booking_id': booking.booking_id}, status=status.HTTP_201_CREATED)
+
+        try:
+            return writes.atomic_write(book)
+        except inventory.RoomUnavailable:
+            return Response({'error': 'Room is already booked for these dates'}, status=status.HTTP_409_CONFLICT)
+        except writes.WriteContention as e:
+            return busy_response(e)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class BatchBookingView(APIView):
+    max_batch_size = 1000
 
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Expected a non-empty list of bookings'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_batch_size:
+            return Response({'error': f'At most {self.max_batch_size} bookings per batch'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            serializer = BookingRequestSerializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                results[index] = {'index': index, 'status': 'rejected', 'errors': serializer.errors}
+
+        try:
+            if valid:
+                writes.atomic_write(lambda: self._create_bookings(valid, results))
+        except writes.WriteContention as e:
+            return busy_response(e)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+        created = sum(1 for result in results if result['status'] == 'created')
+        if created == len(items):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'created': created, 'rejected': len(items) - created, 'results': results},
+                        status=response_status)
+
+    def _create_bookings(self, valid, results):
+        room_ids = sorted({data['room_id'] for _, data in valid})
+        user_ids = {data['user_id'] for _, data in valid}
+
+        # Блокуємо лише кімнати з цього пакета, у сталому порядку, щоб уникнути взаємних блокувань
+        known_rooms = set(Room.objects.select_for_update().filter(room_id__in=room_ids)
+                          .order_by('room_id').values_list('room_id', flat=True))
+        known_users = set(User.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+        taken = booked_intervals(
+            known_rooms,
+            min(data['check_in_date'] for _, data in valid),
+            max(data['check_out_date'] for _, data in valid),
+        )
+
+        accepted = []
+        for index, data in valid:
+            if data['room_id'] not in known_rooms:
+                results[index] = {'index': index, 'status': 'rejected', 'errors': {'room_id': ['Room not found']}}
+                continue
+            if data['user_id'] not in known_users:
+                results[index] = {'index': index, 'status': 'rejected', 'errors': {'user_id': ['User not found']}}
+                continue
+            stays = taken.setdefault(data['room_id'], [])
+            if any(start < data['check_out_date'] and end > data['check_in_date'] for start, end in stays):
+                results[index] = {'index': index, 'status': 'rejected',
+                                  'errors': {'room_id': ['Room is already booked for these dates']}}
+                continue
+            stays.append((data['check_in_date'], data['check_out_date']))
+            accepted.append((index, data))
+
+        now = timezone.now()
+        bookings = Booking.objects.bulk_create([
+            Booking(
+                booking_date=now,
+                check_in_date=data['check_in_date'],
+                check_out_date=data['check_out_date'],
+                user_id=data['user_id'],
+                room_id=data['room_id'],
+            )
+            for _, data in accepted
+        ], batch_size=500)
+        Payment.objects.bulk_create([
+            Payment(amount=data['amount'], date=now, payment_method=data['payment_method'], booking=booking)
+            for (_, data), booking in zip(accepted, bookings)
+        ], batch_size=500)
+
+        # bulk_create не надсилає сигналів, тому лічильники статистики, кеш і зведення оновлюємо тут
+        bump_generation(Booking, Payment)
+        counters.adjust(
+            total_bookings=len(bookings),
+            total_payments=len(bookings),
+            payment_amount_sum=sum(data['amount'] for _, data in accepted),
+        )
+        inventory.reserve([
+            (booking.booking_id, booking.room_id, booking.check_in_date, booking.check_out_date) for booking in bookings
+        ])
+        types = rollups.room_types(data['room_id'] for _, data in accepted)
+        rollups.add_stays([
+            (types[data['room_id']], data['check_in_date'], data['check_out_date']) for _, data in accepted
+        ])
+        rollups.add_payments([
+            (rollups.local_day(now), types[data['room_id']], data['payment_method'], data['amount'])
+            for _, data in accepted
+        ])
+
+        for (index, _), booking in zip(accepted, bookings):
+            results[index] = {'index': index, 'status': 'created', 'booking_id': booking.booking_id}
+
+
+class BookingQuoteView(APIView):
+    def get(self, request, booking_id):
+        quote = pricing.quote_bookings([booking_id]).get(booking_id)
+        if quote is None:
+            return Response({"error": "Booking not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(QuoteSerializer(quote).data)
+
+
+class BatchQuoteView(APIView):
+    max_batch_size = 5000
+
+    def post(self, request):
+        booking_ids = request.data.get('booking_ids') if isinstance(request.data, dict) else None
+        if not isinstance(booking_ids, list) or not booking_ids:
+            return Response({'error': 'booking_ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(booking_ids) > self.max_batch_size:
+            return Response({'error': f'At most {self.max_batch_size} bookings per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            booking_ids = [int(booking_id) for booking_id in booking_ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'booking_ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        quotes = pricing.quote_bookings(booking_ids)
+        return Response({
+            'quotes': QuoteSerializer([quotes[i] for i in dict.fromkeys(booking_ids) if i in quotes], many=True).data,
+            'missing': [i for i in dict.fromkeys(booking_ids) if i not in quotes],
+        })
+
 
-class BookingListView(APIView):
-    @method_decorator(cache_page(60 * 15))
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
+class BookingListView(ListResponseMixin, APIView):
+    @conditional_list(Booking)
+    @cached_response(Booking)
     def get(self, request):
+        return self.list_response(request, self.filtered_queryset(request.query_params), BookingSerializer)
+
+    def filtered_queryset(self, params):
         bookings = Booking.objects.all()
 
 
-        booking_date = request.query_params.get('booking_date')
+        booking_date = params.get('booking_date')
         if booking_date:
             bookings = bookings.filter(booking_date=booking_date)
 
 
-        check_in_date = request.query_params.get('check_in_date')
+        check_in_date = params.get('check_in_date')
         if check_in_date:
             bookings = bookings.filter(check_in_date=check_in_date)
 
 
-        check_out_date = request.query_params.get('check_out_date')
+        check_out_date = params.get('check_out_date')
         if check_out_date:
             bookings = bookings.filter(check_out_date=check_out_date)
 
 
-        user_id = request.query_params.get('user_id')
+        user_id = params.get('user_id')
         if user_id:
             bookings = bookings.filter(user_id=user_id)
 
 
-        room_id = request.query_params.get('room_id')
+        room_id = params.get('room_id')
         if room_id:
             bookings = bookings.filter(room_id=room_id)
 
         bookings = bookings.select_related('user', 'room')
-        serializer = BookingSerializer(bookings, many=True)
-        return Response(serializer.data)
+        return bookings
 
 
-class BookingDetailView(APIView):
+class BookingDetailView(DetailResponseMixin, APIView):
+    @conditional_detail(Booking)
+    @cached_response(Booking)
     def get(self, request, booking_id):
-        try:
-            booking = Booking.objects.get(booking_id=booking_id)
-        except Booking.DoesNotExist:
-            return Response({"error": "Booking not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        serializer = BookingSerializer(booking)
-        return Response(serializer.data)
+        return self.detail_response(request, Booking.objects.filter(booking_id=booking_id),
+                                    BookingSerializer, "Booking not found")
 
     def post(self, request, booking_id):
         serializer = BookingSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            try:
+                with transaction.atomic():
+                    serializer.save()
+            except inventory.RoomUnavailable:
+                return Response({"error": "Room is already booked for these dates"}, status=status.HTTP_409_CONFLICT)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -302,43 +676,44 @@ class BookingDetailView(APIView):
         booking.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-class PaymentListView(APIView):
+class PaymentListView(ListResponseMixin, APIView):
+    @conditional_list(Payment)
+    @cached_response(Payment)
     def get(self, request):
+        return self.list_response(request, self.filtered_queryset(request.query_params), PaymentSerializer)
+
+    def filtered_queryset(self, params):
         payments = Payment.objects.all()
 
 
-        amount = request.query_params.get('amount')
+        amount = params.get('amount')
         if amount:
             payments = payments.filter(amount=amount)
 
 
-        date = request.query_params.get('date')
+        date = params.get('date')
         if date:
             payments = payments.filter(date=date)
 
 
-        payment_method = request.query_params.get('payment_method')
+        payment_method = params.get('payment_method')
         if payment_method:
             payments = payments.filter(payment_method=payment_method)
 
 
-        booking_id = request.query_params.get('booking_id')
+        booking_id = params.get('booking_id')
         if booking_id:
             payments = payments.filter(booking_id=booking_id)
 
-        serializer = PaymentSerializer(payments, many=True)
-        return Response(serializer.data)
+        return payments
 
 
-class PaymentDetailView(APIView):
+class PaymentDetailView(DetailResponseMixin, APIView):
+    @conditional_detail(Payment)
+    @cached_response(Payment)
     def get(self, request, payment_id):
-        try:
-            payment = Payment.objects.get(payment_id=payment_id)
-        except Payment.DoesNotExist:
-            return Response({"error": "Payment not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        serializer = PaymentSerializer(payment)
-        return Response(serializer.data)
+        return self.detail_response(request, Payment.objects.filter(payment_id=payment_id),
+                                    PaymentSerializer, "Payment not found")
 
     def post(self, request, payment_id):
         serializer = PaymentSerializer(data=request.data)
@@ -355,33 +730,34 @@ class PaymentDetailView(APIView):
         payment.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-class ServiceListView(APIView):
+class ServiceListView(ListResponseMixin, APIView):
+    @conditional_list(Service)
+    @cached_response(Service)
     def get(self, request):
+        return self.list_response(request, self.filtered_queryset(request.query_params), ServiceSerializer)
+
+    def filtered_queryset(self, params):
         services = Service.objects.all()
 
 
-        name = request.query_params.get('name')
+        name = params.get('name')
         if name:
-            services = services.filter(name__icontains=name)
+            services = services.filter(search.search_filter(Service, name, 'name'))
 
 
-        price = request.query_params.get('price')
+        price = params.get('price')
         if price:
             services = services.filter(price=price)
 
-        serializer = ServiceSerializer(services, many=True)
-        return Response(serializer.data)
+        return services
 
 
-class ServiceDetailView(APIView):
+class ServiceDetailView(DetailResponseMixin, APIView):
+    @conditional_detail(Service)
+    @cached_response(Service)
     def get(self, request, service_id):
-        try:
-            service = Service.objects.get(service_id=service_id)
-        except Service.DoesNotExist:
-            return Response({"error": "Service not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        serializer = ServiceSerializer(service)
-        return Response(serializer.data)
+        return self.detail_response(request, Service.objects.filter(service_id=service_id),
+                                    ServiceSerializer, "Service not found")
 
     def post(self, request, service_id):
         serializer = ServiceSerializer(data=request.data)
@@ -398,43 +774,44 @@ class ServiceDetailView(APIView):
         service.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-class BookingServiceListView(APIView):
+class BookingServiceListView(ListResponseMixin, APIView):
+    @conditional_list(BookingService)
+    @cached_response(BookingService)
     def get(self, request):
+        return self.list_response(request, self.filtered_queryset(request.query_params), BookingServiceSerializer)
+
+    def filtered_queryset(self, params):
         booking_services = BookingService.objects.all()
 
 
-        booking_id = request.query_params.get('booking_id')
+        booking_id = params.get('booking_id')
         if booking_id:
             booking_services = booking_services.filter(booking_id=booking_id)
 
 
-        service_id = request.query_params.get('service_id')
+        service_id = params.get('service_id')
         if service_id:
             booking_services = booking_services.filter(service_id=service_id)
 
 
-        quantity = request.query_params.get('quantity')
+        quantity = params.get('quantity')
         if quantity:
             booking_services = booking_services.filter(quantity=quantity)
 
 
-        date_time = request.query_params.get('date_time')
+        date_time = params.get('date_time')
         if date_time:
             booking_services = booking_services.filter(date_time=date_time)
 
-        serializer = BookingServiceSerializer(booking_services, many=True)
-        return Response(serializer.data)
+        return booking_services
 
 
-class BookingServiceDetailView(APIView):
+class BookingServiceDetailView(DetailResponseMixin, APIView):
+    @conditional_detail(BookingService)
+    @cached_response(BookingService)
     def get(self, request, booking_service_id):
-        try:
-            booking_service = BookingService.objects.get(booking_service_id=booking_service_id)
-        except BookingService.DoesNotExist:
-            return Response({"error": "Booking Service not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        serializer = BookingServiceSerializer(booking_service)
-        return Response(serializer.data)
+        return self.detail_response(request, BookingService.objects.filter(booking_service_id=booking_service_id),
+                                    BookingServiceSerializer, "Booking Service not found")
 
     def post(self, request, booking_service_id):
         serializer = BookingServiceSerializer(data=request.data)
@@ -452,45 +829,56 @@ class BookingServiceDetailView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class DiscountListView(APIView):
+class DiscountListView(ListResponseMixin, APIView):
+    @conditional_list(Discount, Service)
+    @cached_response(Discount, Service)
     def get(self, request):
+        return self.list_response(request, self.filtered_queryset(request.query_params), DiscountSerializer)
+
+    def filtered_queryset(self, params):
         discounts = Discount.objects.all()
 
 
-        name = request.query_params.get('name')
+        name = params.get('name')
         if name:
-            discounts = discounts.filter(name__icontains=name)
+            discounts = discounts.filter(search.search_filter(Discount, name, 'name'))
 
 
-        description = request.query_params.get('description')
+        description = params.get('description')
         if description:
-            discounts = discounts.filter(description__icontains=description)
+            discounts = discounts.filter(search.search_filter(Discount, description, 'description'))
 
 
-        percentage = request.query_params.get('percentage')
+        percentage = params.get('percentage')
         if percentage:
             discounts = discounts.filter(percentage=percentage)
 
 
-        service_name = request.query_params.get('service_name')
+        service_name = params.get('service_name')
         if service_name:
-            discounts = discounts.filter(services__name__icontains=service_name)
+            discounts = discounts.filter(discount_id__in=discount_index.discounts_matching(service_name))
 
+        return discounts
 
-        discounts = discounts.prefetch_related('services')
-        serializer = DiscountSerializer(discounts, many=True)
-        return Response(serializer.data)
 
+class ServiceDiscountsView(APIView):
+    """Active discounts (percentage > 0) of each service in ``?service_ids=1,2,3``, best first."""
+    @conditional_list(Discount, Service)
+    @cached_response(Discount, Service)
+    def get(self, request):
+        service_ids = requested_ids(request, 'service_ids')
+        if service_ids is None:
+            return Response({'error': 'service_ids is required'}, status=status.HTTP_400_BAD_REQUEST)
+        discounts = discount_index.active_discounts(service_ids)
+        return Response({'results': {str(service_id): found for service_id, found in discounts.items()}})
 
-class DiscountDetailView(APIView):
-    def get(self, request, discount_id):
-        try:
-            discount = Discount.objects.get(discount_id=discount_id)
-        except Discount.DoesNotExist:
-            return Response({"error": "Discount not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        serializer = DiscountSerializer(discount)
-        return Response(serializer.data)
+class DiscountDetailView(DetailResponseMixin, APIView):
+    @conditional_detail(Discount, Service)
+    @cached_response(Discount, Service)
+    def get(self, request, discount_id):
+        return self.detail_response(request, Discount.objects.filter(discount_id=discount_id),
+                                    DiscountSerializer, "Discount not found")
 
     def post(self, request, discount_id):
         serializer = DiscountSerializer(data=request.data)
@@ -508,38 +896,39 @@ class DiscountDetailView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class ReviewListView(APIView):
+class ReviewListView(ListResponseMixin, APIView):
+    @conditional_list(Review)
+    @cached_response(Review)
     def get(self, request):
+        return self.list_response(request, self.filtered_queryset(request.query_params), ReviewSerializer)
+
+    def filtered_queryset(self, params):
         reviews = Review.objects.all()
 
 
-        rating = request.query_params.get('rating')
+        rating = params.get('rating')
         if rating:
             reviews = reviews.filter(rating=rating)
 
 
-        user_id = request.query_params.get('user_id')
+        user_id = params.get('user_id')
         if user_id:
             reviews = reviews.filter(user_id=user_id)
 
 
-        booking_id = request.query_params.get('booking_id')
+        booking_id = params.get('booking_id')
         if booking_id:
             reviews = reviews.filter(booking_id=booking_id)
 
-        serializer = ReviewSerializer(reviews, many=True)
-        return Response(serializer.data)
+        return reviews
 
 
-class ReviewDetailView(APIView):
+class ReviewDetailView(DetailResponseMixin, APIView):
+    @conditional_detail(Review)
+    @cached_response(Review)
     def get(self, request, review_id):
-        try:
-            review = Review.objects.get(review_id=review_id)
-        except Review.DoesNotExist:
-            return Response({"error": "Review not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        serializer = ReviewSerializer(review)
-        return Response(serializer.data)
+        return self.detail_response(request, Review.objects.filter(review_id=review_id),
+                                    ReviewSerializer, "Review not found")
 
     def post(self, request, review_id):
         serializer = ReviewSerializer(data=request.data)
@@ -0,0 +1,72 @@
+"""
+Serialized write path for SQLite.
+
+SQLite allows one writer per database file. With IMMEDIATE transactions and
+busy_timeout (see the SQLite profile in settings), a writer waits for the
+lock instead of failing at once. But every thread of a worker still polls
+the same file lock, and a wait that runs past busy_timeout surfaces as
+"database is locked".
+
+``apply_sqlite_pragmas`` runs settings.BOOKING_SQLITE_PRAGMAS (WAL,
+busy_timeout, ...) on every new SQLite connection.
+
+``atomic_write`` queues the writers of a process on a lock before they open
+their transaction. It retries the whole transaction, with backoff, when
+another process holds the database for longer than busy_timeout. On other
+backends it is a plain ``transaction.atomic()``.
+"""
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+_locks = defaultdict(threading.Lock)
+
+
+class WriteContention(Exception):
+    """The database stayed locked through every retry."""
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """connection_created receiver."""
+    pragmas = getattr(settings, 'BOOKING_SQLITE_PRAGMAS', ())
+    if connection.vendor == 'sqlite' and pragmas:
+        with connection.cursor() as cursor:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+
+
+def _is_lock_error(error):
+    message = str(error).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def atomic_write(write, using=DEFAULT_DB_ALIAS):
+    """
+    Run ``write()`` in its own transaction on the serialized write path and
+    return its result; raise WriteContention if the database stays locked.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not getattr(settings, 'BOOKING_SERIALIZED_WRITES', True):
+        with transaction.atomic(using=using):
+            return write()
+    if connection.in_atomic_block:
+        # Part of an outer transaction, which is the unit that would have to be retried.
+        with transaction.atomic(using=using):
+            return write()
+
+    attempts = getattr(settings, 'BOOKING_WRITE_ATTEMPTS', 5)
+    backoff = getattr(settings, 'BOOKING_WRITE_BACKOFF', 0.05)
+    for attempt in range(attempts):
+        try:
+            with _locks[using], transaction.atomic(using=using):
+                return write()
+        except OperationalError as error:
+            if not _is_lock_error(error):
+                raise
+            if attempt + 1 < attempts:
+                time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+    raise WriteContention(f'{using} database stayed locked after {attempts} attempts')
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dbcourse3.settings')
+# Serve reads with the native async views (see booking.async_views).
+os.environ.setdefault('BOOKING_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+import django
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'booking.metrics.MetricsMiddleware',
+    'booking.routers.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,7 +55,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'silk.middleware.SilkyMiddleware',
+    'booking.profiling.SampledProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'dbcourse3.urls'
@@ -85,6 +90,133 @@ DATABASES = {
     }
 }
 
+# SQLite production profile (BOOKING_SQLITE_PROFILE=production, the default;
+# set it to 'default' for Django's stock SQLite behaviour):
+# - WAL journal, so readers no longer block behind a writer,
+# - synchronous=NORMAL (durable across application crashes; WAL may lose
+#   the last commits on power loss), a 64 MiB page cache, 256 MiB mmap,
+# - busy_timeout plus IMMEDIATE transactions, so writers queue on the lock
+#   instead of failing with "database is locked" on lock upgrade,
+# - connections reused across requests.
+# The pragmas are run on every new SQLite connection by a connection_created
+# receiver (booking.writes.apply_sqlite_pragmas), which works on any Django
+# version. IMMEDIATE transactions need the 'transaction_mode' option of
+# Django 5.1+; on older versions transactions stay deferred and
+# lock-upgrade failures are absorbed by atomic_write's retries.
+# Writes from the create endpoints additionally go through
+# booking.writes.atomic_write (one writer per process, retried on lock
+# timeouts). Compare the profiles with `manage.py bench_sqlite_profile`.
+
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA temp_store=MEMORY',
+)
+SQLITE_PRODUCTION_PROFILE = {
+    'CONN_MAX_AGE': 600,
+    'CONN_HEALTH_CHECKS': True,
+    'OPTIONS': {'transaction_mode': 'IMMEDIATE'} if django.VERSION >= (5, 1) else {},
+}
+BOOKING_SQLITE_PRAGMAS = ()
+if os.environ.get('BOOKING_SQLITE_PROFILE', 'production') == 'production':
+    DATABASES['default'].update(SQLITE_PRODUCTION_PROFILE)
+    BOOKING_SQLITE_PRAGMAS = SQLITE_PRAGMAS
+
+BOOKING_SERIALIZED_WRITES = True
+BOOKING_WRITE_ATTEMPTS = 5
+BOOKING_WRITE_BACKOFF = 0.05
+
+# Read replicas
+#
+# Safe (GET/HEAD/OPTIONS) requests read booking data from one of
+# BOOKING_REPLICA_DATABASES; everything else uses 'default' (see
+# booking/routers.py). After a write the client is pinned to the primary for
+# BOOKING_REPLICA_PIN_SECONDS, which should exceed the replication lag.
+# Locally, BOOKING_REPLICA_SQLITE takes comma-separated paths of SQLite
+# copies of the primary, refreshed with `manage.py sync_replicas`.
+
+DATABASES.update({
+    f'replica{number}': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': replica_path.strip(),
+        'CONN_MAX_AGE': DATABASES['default'].get('CONN_MAX_AGE', 0),
+        'OPTIONS': DATABASES['default'].get('OPTIONS', {}),
+        'TEST': {'MIRROR': 'default'},
+    }
+    for number, replica_path in enumerate(filter(None, os.environ.get('BOOKING_REPLICA_SQLITE', '').split(',')), 1)
+})
+
+BOOKING_REPLICA_DATABASES = tuple(alias for alias in DATABASES if alias != 'default')
+BOOKING_REPLICA_PIN_SECONDS = 5
+BOOKING_REPLICA_PIN_COOKIE = 'primary_until'
+DATABASE_ROUTERS = ['booking.routers.PrimaryReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+#
+# The list and detail endpoints cache their responses until the underlying
+# models change (see booking/cache.py). Invalidation is only seen by workers
+# sharing the cache, so multi-process deployments need a shared backend
+# (Redis, Memcached, database) here instead of the per-process default.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Upper bound on how long a cached API response is kept; entries are
+# invalidated as soon as their models change, this only reclaims space.
+BOOKING_RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+# Profiling
+#
+# booking.profiling.SampledProfilingMiddleware records into Silk's tables
+# (browsable at /api/silk/) instead of SilkyMiddleware recording every
+# request. A request is kept when it is sampled, slower than
+# BOOKING_PROFILE_SLOW_MS, or sent with the BOOKING_PROFILE_HEADER header
+# (whose value must equal BOOKING_PROFILE_TOKEN when one is set). Records
+# are written by a background thread in batches.
+
+SILKY_MIDDLEWARE_CLASS = 'booking.profiling.SampledProfilingMiddleware'
+BOOKING_PROFILE_SAMPLE_RATE = float(os.environ.get('BOOKING_PROFILE_SAMPLE_RATE', 0.01))
+BOOKING_PROFILE_ROUTE_RATES = {
+    # url name -> sample rate, overriding BOOKING_PROFILE_SAMPLE_RATE
+    'create_booking': 0.05,
+    'batch_booking': 0.05,
+}
+BOOKING_PROFILE_SLOW_MS = 500
+BOOKING_PROFILE_HEADER = 'X-Profile'
+BOOKING_PROFILE_TOKEN = os.environ.get('BOOKING_PROFILE_TOKEN')
+BOOKING_PROFILE_BUFFER_SIZE = 1000
+BOOKING_PROFILE_FLUSH_INTERVAL = 2.0
+
+
+# Metrics
+#
+# booking.metrics.MetricsMiddleware keeps per-route histograms in process
+# and /api/metrics/ serves them in Prometheus text format. With more than
+# one worker process, point BOOKING_METRICS_DIR at a directory shared by
+# the workers (emptied on every server start) so the endpoint reports the
+# totals of all of them, not just of the worker that answered.
+
+BOOKING_METRICS_DIR = os.environ.get('BOOKING_METRICS_DIR')
+BOOKING_METRICS_WRITE_INTERVAL = 5
+
+
+# Async read endpoints
+#
+# When set, the read (GET) side of the API is served by the native async
+# views in booking.async_views; writes and exports still go through the
+# synchronous views. dbcourse3/asgi.py turns this on by default.
+
+BOOKING_ASYNC_VIEWS = os.environ.get('BOOKING_ASYNC_VIEWS') == '1'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -126,3 +258,14 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'booking.pagination.KeysetPagination',
+    # Default page size for the keyset-paginated list endpoints;
+    # clients can override it per request with ?page_size=.
+    'PAGE_SIZE': 100,
+}
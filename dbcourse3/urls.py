@@ -1,8 +1,9 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/', include('booking.urls')),
+    path('api/', include('booking.async_urls' if settings.BOOKING_ASYNC_VIEWS else 'booking.urls')),
 
 ]